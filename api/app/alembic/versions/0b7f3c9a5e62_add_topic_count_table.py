@@ -0,0 +1,78 @@
+"""Add topic_count table
+
+Revision ID: 0b7f3c9a5e62
+Revises: e6a94c2b8d10
+Create Date: 2026-10-19 23:48:15.207734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7f3c9a5e62'
+down_revision = 'e6a94c2b8d10'
+branch_labels = None
+depends_on = None
+
+# Must match TOPIC_COUNT_FUNCTION and TOPIC_COUNT_TRIGGER in app/models.py
+TOPIC_COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION topic_count_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND jsonb_typeof(OLD.key_topics) = 'array' THEN
+        UPDATE topic_count SET count = count - 1
+        WHERE owner_id = OLD.owner_id AND kind = TG_TABLE_NAME
+            AND topic IN (SELECT jsonb_array_elements_text(OLD.key_topics));
+        DELETE FROM topic_count
+        WHERE owner_id = OLD.owner_id AND kind = TG_TABLE_NAME AND count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND jsonb_typeof(NEW.key_topics) = 'array' THEN
+        INSERT INTO topic_count (owner_id, kind, topic, count)
+        SELECT DISTINCT NEW.owner_id, TG_TABLE_NAME, topic, 1
+        FROM jsonb_array_elements_text(NEW.key_topics) AS topic
+        ORDER BY topic
+        ON CONFLICT (owner_id, kind, topic) DO UPDATE SET count = topic_count.count + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TOPIC_COUNT_TRIGGER = """
+CREATE TRIGGER {table}_topic_count
+AFTER INSERT OR DELETE OR UPDATE OF key_topics, owner_id ON {table}
+FOR EACH ROW EXECUTE FUNCTION topic_count_update()
+"""
+
+BACKFILL = """
+INSERT INTO topic_count (owner_id, kind, topic, count)
+SELECT owner_id, '{table}', topic, count(*)
+FROM {table}, LATERAL (SELECT DISTINCT jsonb_array_elements_text(key_topics) AS topic) AS topics
+WHERE jsonb_typeof(key_topics) = 'array'
+GROUP BY owner_id, topic
+"""
+
+
+def upgrade():
+    op.create_table('topic_count',
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'kind', 'topic')
+    )
+    op.execute(TOPIC_COUNT_FUNCTION)
+    for table in ('conversation', 'person'):
+        # Counted and triggered under a lock, so no write falls in between
+        op.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+        op.execute(BACKFILL.format(table=table))
+        op.execute(TOPIC_COUNT_TRIGGER.format(table=table))
+
+
+def downgrade():
+    for table in ('conversation', 'person'):
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_topic_count ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS topic_count_update()')
+    op.drop_table('topic_count')
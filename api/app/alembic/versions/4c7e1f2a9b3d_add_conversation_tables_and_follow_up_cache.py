@@ -0,0 +1,63 @@
+"""Add conversation tables and follow-up cache
+
+Revision ID: 4c7e1f2a9b3d
+Revises: 1a31ce608336
+Create Date: 2026-10-19 09:12:40.118234
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4c7e1f2a9b3d'
+down_revision = '1a31ce608336'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The conversation tables used to be created by init_db() only, so they
+    # may already exist on deployed databases.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('conversation'):
+        op.create_table('conversation',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('owner_id', sa.UUID(), nullable=False),
+        sa.Column('day', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+        sa.Column('event', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+        sa.Column('transcript', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('summary', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('key_topics', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('follow_up_text', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not inspector.has_table('person'):
+        op.create_table('person',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('owner_id', sa.UUID(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+        sa.Column('person_description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('key_topics', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('links', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not inspector.has_table('participation'):
+        op.create_table('participation',
+        sa.Column('person_id', sa.UUID(), nullable=False),
+        sa.Column('conversation_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['conversation_id'], ['conversation.id'], ),
+        sa.ForeignKeyConstraint(['person_id'], ['person.id'], ),
+        sa.PrimaryKeyConstraint('person_id', 'conversation_id')
+        )
+    columns = {column['name'] for column in inspector.get_columns('conversation')}
+    if 'follow_up_interests' not in columns:
+        op.add_column('conversation', sa.Column('follow_up_interests', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('conversation', 'follow_up_interests')
@@ -0,0 +1,26 @@
+"""Add audio worker llm stats
+
+Revision ID: 5e1d7a3c9b48
+Revises: 0b7f3c9a5e62
+Create Date: 2026-10-20 10:12:44.530871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1d7a3c9b48'
+down_revision = '0b7f3c9a5e62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('audio_worker', sa.Column('llm', postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default='{}'))
+    op.alter_column('audio_worker', 'llm', server_default=None)
+
+
+def downgrade():
+    op.drop_column('audio_worker', 'llm')
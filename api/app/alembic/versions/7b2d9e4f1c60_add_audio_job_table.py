@@ -0,0 +1,46 @@
+"""Add audio job table
+
+Revision ID: 7b2d9e4f1c60
+Revises: 4c7e1f2a9b3d
+Create Date: 2026-10-19 11:03:27.514902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2d9e4f1c60'
+down_revision = '4c7e1f2a9b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audio_job',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('filename', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('file_path', sqlmodel.sql.sqltypes.AutoString(length=1024), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('worker_id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('stages', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('conversation_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversation.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audio_job_status'), 'audio_job', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_audio_job_status'), table_name='audio_job')
+    op.drop_table('audio_job')
@@ -0,0 +1,24 @@
+"""Add audio job not_before
+
+Revision ID: 9a4c2e7f1d05
+Revises: 5e1d7a3c9b48
+Create Date: 2026-10-21 09:26:13.184507
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c2e7f1d05'
+down_revision = '5e1d7a3c9b48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('audio_job', sa.Column('not_before', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('audio_job', 'not_before')
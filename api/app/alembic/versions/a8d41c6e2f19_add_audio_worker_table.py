@@ -0,0 +1,34 @@
+"""Add audio worker table
+
+Revision ID: a8d41c6e2f19
+Revises: f3a06d5c8e14
+Create Date: 2026-10-19 19:42:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d41c6e2f19'
+down_revision = 'f3a06d5c8e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audio_worker',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('jobs', sa.Integer(), nullable=False),
+    sa.Column('rss_mb', sa.Float(), nullable=True),
+    sa.Column('model_cache', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('audio_worker')
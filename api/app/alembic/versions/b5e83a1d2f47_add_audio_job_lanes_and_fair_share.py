@@ -0,0 +1,40 @@
+"""Add audio job lanes and fair share state
+
+Revision ID: b5e83a1d2f47
+Revises: 7b2d9e4f1c60
+Create Date: 2026-10-19 13:41:02.270581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e83a1d2f47'
+down_revision = '7b2d9e4f1c60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('audio_job', sa.Column('lane', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False, server_default='interactive'))
+    op.add_column('audio_job', sa.Column('audio_seconds', sa.Float(), nullable=False, server_default='0'))
+    op.alter_column('audio_job', 'lane', server_default=None)
+    op.alter_column('audio_job', 'audio_seconds', server_default=None)
+    op.create_index('ix_audio_job_queue', 'audio_job', ['status', 'lane', 'owner_id', 'created_at'], unique=False)
+    op.create_table('audio_fair_share',
+    sa.Column('lane', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('deficit', sa.Float(), nullable=False),
+    sa.Column('last_served_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('lane', 'owner_id')
+    )
+
+
+def downgrade():
+    op.drop_table('audio_fair_share')
+    op.drop_index('ix_audio_job_queue', table_name='audio_job')
+    op.drop_column('audio_job', 'audio_seconds')
+    op.drop_column('audio_job', 'lane')
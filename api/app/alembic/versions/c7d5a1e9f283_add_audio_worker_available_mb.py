@@ -0,0 +1,24 @@
+"""Add audio worker available_mb
+
+Revision ID: c7d5a1e9f283
+Revises: 9a4c2e7f1d05
+Create Date: 2026-10-21 11:04:37.612948
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d5a1e9f283'
+down_revision = '9a4c2e7f1d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('audio_worker', sa.Column('available_mb', sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('audio_worker', 'available_mb')
@@ -0,0 +1,32 @@
+"""Add created_at for keyset pagination
+
+Revision ID: c7f2a91d4e36
+Revises: a8d41c6e2f19
+Create Date: 2026-10-19 21:04:37.512093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f2a91d4e36'
+down_revision = 'a8d41c6e2f19'
+branch_labels = None
+depends_on = None
+
+TABLES = ('user', 'conversation', 'person')
+
+
+def upgrade():
+    # Existing rows share the migration time, the id keeps their order stable
+    for table in TABLES:
+        op.add_column(table, sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()))
+        op.alter_column(table, 'created_at', server_default=None)
+        op.create_index(f'ix_{table}_created_at_id', table, ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_created_at_id', table_name=table)
+        op.drop_column(table, 'created_at')
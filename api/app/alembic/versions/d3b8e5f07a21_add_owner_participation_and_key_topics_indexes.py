@@ -0,0 +1,31 @@
+"""Add owner, participation and key_topics indexes
+
+Revision ID: d3b8e5f07a21
+Revises: c7f2a91d4e36
+Create Date: 2026-10-19 22:17:09.381456
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b8e5f07a21'
+down_revision = 'c7f2a91d4e36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_conversation_owner_id_created_at_id', 'conversation', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_person_owner_id_created_at_id', 'person', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_participation_conversation_id', 'participation', ['conversation_id'], unique=False)
+    op.create_index('ix_conversation_key_topics', 'conversation', ['key_topics'], unique=False, postgresql_using='gin')
+    op.create_index('ix_person_key_topics', 'person', ['key_topics'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_person_key_topics', table_name='person')
+    op.drop_index('ix_conversation_key_topics', table_name='conversation')
+    op.drop_index('ix_participation_conversation_id', table_name='participation')
+    op.drop_index('ix_person_owner_id_created_at_id', table_name='person')
+    op.drop_index('ix_conversation_owner_id_created_at_id', table_name='conversation')
@@ -0,0 +1,25 @@
+"""Add audio job cancel_requested
+
+Revision ID: e1c4f7a83b92
+Revises: b5e83a1d2f47
+Create Date: 2026-10-19 15:22:48.903617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1c4f7a83b92'
+down_revision = 'b5e83a1d2f47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('audio_job', sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.alter_column('audio_job', 'cancel_requested', server_default=None)
+
+
+def downgrade():
+    op.drop_column('audio_job', 'cancel_requested')
@@ -0,0 +1,34 @@
+"""Add conversation search_vector
+
+Revision ID: e6a94c2b8d10
+Revises: d3b8e5f07a21
+Create Date: 2026-10-19 23:02:51.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a94c2b8d10'
+down_revision = 'd3b8e5f07a21'
+branch_labels = None
+depends_on = None
+
+# Must match SEARCH_VECTOR in app/models.py
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(key_topics, '[]'), '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('english', coalesce(transcript, '')), 'C')"
+)
+
+
+def upgrade():
+    op.add_column('conversation', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+    op.create_index('ix_conversation_search_vector', 'conversation', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_conversation_search_vector', table_name='conversation')
+    op.drop_column('conversation', 'search_vector')
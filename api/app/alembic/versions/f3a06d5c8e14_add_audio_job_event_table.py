@@ -0,0 +1,36 @@
+"""Add audio job event table
+
+Revision ID: f3a06d5c8e14
+Revises: e1c4f7a83b92
+Create Date: 2026-10-19 17:05:11.642370
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a06d5c8e14'
+down_revision = 'e1c4f7a83b92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audio_job_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.UUID(), nullable=False),
+    sa.Column('type', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['audio_job.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audio_job_event_job_id'), 'audio_job_event', ['job_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_audio_job_event_job_id'), table_name='audio_job_event')
+    op.drop_table('audio_job_event')
@@ -0,0 +1,138 @@
+import base64
+import json
+import uuid
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, Literal
+
+from fastapi import HTTPException
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import Session, func, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Listings are ordered newest first by (created_at, id) and continue after an
+# opaque cursor, so a deep page costs the same as the first one. Counting is
+# a separate query and left out unless asked for:
+#   none      no count
+#   estimate  the planner's row estimate, no scan
+#   exact     count(*) over all matching rows
+CountMode = Literal["none", "estimate", "exact"]
+
+
+def _encode(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+
+def encode_cursor(row: Any) -> str:
+    """Cursor pointing after ``row``, which has ``created_at`` and ``id``."""
+    return _encode([row.created_at.isoformat(), str(row.id)])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Decodes a cursor returned by encode_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        created_at, id = _decode(cursor)
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_rank_cursor(row: Any) -> str:
+    """Cursor pointing after ``row`` of a ranked listing, which has ``rank`` and ``id``."""
+    return _encode([row.rank, str(row.id)])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    """
+    Decodes a cursor returned by encode_rank_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        rank, id = _decode(cursor)
+        return float(rank), uuid.UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(statement: Any, model: Any, cursor: str | None, limit: int) -> Any:
+    """
+    The page of ``statement`` after ``cursor``, newest first.
+
+    One row more than ``limit`` is selected, to know whether there is a next
+    page; split the result with page().
+    """
+    if cursor is not None:
+        created_at, id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(model.created_at, model.id) < tuple_(created_at, id)
+        )
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def page(
+    rows: Any, limit: int, encode: Callable[[Any], str] = encode_cursor
+) -> tuple[list, str | None]:
+    """
+    Rows of a page selected with ``limit + 1`` (see paginate()), and the
+    cursor of the next page if there is one.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], encode(rows[limit - 1])
+
+
+def count_statement(statement: Any) -> Any:
+    return statement.with_only_columns(
+        func.count(), maintain_column_froms=True
+    ).order_by(None)
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, returning the plan as one JSON value."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _plan_rows(plan: list[dict]) -> int:
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(session: Session, statement: Any, mode: CountMode) -> int | None:
+    """Number of rows matching ``statement`` (before pagination), as requested by ``mode``."""
+    if mode == "exact":
+        return session.exec(count_statement(statement)).one()
+    if mode == "estimate":
+        return _plan_rows(session.execute(Explain(statement)).scalar_one())
+    return None
+
+
+async def acount_rows(
+    session: AsyncSession, statement: Any, mode: CountMode
+) -> int | None:
+    """Async version of count_rows()."""
+    if mode == "exact":
+        return (await session.exec(count_statement(statement))).one()
+    if mode == "estimate":
+        return _plan_rows((await session.execute(Explain(statement))).scalar_one())
+    return None
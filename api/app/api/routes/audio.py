@@ -1,93 +1,199 @@
+import asyncio
+import json
 import logging
 import os
+import time
 import uuid
-from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from sqlmodel import Session, select, func
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.db import engine
 from app.api.deps import CurrentUser, SessionDep
-from app.models import Message, User
-from app.models import Conversation, ConversationCreate
-from app.models import Person, PersonCreate
-from app.audio_processing.audio_pipeline import process
-from app.crud import create_conversation_db, create_person_db
+from app.models import AudioJob, AudioJobPublic, User
+from app.audio_processing.admission import AdmissionRejected, check_admission, check_memory
+from app.audio_processing.fair_share import estimate_audio_seconds
+from app.audio_processing.job_queue import cancel_job, enqueue_job, read_job_events
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/audio", tags=["audio"])
-# For development purposes, I removed the need for authentication in this example.
-@router.post("/upload")
-async def upload_audio(
+
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail={
+            "message": e.reason,
+            "retry_after_seconds": e.retry_after,
+            "eta_seconds": e.eta_seconds,
+        },
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+# A plain def, so FastAPI runs the file and database work in its threadpool
+@router.post("/upload", response_model=AudioJobPublic, status_code=202)
+def upload_audio(
     session: SessionDep,
-    #current_user: CurrentUser,  # Assuming a dummy user ID for development purposes, change later id = current_user --> id = current_user.id
-    file: UploadFile = File(...)
+    current_user: CurrentUser,
+    file: UploadFile = File(...),
+    lane: Literal["interactive", "bulk"] | None = Form(None),
 ):
-    # Example logic: save file, log user, etc.
-    contents = await file.read()
+    """
+    Store an upload and queue it for the audio workers.
+
+    Short recordings are queued in the interactive lane and longer ones as
+    bulk, unless ``lane`` is given (e.g. "bulk" for archive imports).
+    Poll GET /audio/jobs/{id} for the resulting conversation.
+
+    The job belongs to the current user, who is its owner for the pending
+    jobs limit and the fair share of the workers.
+    Answers 429 if the owner has too many pending recordings and 503 if the
+    workers are over capacity, with Retry-After and the current ETA.
+    """
+    try:
+        check_memory(session=session)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    contents = file.file.read()
     if len(contents) > 50 * 1024 * 1024:  # 50 MB limit
         raise HTTPException(status_code=413, detail="File is too large.")
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)  # ✅ Ensure directory exists
-    
-    file_path = os.path.join(upload_dir, file.filename)
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)  # ✅ Ensure directory exists
+
+    # Unique name, so two uploads of "recording.m4a" never overwrite each other
+    extension = os.path.splitext(file.filename)[1].lower()
+    file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}{extension}")
     with open(file_path, "wb") as f:
         f.write(contents)
-    # You can use session and current_user here as needed
-    processed_result = process(f"uploads/{file.filename}")
-    if not processed_result:
-        raise HTTPException(status_code=500, detail="Audio processing failed.")
-    #create conversation from processed result
-
-    person_ids = [str(uuid.uuid4()) for person in processed_result["result"].persons]
-    conversation_id = str(uuid.uuid4())
-    logger.info(f"Creating db")
-    #create persons from processed result
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-    logger.info(f"User count: {count}")
-    current_user_id = session.exec(select(User.id).where(User.email == settings.FIRST_SUPERUSER)).first()
-    logger.info(f"Current user id: {current_user_id}")
-
-    persons = []
-    for person,id in list(zip(processed_result["result"].persons,person_ids)):
-        person_in = PersonCreate(
-            id=id,
-            owner_id=current_user_id,
-            name=person.name,
-            person_description=person.person_description,
-            key_topics=person.key_topics,
-            conversation_ids=[conversation_id],
-        )
-        persons.append( create_person_db(session=session,
-                                    person_in = person_in,
-                                    owner_id = current_user_id
-                                    ))  
-
-    conversation_in = ConversationCreate(
-        title=file.filename,
-        description="Audio file processed",
-        id = conversation_id,  # Generate a unique ID for the conversation 
-        owner_id=current_user_id,
-        person_ids=person_ids,
-        day = datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        event = "Audio Processing Event",
-        transcript=processed_result["content"],
-        summary=processed_result["result"].summary,
-        key_topics=processed_result["result"].key_topics,
-        follow_up_text=processed_result["follow_up_text"]
+
+    audio_seconds = estimate_audio_seconds(file_path)
+    try:
+        eta = check_admission(session=session, owner_id=current_user.id, audio_seconds=audio_seconds)
+    except AdmissionRejected as e:
+        os.remove(file_path)
+        logger.warning(f"Refused upload of {file.filename}: {e.reason}")
+        raise _rejected(e)
+
+    job = enqueue_job(
+        session=session,
+        owner_id=current_user.id,
+        filename=file.filename,
+        file_path=file_path,
+        lane=lane,
+        audio_seconds=audio_seconds,
+    )
+    logger.info(f"Queued job {job.id} for {file.filename} in lane {job.lane}, ETA {eta}s")
+    return AudioJobPublic.model_validate(job, update={"eta_seconds": eta})
+
+
+def _read_own_job(session: Session, current_user: User, id: uuid.UUID) -> AudioJob:
+    job = session.get(AudioJob, id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not current_user.is_superuser and (job.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return job
+
+
+@router.get("/jobs/{id}", response_model=AudioJobPublic)
+def read_audio_job(session: SessionDep, current_user: CurrentUser, id: uuid.UUID):
+    """
+    Get the status of an audio job.
+    """
+    return _read_own_job(session, current_user, id)
+
+
+@router.delete("/jobs/{id}", response_model=AudioJobPublic)
+def delete_audio_job(session: SessionDep, current_user: CurrentUser, id: uuid.UUID):
+    """
+    Cancel an audio job.
+
+    Queued jobs are cancelled right away. A running job is stopped by its
+    worker within a few seconds; until then it is returned as running with
+    cancel_requested set.
+    """
+    _read_own_job(session, current_user, id)
+    job = cancel_job(session=session, job_id=id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status not in ("cancelled", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    return job
+
+
+TERMINAL_STATUSES = ("done", "failed", "cancelled")
+
+
+def _sse(event: str, data: dict, id: int | None = None) -> str:
+    message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return f"id: {id}\n{message}" if id is not None else message
+
+
+def _poll_job_events(job_id: uuid.UUID, after_id: int):
+    with Session(engine) as session:
+        job = session.get(AudioJob, job_id)
+        events = read_job_events(session=session, job_id=job_id, after_id=after_id)
+        return job, [(event.id, event.type, event.data) for event in events]
+
+
+@router.get("/jobs/{id}/events")
+async def read_audio_job_events(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    last_event_id: str | None = Header(None),
+):
+    """
+    Stream the progress of an audio job as Server-Sent Events.
+
+    Events: "status" on every status change, "stage" when a pipeline stage
+    starts or finishes, "diarization" with the progress of each pyannote step,
+    "segments" with the Whisper segments of every transcribed window, and a
+    final "end" with the job once it is done, failed or cancelled.
+    Reconnecting clients resume after the Last-Event-ID they received.
+    """
+    _read_own_job(session, current_user, id)
+    try:
+        after_id = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        after_id = 0
+
+    async def stream():
+        nonlocal after_id
+        status = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            # The job is read before its events, so once it is finished all its events are visible
+            job, events = await run_in_threadpool(_poll_job_events, id, after_id)
+            if job is None:
+                return
+            for event_id, type, data in events:
+                yield _sse(type, data, event_id)
+                after_id = event_id
+            if job.status != status:
+                status = job.status
+                yield _sse("status", {"status": status, "attempts": job.attempts})
+            if status in TERMINAL_STATUSES and not events:
+                yield _sse("end", AudioJobPublic.model_validate(job).model_dump(mode="json"))
+                return
+            if events:
+                last_sent = time.monotonic()
+                continue
+            if time.monotonic() - last_sent > settings.AUDIO_EVENTS_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(settings.AUDIO_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    conversation = create_conversation_db(session = session,
-                                            conversation_in = conversation_in,
-                                            owner_id = current_user_id
-                                            )                                            
-
-    return {
-    "filename": file.filename,
-    "message": "Upload successful!",
-    "conversation_id": conversation.id,
-    "person_ids": [person.id for person in persons],
-    "follow_up_text": conversation.follow_up_text
-}
\ No newline at end of file
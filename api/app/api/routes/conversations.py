@@ -1,56 +1,171 @@
+import logging
 import uuid
-from typing import Any
+from typing import Any, Literal
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
-from app.crud import create_conversation_db, update_conversation_db
+from fastapi import APIRouter, HTTPException, Query
+from sqlmodel import select
+from app.crud import acreate_conversation_db, aupdate_conversation_db, asearch_conversations_db
+from app.crud import atopic_counts_db, key_topics_filter, save_conversation_follow_up
+from app.crud import apply_reprocessed_conversation_db
+from app.core.config import settings
+from app.audio_processing.llm_scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, LLMCallError
 
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import AsyncCurrentUser, AsyncSessionDep, CurrentUser, SessionDep
+from app.api.pagination import CountMode, acount_rows, decode_rank_cursor, encode_rank_cursor, page, paginate
 from app.models import Message
 from app.models import Conversation,ConversationCreate,ConversationUpdate,ConversationPublic,ConversationsPublic
-from app.models import Person
+from app.models import ConversationFollowUp, ConversationReprocess, ConversationsReprocess
+from app.models import ConversationSearchResults, TopicCountsPublic
+from app.models import ConversationReprocessed, ConversationsReprocessed
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/conversation", tags=["conversations"])
 
 
 @router.get("/", response_model=ConversationsPublic)
-def read_conversations(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def read_conversations(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    count: CountMode = "none",
+    topics: list[str] = Query(default=[]),
+    match: Literal["any", "all"] = "any",
 ) -> Any:
     """
-    Retrieve conversations.
+    Retrieve conversations, newest first.
+
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page. With
+    ``topics`` only those with any (``match=any``) or all (``match=all``) of
+    the key topics are listed.
     """
+    statement = select(Conversation)
+    if not current_user.is_superuser:
+        statement = statement.where(Conversation.owner_id == current_user.id)
+    if topics:
+        statement = statement.where(key_topics_filter(Conversation, topics, match))
+    rows = await session.exec(paginate(statement, Conversation, cursor, limit))
+    conversations, next_cursor = page(rows, limit)
+    total = await acount_rows(session, statement, count)
+    return ConversationsPublic(data=conversations, count=total, next_cursor=next_cursor)
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Conversation)
-        count = session.exec(count_statement).one()
-        statement = select(Conversation).offset(skip).limit(limit)
-        conversations = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Conversation)
-            .where(Conversation.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Conversation)
-            .where(Conversation.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+
+@router.get("/search", response_model=ConversationSearchResults)
+async def search_conversations(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    q: str = Query(min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+) -> Any:
+    """
+    Full-text search over the transcripts, summaries and key topics, best match first.
+
+    ``q`` takes web-search syntax: quoted phrases, ``or`` and ``-excluded``
+    words. Pass the returned ``next_cursor`` as ``cursor`` for the next page.
+    """
+    rows = await asearch_conversations_db(
+        session=session,
+        q=q,
+        owner_id=None if current_user.is_superuser else current_user.id,
+        after=decode_rank_cursor(cursor) if cursor is not None else None,
+        limit=limit + 1,
+    )
+    results, next_cursor = page(rows, limit, encode=encode_rank_cursor)
+    return ConversationSearchResults(data=results, next_cursor=next_cursor)
+
+
+@router.get("/topics", response_model=TopicCountsPublic)
+async def read_conversation_topics(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> Any:
+    """
+    Key topics of the conversations GET /conversation/ lists (the current
+    user's, or everybody's for a superuser), most frequent first, with the
+    number of conversations having each.
+    """
+    counts = await atopic_counts_db(
+        session=session,
+        owner_id=None if current_user.is_superuser else current_user.id,
+        kind="conversation",
+        limit=limit,
+    )
+    return TopicCountsPublic(data=counts)
+
+
+@router.post("/reprocess", response_model=ConversationsReprocessed)
+def reprocess_conversations(
+    session: SessionDep, current_user: CurrentUser, reprocess_in: ConversationsReprocess
+) -> Any:
+    """
+    Re-run LLM stages on the stored transcripts of many conversations.
+
+    At most REPROCESS_CONCURRENCY conversations are sent to the LLM at a time.
+    Conversations that are missing, not permitted, without transcript or whose
+    LLM calls failed are returned in ``failed``.
+    """
+    # The LLM chains (langchain, pandas) are only imported by the routes that use them
+    from app.audio_processing.llm_client import run_async
+    from app.audio_processing.sum_chain import DEFAULT_INTERESTS, areprocess_transcripts
+
+    statement = select(Conversation).where(Conversation.id.in_(reprocess_in.ids))
+    if not current_user.is_superuser:
+        statement = statement.where(Conversation.owner_id == current_user.id)
+    conversations = {
+        conversation.id: conversation
+        for conversation in session.exec(statement).all()
+        if conversation.transcript
+    }
+
+    outputs = run_async(
+        areprocess_transcripts(
+            {id: conversation.transcript for id, conversation in conversations.items()},
+            concurrency=settings.REPROCESS_CONCURRENCY,
+            stages=reprocess_in.stages,
+            interests=reprocess_in.interests,
+            use_cache=reprocess_in.use_cache,
+            priority=PRIORITY_BULK,
         )
-        conversations = session.exec(statement).all()
+    )
 
-    return ConversationsPublic(data=conversations, count=count)
+    data = []
+    for id, output in outputs.items():
+        if isinstance(output, Exception):
+            logger.error(f"Reprocessing conversation {id} failed: {output}")
+            continue
+        if "follow_up" in reprocess_in.stages and not output["follow_up_text"]:
+            logger.error(f"Reprocessing conversation {id} failed: no follow-up drafted")
+            continue
+        conversation = apply_reprocessed_conversation_db(
+            session=session,
+            conversation=conversations[id],
+            result=output["result"],
+            follow_up_text=output["follow_up_text"],
+            interests=reprocess_in.interests or DEFAULT_INTERESTS,
+        )
+        data.append(
+            ConversationReprocessed(
+                conversation_id=conversation.id,
+                stages=reprocess_in.stages,
+                person_ids=[person.id for person in conversation.persons],
+            )
+        )
+    done = {item.conversation_id for item in data}
+    failed = [id for id in reprocess_in.ids if id not in done]
+    return ConversationsReprocessed(data=data, failed=failed)
 
 
 @router.get("/{id}", response_model=ConversationPublic)
-def read_conversation(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+async def read_conversation(session: AsyncSessionDep, current_user: AsyncCurrentUser, id: uuid.UUID) -> Any:
     """
     Get Conversation by ID.
     """
-    conversation = session.get(Conversation, id)
+    conversation = await session.get(Conversation, id)
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     if not current_user.is_superuser and (conversation.owner_id != current_user.id):
@@ -58,47 +173,164 @@ def read_conversation(session: SessionDep, current_user: CurrentUser, id: uuid.U
     return conversation
 
 
+@router.get("/{id}/follow-up", response_model=ConversationFollowUp)
+def read_conversation_follow_up(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    interests: list[str] | None = Query(default=None),
+) -> Any:
+    """
+    Get the follow-up email of a conversation.
+
+    It is generated on the first request and cached on the conversation
+    until the interests or the transcript change.
+    """
+    from app.audio_processing.llm_client import run_async
+    from app.audio_processing.sum_chain import DEFAULT_INTERESTS, adraft_follow_up
+
+    conversation = session.get(Conversation, id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if not current_user.is_superuser and (conversation.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    if not conversation.transcript:
+        raise HTTPException(status_code=400, detail="Conversation has no transcript")
+
+    interests = interests or DEFAULT_INTERESTS
+    cached_interests = conversation.follow_up_interests or DEFAULT_INTERESTS
+    if conversation.follow_up_text is not None and cached_interests == interests:
+        return ConversationFollowUp(
+            conversation_id=conversation.id,
+            follow_up_text=conversation.follow_up_text,
+            interests=interests,
+            cached=True,
+        )
+
+    follow_up_text = run_async(adraft_follow_up(conversation.transcript, interests=interests))
+    if not follow_up_text:
+        raise HTTPException(
+            status_code=503,
+            detail="Language model is currently unavailable, please retry later.",
+            headers={"Retry-After": "60"},
+        )
+    save_conversation_follow_up(
+        session=session,
+        conversation=conversation,
+        follow_up_text=follow_up_text,
+        interests=interests,
+    )
+    return ConversationFollowUp(
+        conversation_id=conversation.id,
+        follow_up_text=follow_up_text,
+        interests=interests,
+        cached=False,
+    )
+
+
+@router.post("/{id}/reprocess", response_model=ConversationReprocessed)
+def reprocess_conversation(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    reprocess_in: ConversationReprocess,
+) -> Any:
+    """
+    Re-run LLM stages on the stored transcript, without repeating the audio processing.
+    """
+    from app.audio_processing.llm_client import run_async
+    from app.audio_processing.sum_chain import DEFAULT_INTERESTS, areprocess_transcript
+
+    conversation = session.get(Conversation, id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if not current_user.is_superuser and (conversation.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    if not conversation.transcript:
+        raise HTTPException(status_code=400, detail="Conversation has no transcript")
+
+    try:
+        output = run_async(
+            areprocess_transcript(
+                conversation.transcript,
+                stages=reprocess_in.stages,
+                interests=reprocess_in.interests,
+                use_cache=reprocess_in.use_cache,
+                priority=PRIORITY_INTERACTIVE,
+            )
+        )
+    except LLMCallError as e:
+        logger.error(f"Reprocessing conversation {id} failed: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Language model is currently unavailable, please retry later.",
+            headers={"Retry-After": "60"},
+        )
+    if "follow_up" in reprocess_in.stages and not output["follow_up_text"]:
+        # adraft_follow_up returns "" instead of raising when the model fails
+        logger.error(f"Reprocessing conversation {id} failed: no follow-up drafted")
+        raise HTTPException(
+            status_code=503,
+            detail="Language model is currently unavailable, please retry later.",
+            headers={"Retry-After": "60"},
+        )
+    conversation = apply_reprocessed_conversation_db(
+        session=session,
+        conversation=conversation,
+        result=output["result"],
+        follow_up_text=output["follow_up_text"],
+        interests=reprocess_in.interests or DEFAULT_INTERESTS,
+    )
+    return ConversationReprocessed(
+        conversation_id=conversation.id,
+        stages=reprocess_in.stages,
+        person_ids=[person.id for person in conversation.persons],
+    )
+
+
 @router.post("/", response_model=ConversationPublic)
-def create_conversation(
-    *, session: SessionDep, current_user: CurrentUser, conversation_in: ConversationCreate
+async def create_conversation(
+    *, session: AsyncSessionDep, current_user: AsyncCurrentUser, conversation_in: ConversationCreate
 ) -> Any:
     """
     Create new conversation.
     """
-    return create_conversation_db(session, conversation_in, current_user.id)
+    return await acreate_conversation_db(
+        session=session, conversation_in=conversation_in, owner_id=current_user.id
+    )
 
 @router.put("/{id}", response_model=ConversationPublic)
-def update_conversation(
+async def update_conversation(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
     id: uuid.UUID,
     conversation_in: ConversationUpdate,
 ) -> Any:
     """
     Update an conversation.
     """
-    return update_conversation_db(
+    return await aupdate_conversation_db(
         session=session,
         owner_id=current_user.id,
         is_superuser=current_user.is_superuser,
-        id=id, 
+        id=id,
         conversation_in=conversation_in)
 
 
 @router.delete("/{id}")
-def delete_conversation(
-    session: SessionDep, current_user: CurrentUser, id: uuid.UUID
+async def delete_conversation(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, id: uuid.UUID
 ) -> Message:
     """
     Delete a conversation.
     """
-    conversation = session.get(Conversation, id)
+    conversation = await session.get(Conversation, id)
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     if not current_user.is_superuser and (conversation.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(conversation)
-    session.commit()
+    await session.delete(conversation)
+    await session.commit()
     return Message(message="Conversation deleted successfully")
 
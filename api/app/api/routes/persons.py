@@ -1,55 +1,74 @@
 import uuid
-from typing import Any
+from typing import Any, Literal
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Query
+from sqlmodel import select
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import AsyncCurrentUser, AsyncSessionDep
+from app.api.pagination import CountMode, acount_rows, page, paginate
 from app.models import Message
 from app.models import Conversation
 from app.models import Person, PersonCreate, PersonUpdate, PersonPublic, PersonsPublic
-from app.crud import create_person_db, update_person_db
+from app.models import TopicCountsPublic
+from app.crud import acreate_person_db, atopic_counts_db, aupdate_person_db, key_topics_filter
 
 router = APIRouter(prefix="/persons", tags=["persons"])
 
 
 @router.get("/", response_model=PersonsPublic)
-def read_conversations(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def read_persons(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    count: CountMode = "none",
+    topics: list[str] = Query(default=[]),
+    match: Literal["any", "all"] = "any",
 ) -> Any:
     """
-    Retrieve persons.
+    Retrieve persons, newest first.
+
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page. With
+    ``topics`` only those with any (``match=any``) or all (``match=all``) of
+    the key topics are listed.
     """
+    statement = select(Person)
+    if not current_user.is_superuser:
+        statement = statement.where(Person.owner_id == current_user.id)
+    if topics:
+        statement = statement.where(key_topics_filter(Person, topics, match))
+    rows = await session.exec(paginate(statement, Person, cursor, limit))
+    persons, next_cursor = page(rows, limit)
+    total = await acount_rows(session, statement, count)
+    return PersonsPublic(data=persons, count=total, next_cursor=next_cursor)
+
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Person)
-        count = session.exec(count_statement).one()
-        statement = select(Person).offset(skip).limit(limit)
-        persons = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Person)
-            .where(Person.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Person)
-            .where(Person.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        persons = session.exec(statement).all()
-
-    return PersonsPublic(data=persons, count=count)
+@router.get("/topics", response_model=TopicCountsPublic)
+async def read_person_topics(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> Any:
+    """
+    Key topics of the persons GET /persons/ lists (the current user's, or
+    everybody's for a superuser), most frequent first, with the number of
+    persons having each.
+    """
+    counts = await atopic_counts_db(
+        session=session,
+        owner_id=None if current_user.is_superuser else current_user.id,
+        kind="person",
+        limit=limit,
+    )
+    return TopicCountsPublic(data=counts)
 
 
 @router.get("/{id}", response_model=PersonPublic)
-def read_person(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+async def read_person(session: AsyncSessionDep, current_user: AsyncCurrentUser, id: uuid.UUID) -> Any:
     """
     Get person by ID.
     """
-    person = session.get(Person, id)
+    person = await session.get(Person, id)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
     if not current_user.is_superuser and (person.owner_id != current_user.id):
@@ -58,23 +77,23 @@ def read_person(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -
 
 
 @router.post("/", response_model=PersonPublic)
-def create_person(
-    *, session: SessionDep, current_user: CurrentUser, person_in: PersonCreate
+async def create_person(
+    *, session: AsyncSessionDep, current_user: AsyncCurrentUser, person_in: PersonCreate
 ) -> Any:
     """
     Create new person.
     """
-    return create_person_db(session, person_in, current_user.id)
+    return await acreate_person_db(session=session, person_in=person_in, owner_id=current_user.id)
 
 @router.put("/{id}", response_model=PersonPublic)
-def update_person(
+async def update_person(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
     id: uuid.UUID,
     person_in: PersonUpdate,
 ) -> Any:
-    return update_person_db(
+    return await aupdate_person_db(
         session=session,
         owner_id = current_user.id,
         is_superuser = current_user.is_superuser,
@@ -84,18 +103,18 @@ def update_person(
 
 
 @router.delete("/{id}")
-def delete_person(
-    session: SessionDep, current_user: CurrentUser, id: uuid.UUID
+async def delete_person(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, id: uuid.UUID
 ) -> Message:
     """
     Delete a person.
     """
-    person = session.get(Person, id)
+    person = await session.get(Person, id)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
     if not current_user.is_superuser and (person.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(person)
-    session.commit()
+    await session.delete(person)
+    await session.commit()
     return Message(message="Person deleted successfully")
 
@@ -2,8 +2,8 @@ import uuid
 from typing import Any
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
@@ -11,6 +11,7 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.pagination import CountMode, count_rows, page, paginate
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -38,18 +39,21 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
-    """
-    Retrieve users.
+def read_users(
+    session: SessionDep,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    count: CountMode = "none",
+) -> Any:
     """
+    Retrieve users, newest first.
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
-
-    return UsersPublic(data=users, count=count)
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page.
+    """
+    statement = select(User)
+    users, next_cursor = page(session.exec(paginate(statement, User, cursor, limit)), limit)
+    total = count_rows(session, statement, count)
+    return UsersPublic(data=users, count=total, next_cursor=next_cursor)
 
 
 @router.post(
@@ -1,8 +1,18 @@
+from datetime import timedelta
+
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic.networks import EmailStr
 
-from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.api.deps import SessionDep, get_current_active_superuser
+from app.audio_processing.job_queue import list_workers, queue_stats
+from app.audio_processing.llm_cache import get_llm_cache
+from app.audio_processing.llm_scheduler import get_llm_scheduler
+from app.core.config import settings
+from app.core.db import async_engine, check_db_connection, engine
+from app.core.startup import readiness
+from app.models import AudioQueueStats, AudioWorkersPublic, Message
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -26,6 +36,122 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
-@router.get("/health-check/")
-async def health_check() -> bool:
-    return True
+@router.get(
+    "/llm-cache/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def llm_cache_stats(session: SessionDep) -> dict:
+    """
+    Hit/miss counters of the LLM response cache, per process and in total.
+
+    The LLM stages run in the audio workers, so their counters (as last
+    reported, like GET /utils/audio-workers/) carry the main workload; "api"
+    holds this API process's own. The entries are shared by all processes
+    through the cache file.
+    """
+    api = get_llm_cache().stats()
+    workers = {
+        worker.id: worker.llm["cache"]
+        for worker in list_workers(
+            session=session,
+            active_within=timedelta(seconds=settings.AUDIO_JOB_STALE_SECONDS),
+        )
+        if "cache" in worker.llm
+    }
+    hits = api["hits"] + sum(stats["hits"] for stats in workers.values())
+    misses = api["misses"] + sum(stats["misses"] for stats in workers.values())
+    return {
+        "api": api,
+        "workers": workers,
+        "total": {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": api["entries"],
+        },
+    }
+
+
+@router.get(
+    "/llm-scheduler/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def llm_scheduler_stats(session: SessionDep) -> dict:
+    """
+    Queue depth, retries and latency percentiles of the LLM schedulers.
+
+    Every process schedules its own calls; the audio workers (as last
+    reported) run the main workload, "api" is this API process.
+    """
+    workers = {
+        worker.id: worker.llm["scheduler"]
+        for worker in list_workers(
+            session=session,
+            active_within=timedelta(seconds=settings.AUDIO_JOB_STALE_SECONDS),
+        )
+        if "scheduler" in worker.llm
+    }
+    return {"api": get_llm_scheduler().stats(), "workers": workers}
+
+
+@router.get(
+    "/audio-queue/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def audio_queue_stats(session: SessionDep) -> AudioQueueStats:
+    """
+    Queued jobs and queue wait percentiles per audio job lane.
+    """
+    return queue_stats(
+        session=session, window_minutes=settings.AUDIO_QUEUE_STATS_WINDOW_MINUTES
+    )
+
+
+@router.get(
+    "/audio-workers/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def audio_workers(session: SessionDep) -> AudioWorkersPublic:
+    """
+    Memory, resident models and recent model loads/evictions of the running audio workers.
+    """
+    workers = list_workers(
+        session=session,
+        active_within=timedelta(seconds=settings.AUDIO_JOB_STALE_SECONDS),
+    )
+    return AudioWorkersPublic(data=workers, count=len(workers))
+
+
+@router.get(
+    "/db-pool/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def db_pool_stats() -> dict:
+    """
+    Checked-out connections, checkout wait percentiles, overflow connections and
+    timeouts of this process's pools, for the sync and the async engine.
+    """
+    return {"sync": engine.pool.stats(), "async": async_engine.pool.stats()}
+
+
+@router.get("/health/live")
+async def health_live() -> JSONResponse:
+    """
+    Liveness: the process serves requests and no required startup check failed.
+    """
+    return JSONResponse(
+        {"live": readiness.live, "checks": readiness.checks},
+        status_code=200 if readiness.live else 503,
+    )
+
+
+@router.get("/health/ready")
+async def health_ready() -> JSONResponse:
+    """
+    Readiness: startup finished and the database is reachable right now.
+    """
+    ready = readiness.ready and await run_in_threadpool(check_db_connection)
+    return JSONResponse(
+        {"ready": ready, "checks": readiness.checks},
+        status_code=200 if ready else 503,
+    )
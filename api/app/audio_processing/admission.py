@@ -0,0 +1,193 @@
+import logging
+import math
+import os
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import extract, func
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import AudioJob, AudioWorker, utcnow
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ("queued", "running")
+# Retry hint when memory is short; there is no backlog to base it on
+MEMORY_RETRY_AFTER_SECONDS = 30
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when an upload is refused because the audio workers are over capacity.
+
+    Args:
+        status_code (int): 429 if the owner has too much pending work, 503 if
+            the whole service is over capacity.
+        reason (str): Human readable reason.
+        retry_after (int): Seconds until a retry will probably be admitted.
+        eta_seconds (int, optional): Estimated time until the current backlog is processed.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        reason: str,
+        retry_after: int,
+        eta_seconds: int | None = None,
+    ):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+        self.eta_seconds = eta_seconds
+
+
+def available_memory_mb() -> float | None:
+    """Memory available to new allocations on this host, or None if unknown."""
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return (
+            os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        )
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _live_worker(now):
+    """Workers that reported within AUDIO_JOB_STALE_SECONDS."""
+    return AudioWorker.updated_at >= now - timedelta(
+        seconds=settings.AUDIO_JOB_STALE_SECONDS
+    )
+
+
+def check_memory(*, session: Session) -> None:
+    """
+    Refuses uploads while every live audio worker is short of memory.
+
+    Workers report the memory available on their host with each heartbeat
+    (see worker.run_worker()). A worker without a report counts as having
+    memory, and without live workers uploads are only limited by
+    check_admission().
+    """
+    reports = session.exec(
+        select(AudioWorker.available_mb).where(_live_worker(utcnow()))
+    ).all()
+    if not reports or any(
+        available is None or available >= settings.AUDIO_MIN_FREE_MEMORY_MB
+        for available in reports
+    ):
+        return
+    logger.warning(
+        f"Refusing upload, the audio workers have at most {max(reports):.0f} MB memory available"
+    )
+    raise AdmissionRejected(
+        503,
+        "Server is low on memory, please retry later.",
+        MEMORY_RETRY_AFTER_SECONDS,
+    )
+
+
+def throughput(session: Session) -> float:
+    """
+    Audio seconds the workers process per wall-clock second.
+
+    The jobs finished in the window give the rate of one worker, in audio
+    seconds per second spent on them (so idle time does not count), which is
+    multiplied by the number of live workers. Falls back to
+    AUDIO_DEFAULT_THROUGHPUT when no job finished in the window.
+    """
+    window = timedelta(minutes=settings.AUDIO_THROUGHPUT_WINDOW_MINUTES)
+    now = utcnow()
+    processed, busy = session.exec(
+        select(
+            func.coalesce(func.sum(AudioJob.audio_seconds), 0.0),
+            func.coalesce(
+                func.sum(extract("epoch", AudioJob.finished_at - AudioJob.started_at)),
+                0.0,
+            ),
+        ).where(
+            (AudioJob.status == "done")
+            & (AudioJob.finished_at >= now - window)
+            & AudioJob.started_at.is_not(None)
+        )
+    ).one()
+    if processed <= 0 or busy <= 0:
+        return settings.AUDIO_DEFAULT_THROUGHPUT
+    workers = session.exec(select(func.count()).where(_live_worker(now))).one()
+    return float(processed) / float(busy) * max(workers, 1)
+
+
+def _seconds(value: float) -> int:
+    return max(1, math.ceil(value))
+
+
+def check_admission(
+    *, session: Session, owner_id: uuid.UUID, audio_seconds: float
+) -> int:
+    """
+    Decides whether a new upload may be queued.
+
+    The upload is refused when the queue holds AUDIO_MAX_QUEUED_JOBS, when the
+    owner already has AUDIO_MAX_PENDING_JOBS_PER_OWNER pending jobs, or when it
+    would push the pending audio past AUDIO_MAX_PENDING_AUDIO_SECONDS.
+    Retry-After and ETA are derived from the recent worker throughput.
+
+    Args:
+        session (Session): Database session.
+        owner_id (uuid.UUID): Owner of the upload.
+        audio_seconds (float): Estimated length of the upload.
+
+    Returns:
+        int: Estimated seconds until the upload is processed.
+
+    Raises:
+        AdmissionRejected: If the upload is over capacity.
+    """
+    pending = AudioJob.status.in_(PENDING_STATUSES)
+    jobs, pending_seconds = session.exec(
+        select(
+            func.count(), func.coalesce(func.sum(AudioJob.audio_seconds), 0.0)
+        ).where(pending)
+    ).one()
+    owner_jobs, owner_seconds = session.exec(
+        select(
+            func.count(), func.coalesce(func.sum(AudioJob.audio_seconds), 0.0)
+        ).where(pending & (AudioJob.owner_id == owner_id))
+    ).one()
+    rate = throughput(session)
+    eta = _seconds((pending_seconds + audio_seconds) / rate)
+
+    if owner_jobs >= settings.AUDIO_MAX_PENDING_JOBS_PER_OWNER:
+        raise AdmissionRejected(
+            429,
+            f"You already have {owner_jobs} recordings waiting to be processed.",
+            # Roughly the time one of the owner's jobs takes
+            _seconds(owner_seconds / max(owner_jobs, 1) / rate),
+            eta,
+        )
+    if jobs >= settings.AUDIO_MAX_QUEUED_JOBS:
+        raise AdmissionRejected(
+            503,
+            "Too many recordings are waiting to be processed.",
+            _seconds(pending_seconds / max(jobs, 1) / rate),
+            eta,
+        )
+    excess = pending_seconds + audio_seconds - settings.AUDIO_MAX_PENDING_AUDIO_SECONDS
+    # A recording longer than the limit itself is still admitted into an empty queue
+    if excess > 0 and pending_seconds > 0:
+        raise AdmissionRejected(
+            503,
+            "Too much audio is waiting to be processed.",
+            _seconds(excess / rate),
+            eta,
+        )
+    return eta
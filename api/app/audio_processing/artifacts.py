@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    """Hashes a file in chunks, so large recordings are never read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_key(name: str, version: str, input_keys, params=None) -> str:
+    """
+    Content address of a stage artifact.
+
+    The key only depends on the stage, its version and parameters and the keys
+    of its inputs, so it is known before any input is loaded.
+    """
+    payload = json.dumps(
+        {
+            "stage": name,
+            "version": version,
+            "inputs": list(input_keys),
+            "params": params or {},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for pipeline artifacts on the local disk.
+
+    Values are pickled under ``<root>/<key[:2]>/<key>``; stages that produce
+    files (e.g. the decoded WAV) get a path next to them via file_path().
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def file_path(self, key: str, suffix: str) -> str:
+        path = self._path(key) + suffix
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def load(self, key: str):
+        path = self._path(key)
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        # A cache hit counts as a use, so sweep() keeps artifacts that are still read
+        os.utime(path)
+        return value
+
+    def save(self, key: str, value) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f)
+        # Atomic, so a crash never leaves a truncated artifact behind
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str) -> None:
+        """Removes an artifact and every file stored next to it via file_path()."""
+        directory = os.path.dirname(self._path(key))
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if not name.startswith(key):
+                continue
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _last_used(self, directory: str, key: str) -> float:
+        mtimes = []
+        for name in os.listdir(directory):
+            if name.startswith(key):
+                try:
+                    mtimes.append(os.stat(os.path.join(directory, name)).st_mtime)
+                except FileNotFoundError:
+                    pass
+        return max(mtimes, default=0.0)
+
+    def sweep(self, max_age_seconds: float) -> int:
+        """
+        Deletes the artifacts (with the files next to them) and run records that
+        were not written or loaded within ``max_age_seconds``.
+
+        Returns:
+            int: The number of artifacts deleted.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        deleted = 0
+        for shard in os.listdir(self.root):
+            directory = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(directory):
+                continue
+            # Keys are sha256 hex digests, the files next to them add a suffix
+            for key in {name[:64] for name in os.listdir(directory)}:
+                if self._last_used(directory, key) < cutoff:
+                    self.delete(key)
+                    deleted += 1
+        runs = os.path.join(self.root, "runs")
+        if os.path.isdir(runs):
+            for name in os.listdir(runs):
+                path = os.path.join(runs, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+        logger.info(f"Swept {deleted} artifacts older than {max_age_seconds}s")
+        return deleted
+
+    def save_record(self, source_key: str, record: dict) -> None:
+        path = os.path.join(self.root, "runs", f"{source_key}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
@@ -1,16 +1,30 @@
 import os
 import sys
+import time
+import shutil
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from dotenv import load_dotenv
 from pathlib import Path
 
 from pyannote.core import Segment, Annotation
 from pydub import AudioSegment
 
-from app.audio_processing.diarize_audio import PyannoteDiarizer
 from app.audio_processing.transcribe_audio import transcribe_audio
 from app.audio_processing.align import SpeakerAligner
-from app.audio_processing.sum_chain import process_conversation,export_results_from_transcript,generate_follow_up_email
+from app.audio_processing.sum_chain import aclean_transcript, aprocess_conversation, adraft_follow_up
+from app.audio_processing.llm_client import run_async
+from app.audio_processing.artifacts import ArtifactStore, file_sha256, stage_key
+from app.audio_processing.cancellation import CancelToken, JobCancelled, check_cancelled
+from app.audio_processing.model_cache import (
+    DIARIZATION_MODEL,
+    WHISPER_MODEL,
+    use_diarizer,
+    use_whisper_model,
+)
+from app.core.config import settings
 
 load_dotenv()
 
@@ -47,57 +61,249 @@ def convert_to_wav(input_path, output_path=None):
         output_path = os.path.splitext(input_path)[0] + '.wav'
 
     audio.export(output_path, format='wav')
-    return  Path(input_path).with_suffix(".wav").as_posix()
-    
+    return Path(output_path).as_posix()
 
 
-def process(audio_path, output_name=OUTPUT_NAME):
-    logger.info("Loading environment variables from .env file :"+os.getenv("GEMINI_API_KEY"))
-    # Config and paths
-    audio_path = convert_to_wav(audio_path)
-    output_path = os.path.join("..", "data", "conv_summary", output_name)
-    hf_token = os.getenv("HF_TOKEN")
-    logger.info(f"Using Hugging Face token")
+class StageError(Exception):
+    """Raised when a pipeline stage produced no usable result."""
+
+
+# ``run(context, *inputs)`` gets the PipelineRun and its input artifacts;
+# stages that do not need the run name it ``_context``
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    inputs: tuple
+    run: object
+    version: str = "1"
+    params: tuple = ()
+
+
+def _decode(context, source_path):
+    wav_path = context.store.file_path(context.keys["decode"], ".wav")
+    if os.path.splitext(source_path)[1].lower() == ".wav":
+        shutil.copyfile(source_path, wav_path)
+    else:
+        convert_to_wav(source_path, output_path=wav_path)
+    return wav_path
+
 
-    # Diarization
-    diarizer = PyannoteDiarizer(hf_token=hf_token)
-    diarization = diarizer.diarize(audio_path)
+def _diarize(context, wav_path):
+    with use_diarizer(DIARIZATION_MODEL) as diarizer:
+        diarization = diarizer.diarize(
+            wav_path,
+            cancel_token=context.cancel_token,
+            on_progress=lambda step, completed, total: context.emit(
+                "diarization", step=step, completed=completed, total=total
+            ),
+        )
     if diarization is None:
-        logger.error("Diarization failed.")
-        return
-    logger.info(f"Diarization completed")
-    # Transcription
-    transcription = transcribe_audio(audio_path, key="segments")
+        raise StageError("Diarization failed.")
+    return diarization
+
+
+def _transcribe(context, wav_path):
+    # Finished windows are kept next to the artifact, so a restarted job
+    # continues after the last completed window
+    checkpoint_dir = context.store.file_path(context.keys["transcribe"], ".windows")
+    with use_whisper_model(WHISPER_MODEL) as model:
+        transcription = transcribe_audio(
+            wav_path,
+            model_name=WHISPER_MODEL,
+            model=model,
+            key="segments",
+            checkpoint_dir=checkpoint_dir,
+            window_seconds=settings.TRANSCRIBE_WINDOW_SECONDS,
+            cancel_token=context.cancel_token,
+            on_segments=lambda window, segments: context.emit(
+                "segments",
+                window=window,
+                segments=[
+                    {"id": s["id"], "start": s["start"], "end": s["end"], "text": s["text"]}
+                    for s in segments
+                ],
+            ),
+        )
     if not transcription or not isinstance(transcription, list):
-        logger.error("Transcription failed or returned unexpected format.")
-        return
+        raise StageError("Transcription failed or returned unexpected format.")
+    return transcription
 
-    # Alignment
-    aligner = SpeakerAligner()
-    aligned_transcriptions = aligner.align(transcription, diarization)
 
+def _align(_context, diarization, transcription):
+    aligned_transcriptions = SpeakerAligner().align(transcription, diarization)
     for speaker, start, end, text in aligned_transcriptions:
         print(f"Speaker {speaker}: {start:.2f}s to {end:.2f}s - {text}")
+    return aligned_transcriptions
+
 
+def _clean(_context, aligned_transcriptions):
     # Build raw transcript for LLM
     raw_transcript = " ".join(
         [f"{segment[0]}: {segment[3]}" for segment in aligned_transcriptions]
     )
+    return run_async(aclean_transcript(raw_transcript))
 
-    # Summarize & Clean with LLM
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash",google_api_key=os.getenv("GEMINI_API_KEY"))
-    prompt = (
-        "In the following you get a dialogue. Identify the people who speak. If you can find a name of a person, "
-        "use the name before the text of that person instead of the generic 'Speaker SPEAKER_00'. "
-        "If you cannot find a name, try to label them by functionality (interviewer, interviewee, speaker, host, guest, etc). "
-        "After that remove filler words like 'um', 'uh', 'you know', 'like' so it is easier to read, like a transcript of a podcast."
-        "Also remove phrases that are not relevant to the conversation, like 'I see', 'I understand', etc."
-        "Remove consecutive phrases that have the same meaning like : 'Even more, that is actually even more stressfull' will be 'that is actually even more stressfull' "
-        f"The dialogue is as follows: {raw_transcript}"
+
+def _extract(_context, content):
+    return run_async(aprocess_conversation(content))
+
+
+def _follow_up(_context, content):
+    return run_async(adraft_follow_up(content))
+
+
+# The pipeline as a DAG; bump a stage's version when its output changes so
+# previously cached artifacts of it (and of every stage after it) are ignored.
+STAGES = {
+    stage.name: stage
+    for stage in (
+        Stage("decode", ("source",), _decode),
+        Stage("diarize", ("decode",), _diarize, params=(("model", DIARIZATION_MODEL),)),
+        Stage(
+            "transcribe",
+            ("decode",),
+            _transcribe,
+            params=(("model", WHISPER_MODEL), ("window_seconds", settings.TRANSCRIBE_WINDOW_SECONDS)),
+        ),
+        Stage("align", ("diarize", "transcribe"), _align),
+        Stage("clean", ("align",), _clean),
+        Stage("extract", ("clean",), _extract),
+        Stage("follow_up", ("clean",), _follow_up),
     )
-    final_transcription = llm.invoke(prompt)
-    content = getattr(final_transcription, "content", str(final_transcription))
+}
+
+
+class PipelineRun:
+    """
+    Materializes the requested stages of one recording.
+
+    Every stage result is stored under a key derived from the audio content and
+    the keys of its inputs. A stage is only executed when its artifact is
+    missing, so a retried run resumes at the first missing stage. Independent
+    stages (diarize/transcribe, extract/follow_up) run in parallel threads.
+    A cancelled ``cancel_token`` stops the run before the next stage and
+    inside diarization and transcription.
+
+    ``on_event(type, data)`` receives progress: "stage" events when a stage
+    starts and finishes, "diarization" events with pyannote's step progress
+    and "segments" events with the Whisper segments of each finished window.
+    """
+
+    def __init__(self, source_path, store, cancel_token: CancelToken | None = None, on_event=None):
+        self.source_path = source_path
+        self.store = store
+        self.cancel_token = cancel_token
+        self.on_event = on_event
+        self.keys = {"source": file_sha256(source_path)}
+        for stage in STAGES.values():
+            self.keys[stage.name] = stage_key(
+                stage.name, stage.version, [self.keys[name] for name in stage.inputs], dict(stage.params)
+            )
+        self.record = {"source": self.keys["source"], "stages": {}}
+        # Keys this run wrote (or started writing); other runs may share the rest
+        self.produced = set()
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def emit(self, type, **data):
+        if self.on_event is not None:
+            self.on_event(type, data)
+
+    def get(self, name):
+        """Returns the artifact of a stage, loading or computing it (and its inputs) once."""
+        if name == "source":
+            return self.source_path
+        with self._lock:
+            future = self._futures.get(name)
+            owner = future is None
+            if owner:
+                future = self._futures[name] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = self._materialize(STAGES[name])
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(value)
+        return value
+
+    def _materialize(self, stage):
+        key = self.keys[stage.name]
+        start = time.perf_counter()
+        if self.store.has(key):
+            value = self.store.load(key)
+            cached = True
+        else:
+            if len(stage.inputs) > 1:
+                with ThreadPoolExecutor(max_workers=len(stage.inputs)) as executor:
+                    inputs = list(executor.map(self.get, stage.inputs))
+            else:
+                inputs = [self.get(stage.inputs[0])]
+            check_cancelled(self.cancel_token)
+            # Inputs are timed by their own stages
+            start = time.perf_counter()
+            logger.info(f"Running stage '{stage.name}'")
+            self.emit("stage", stage=stage.name, status="started")
+            with self._lock:
+                self.produced.add(key)
+            value = stage.run(self, *inputs)
+            self.store.save(key, value)
+            cached = False
+        seconds = time.perf_counter() - start
+        self.record["stages"][stage.name] = {"key": key, "cached": cached, "seconds": round(seconds, 3)}
+        self.emit("stage", stage=stage.name, status="cached" if cached else "finished", seconds=round(seconds, 3))
+        logger.info(f"Stage '{stage.name}' {'loaded from cache' if cached else 'finished'} in {seconds:.2f}s")
+        return value
+
+    def run(self, targets):
+        """Materializes the target stages in parallel and returns their artifacts by name."""
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            values = dict(zip(targets, executor.map(self.get, targets), strict=True))
+        self.store.save_record(self.keys["source"], self.record)
+        return values
+
+    def discard(self):
+        """Deletes the artifacts this run produced, including partial ones, but not cache hits."""
+        with self._lock:
+            keys = list(self.produced)
+        for key in keys:
+            self.store.delete(key)
+
+
+def process(audio_path, output_name=OUTPUT_NAME, targets=("extract",), cancel_token=None, on_event=None):
+    """
+    Runs the audio pipeline on a recording.
+
+    Args:
+        audio_path (str): Path to the uploaded audio file.
+        output_name (str): File name for the cleaned transcript.
+        targets (tuple): Final stages to materialize; add "follow_up" to draft the email too.
+        cancel_token (CancelToken, optional): Cancels the run; its artifacts are deleted.
+        on_event (callable, optional): Receives progress events, see PipelineRun.
+
+    Returns:
+        dict: "content" (cleaned transcript), "result" (Conversation), "follow_up_text"
+        (if requested) and "stages" (per-stage keys, cache hits and timings),
+        or None if diarization or transcription failed.
+
+    Raises:
+        LLMCallError: If an LLM stage failed after all retries.
+        JobCancelled: If the run was cancelled.
+    """
+    output_path = os.path.join("..", "data", "conv_summary", output_name)
+    run = PipelineRun(audio_path, ArtifactStore(settings.ARTIFACT_DIR), cancel_token, on_event)
+    try:
+        artifacts = run.run(("clean", *targets))
+    except StageError as e:
+        logger.error(str(e))
+        return None
+    except JobCancelled:
+        # Every stage thread has stopped by now, so nothing writes to these anymore
+        run.discard()
+        logger.info(f"Processing of {audio_path} cancelled, artifacts removed")
+        raise
+    content = artifacts["clean"]
 
     # Save result
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -105,13 +311,9 @@ def process(audio_path, output_name=OUTPUT_NAME):
         f.write(content)
     logger.info(f"Transcript saved to {output_path}")
 
-    # Process conversation
-    result = process_conversation(file_content=content)
-
-    follow_up_text = generate_follow_up_email(result=result, file_content=content)
     return {
         "content": content,
-        "result": result,
-        "follow_up_text": follow_up_text
+        "result": artifacts.get("extract"),
+        "follow_up_text": artifacts.get("follow_up"),
+        "stages": run.record,
     }
-
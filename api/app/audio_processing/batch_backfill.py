@@ -0,0 +1,279 @@
+import json
+import logging
+import os
+import time
+import uuid
+
+import httpx
+from dotenv import load_dotenv
+from sqlmodel import Session, select
+
+from app import crud
+from app.audio_processing.llm_client import LLM_MODEL
+from app.audio_processing.sum_chain import Conversation, extraction_prompt
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Conversation as ConversationRow
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+FAILED_STATES = {"BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED"}
+
+
+def gemini_schema(schema, definitions=None):
+    """
+    Converts a pydantic JSON schema into the OpenAPI subset Gemini accepts as responseSchema.
+
+    References are inlined, since Gemini does not resolve "$ref".
+    """
+    if definitions is None:
+        definitions = schema.get("definitions", {})
+    if "$ref" in schema:
+        return gemini_schema(definitions[schema["$ref"].split("/")[-1]], definitions)
+    converted = {"type": schema["type"].upper()}
+    for key in ("description", "enum", "required"):
+        if key in schema:
+            converted[key] = schema[key]
+    if "properties" in schema:
+        converted["properties"] = {
+            name: gemini_schema(prop, definitions)
+            for name, prop in schema["properties"].items()
+        }
+    if "items" in schema:
+        converted["items"] = gemini_schema(schema["items"], definitions)
+    return converted
+
+
+class GeminiBatchClient:
+    """
+    Minimal client for the Gemini Batch API with inlined requests.
+
+    Args:
+        http (httpx.Client): HTTP client used for all calls.
+        api_key (str): Gemini API key.
+        base_url (str): API root, a local stand-in server in tests.
+        model (str): Model the batches are run with.
+    """
+
+    def __init__(
+        self, http: httpx.Client, api_key: str, base_url: str, model: str = LLM_MODEL
+    ):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.headers = {"x-goog-api-key": api_key or ""}
+
+    def submit(self, prompts: dict[str, str], schema, display_name: str) -> str:
+        """
+        Submits one batch job with a structured-output request per prompt.
+
+        Args:
+            prompts (dict): Prompts by a key that is returned with each response.
+            schema: Pydantic model the responses have to follow.
+            display_name (str): Name shown in the Gemini console.
+
+        Returns:
+            str: The batch name, e.g. "batches/123".
+        """
+        generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": gemini_schema(schema.schema()),
+        }
+        requests = [
+            {
+                "request": {
+                    "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                    "generation_config": generation_config,
+                },
+                "metadata": {"key": key},
+            }
+            for key, prompt in prompts.items()
+        ]
+        response = self.http.post(
+            f"{self.base_url}/v1beta/models/{self.model}:batchGenerateContent",
+            headers=self.headers,
+            json={
+                "batch": {
+                    "display_name": display_name,
+                    "input_config": {"requests": {"requests": requests}},
+                }
+            },
+        )
+        response.raise_for_status()
+        return response.json()["name"]
+
+    def get(self, name: str) -> dict:
+        response = self.http.get(f"{self.base_url}/v1beta/{name}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def wait(self, name: str, poll_seconds: float) -> dict:
+        """Polls a batch until it is finished and returns the final operation."""
+        while True:
+            operation = self.get(name)
+            state = operation.get("metadata", {}).get("state")
+            if operation.get("done") or state in FAILED_STATES:
+                return operation
+            logger.info(f"Batch {name} is {state}, polling again in {poll_seconds}s")
+            time.sleep(poll_seconds)
+
+    @staticmethod
+    def results(operation: dict) -> dict[str, str]:
+        """Returns the response text per request key; failed requests are left out."""
+        if "error" in operation:
+            logger.error(f"Batch {operation.get('name')} failed: {operation['error']}")
+            return {}
+        inlined = (
+            operation.get("response", {})
+            .get("inlinedResponses", {})
+            .get("inlinedResponses", [])
+        )
+        texts = {}
+        for item in inlined:
+            key = item.get("metadata", {}).get("key")
+            try:
+                texts[key] = item["response"]["candidates"][0]["content"]["parts"][0][
+                    "text"
+                ]
+            except (KeyError, IndexError):
+                logger.error(f"No response for request {key}: {item.get('error')}")
+        return texts
+
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"cursor": None, "pending": [], "completed": 0, "failed": []}
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    """Writes the checkpoint atomically, so a crash never leaves a half-written file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _next_conversations(session, cursor, batch_size, owner_id):
+    statement = (
+        select(ConversationRow.id, ConversationRow.transcript)
+        .where(ConversationRow.transcript.is_not(None))
+        .order_by(ConversationRow.id)
+        .limit(batch_size)
+    )
+    if cursor is not None:
+        statement = statement.where(ConversationRow.id > uuid.UUID(cursor))
+    if owner_id is not None:
+        statement = statement.where(ConversationRow.owner_id == owner_id)
+    return session.exec(statement).all()
+
+
+def run_backfill(
+    session: Session,
+    client: GeminiBatchClient,
+    checkpoint_path: str,
+    batch_size: int = 500,
+    max_pending: int = 4,
+    poll_seconds: float = 60,
+    owner_id: uuid.UUID | None = None,
+) -> dict:
+    """
+    Re-extracts Conversation/Person data for all stored transcripts through batch jobs.
+
+    Conversations are submitted in id order, ``batch_size`` per batch job and
+    at most ``max_pending`` jobs at a time. The checkpoint file records the last
+    submitted id and the jobs still pending, and is saved after every submit and
+    every write-back, so a restarted backfill picks up the pending jobs and
+    continues after the cursor.
+
+    Args:
+        session (Session): Database session.
+        client (GeminiBatchClient): Batch API client.
+        checkpoint_path (str): Path of the JSON checkpoint file.
+        batch_size (int): Transcripts per batch job.
+        max_pending (int): Batch jobs submitted but not yet written back.
+        poll_seconds (float): Wait between two status polls.
+        owner_id (uuid.UUID, optional): Only re-extract this user's conversations.
+
+    Returns:
+        dict: The final checkpoint.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint["pending"]:
+        logger.info(
+            f"Resuming backfill with {len(checkpoint['pending'])} pending batches"
+        )
+
+    while True:
+        while len(checkpoint["pending"]) < max_pending:
+            rows = _next_conversations(
+                session, checkpoint["cursor"], batch_size, owner_id
+            )
+            if not rows:
+                break
+            prompts = {
+                str(id): extraction_prompt(transcript) for id, transcript in rows
+            }
+            name = client.submit(
+                prompts, Conversation, display_name=f"backfill-{rows[0][0]}"
+            )
+            checkpoint["pending"].append({"name": name, "ids": list(prompts)})
+            checkpoint["cursor"] = str(rows[-1][0])
+            save_checkpoint(checkpoint_path, checkpoint)
+            logger.info(f"Submitted {name} with {len(rows)} transcripts")
+
+        if not checkpoint["pending"]:
+            break
+
+        batch = checkpoint["pending"][0]
+        texts = client.results(client.wait(batch["name"], poll_seconds))
+        results = {}
+        for id in batch["ids"]:
+            try:
+                results[uuid.UUID(id)] = Conversation.parse_raw(texts[id])
+            except Exception as e:
+                logger.error(f"Could not parse extraction for conversation {id}: {e}")
+                checkpoint["failed"].append(id)
+        # Conversations deleted since the batch was submitted are not updated
+        updated = crud.apply_extractions_db(session=session, results=results)
+        checkpoint["completed"] += updated
+        checkpoint["pending"].pop(0)
+        save_checkpoint(checkpoint_path, checkpoint)
+        logger.info(
+            f"Wrote back {updated} of {len(results)} extractions of {batch['name']}"
+        )
+
+    logger.info(
+        f"Backfill finished: {checkpoint['completed']} updated, {len(checkpoint['failed'])} failed"
+    )
+    return checkpoint
+
+
+def main():
+    with httpx.Client(timeout=120) as http, Session(engine) as session:
+        client = GeminiBatchClient(
+            http=http,
+            api_key=os.getenv("GEMINI_API_KEY"),
+            base_url=settings.GEMINI_API_BASE_URL,
+        )
+        run_backfill(
+            session=session,
+            client=client,
+            checkpoint_path=settings.BACKFILL_CHECKPOINT_PATH,
+            batch_size=settings.BACKFILL_BATCH_SIZE,
+            max_pending=settings.BACKFILL_MAX_PENDING_BATCHES,
+            poll_seconds=settings.BACKFILL_POLL_SECONDS,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import threading
+
+
+class JobCancelled(Exception):
+    """Raised inside a pipeline stage once its job was cancelled."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared by a job's worker and its pipeline stages.
+
+    Long running stages call check() between units of work (Whisper windows,
+    pyannote steps), which raises JobCancelled once cancel() was called.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+def check_cancelled(cancel_token: CancelToken | None) -> None:
+    """Like CancelToken.check(), for stages that may run without a token."""
+    if cancel_token is not None:
+        cancel_token.check()
@@ -4,17 +4,44 @@ import torch
 from pyannote.audio import Pipeline
 from pyannote.audio.pipelines.utils.hook import ProgressHook
 
+from app.audio_processing.cancellation import CancelToken, JobCancelled, check_cancelled
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class JobHook:
+    """
+    Wraps a pyannote hook to report progress and check for cancellation.
+
+    pyannote calls the hook after each step and each batch of segmentation and
+    embedding inference, so a cancelled job stops within one batch.
+
+    Args:
+        hook: The wrapped hook, e.g. a ProgressHook.
+        cancel_token (CancelToken, optional): Checked on every call.
+        on_progress (callable, optional): Called as on_progress(step, completed, total)
+            for every call that reports progress.
+    """
+
+    def __init__(self, hook, cancel_token: CancelToken | None = None, on_progress=None):
+        self.hook = hook
+        self.cancel_token = cancel_token
+        self.on_progress = on_progress
+
+    def __call__(self, step_name, step_artifact, file=None, total=None, completed=None):
+        check_cancelled(self.cancel_token)
+        if self.on_progress is not None:
+            # Steps without batches are reported once they are done
+            self.on_progress(step_name, completed if total else 1, total or 1)
+        return self.hook(step_name, step_artifact, file=file, total=total, completed=completed)
+
+
 class PyannoteDiarizer:
-    def __init__(self, hf_token: str):
+    def __init__(self, hf_token: str, model_name: str = "pyannote/speaker-diarization-3.1"):
         self.pipeline = None
         try:
-            self.pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1", use_auth_token=hf_token
-            )
+            self.pipeline = Pipeline.from_pretrained(model_name, use_auth_token=hf_token)
             device = (
                 torch.device("cuda")
                 if torch.cuda.is_available()
@@ -29,8 +56,13 @@ class PyannoteDiarizer:
         except Exception as e:
             logger.error(f"Error initializing Pyannote pipeline: {e}")
 
-    def diarize(self, audio_path: str):
-        """Perform speaker diarization on the given audio file."""
+    def diarize(self, audio_path: str, cancel_token: CancelToken | None = None, on_progress=None):
+        """
+        Perform speaker diarization on the given audio file.
+
+        ``on_progress(step, completed, total)`` is called as pyannote advances.
+        Raises JobCancelled between pyannote steps once ``cancel_token`` was cancelled.
+        """
         if self.pipeline is None:
             logger.error("Pipeline is not initialized.")
             return None
@@ -42,9 +74,12 @@ class PyannoteDiarizer:
         try:
             with ProgressHook() as hook:
                 logger.info(f"Starting diarization for {audio_path}...")
-                diarization = self.pipeline(audio_path, hook=hook)
+                diarization = self.pipeline(audio_path, hook=JobHook(hook, cancel_token, on_progress))
                 logger.info("Diarization completed.")
                 return diarization
+        except JobCancelled:
+            logger.info(f"Diarization of {audio_path} cancelled")
+            raise
         except Exception as e:
             logger.error(f"Error during diarization: {e}")
             return None
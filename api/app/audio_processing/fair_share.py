@@ -0,0 +1,108 @@
+import logging
+import math
+import os
+import wave
+
+from app.core.config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+# Served in this order; see lane_order() for how bulk avoids starvation
+LANES = (LANE_INTERACTIVE, LANE_BULK)
+
+
+def estimate_audio_seconds(path: str) -> float:
+    """
+    Cheap duration estimate of an upload, without decoding it.
+
+    WAV files have their exact length in the header; compressed formats are
+    estimated from the file size and AUDIO_BYTES_PER_SECOND.
+    """
+    if os.path.splitext(path)[1].lower() == ".wav":
+        try:
+            with wave.open(path, "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError) as e:
+            logger.warning(f"Could not read WAV header of {path}: {e}")
+    return os.path.getsize(path) / settings.AUDIO_BYTES_PER_SECOND
+
+
+def default_lane(audio_seconds: float) -> str:
+    """Short clips go to the interactive lane, everything else is bulk."""
+    if audio_seconds <= settings.AUDIO_INTERACTIVE_MAX_SECONDS:
+        return LANE_INTERACTIVE
+    return LANE_BULK
+
+
+def lane_order(oldest_bulk_wait_seconds: float | None) -> tuple[str, ...]:
+    """
+    Lanes in the order a worker looks for work.
+
+    Interactive jobs always go first, unless the oldest bulk job has waited
+    longer than AUDIO_BULK_MAX_WAIT_SECONDS; then one bulk job is served, so a
+    steady stream of clips cannot starve bulk work forever.
+    """
+    if (
+        oldest_bulk_wait_seconds is not None
+        and oldest_bulk_wait_seconds > settings.AUDIO_BULK_MAX_WAIT_SECONDS
+    ):
+        return (LANE_BULK, LANE_INTERACTIVE)
+    return LANES
+
+
+def drr_pick(heads: dict, deficits: dict, order: list, quantum: float):
+    """
+    Deficit round-robin over job owners.
+
+    Every active owner earns ``quantum`` seconds of audio per round and is
+    charged the length of each job it gets, so an owner with many or long
+    jobs gets the same processing time as an owner with a single clip.
+    Rounds in which nobody could be served are skipped in one step.
+
+    Args:
+        heads (dict): Cost (audio seconds) of the oldest queued job per owner.
+        deficits (dict): Deficit per owner; missing owners start at 0.
+        order (list): Owners of ``heads`` in round-robin order, least recently served first.
+        quantum (float): Credit per owner and round.
+
+    Returns:
+        tuple: The owner to serve and the new deficits of all owners in ``order``.
+    """
+    rounds = min(
+        max(0, math.ceil((heads[owner] - deficits.get(owner, 0.0)) / quantum))
+        for owner in order
+    )
+    new_deficits = {
+        owner: deficits.get(owner, 0.0) + rounds * quantum for owner in order
+    }
+    # The tolerance keeps float rounding from skipping the owner the rounds were computed for
+    chosen = next(
+        owner for owner in order if new_deficits[owner] + 1e-9 >= heads[owner]
+    )
+    new_deficits[chosen] -= heads[chosen]
+    return chosen, new_deficits
+
+
+def drr_charge(heads: dict, deficits: dict, owner, quantum: float) -> dict:
+    """
+    Deficits after serving ``owner``, as chosen by drr_pick().
+
+    Every owner of ``heads`` earns the rounds ``owner`` needed to afford its
+    oldest job, and ``owner`` is charged that job.
+
+    Returns:
+        dict: The new deficits of all owners in ``heads``.
+    """
+    # The tolerance keeps float rounding from adding a round drr_pick() did not need
+    rounds = max(
+        0, math.ceil((heads[owner] - deficits.get(owner, 0.0)) / quantum - 1e-9)
+    )
+    new_deficits = {
+        other: deficits.get(other, 0.0) + rounds * quantum for other in heads
+    }
+    new_deficits[owner] -= heads[owner]
+    return new_deficits
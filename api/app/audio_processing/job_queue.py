@@ -0,0 +1,616 @@
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, Interval, delete, func, literal, update
+from sqlmodel import Session, select
+
+from app import crud
+from app.audio_processing.fair_share import (
+    LANE_BULK,
+    LANES,
+    default_lane,
+    drr_charge,
+    drr_pick,
+    estimate_audio_seconds,
+    lane_order,
+)
+from app.core.config import settings
+from app.models import (
+    AudioFairShare,
+    AudioJob,
+    AudioJobEvent,
+    AudioLaneStats,
+    AudioQueueStats,
+    AudioWorker,
+    utcnow,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def enqueue_job(
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    filename: str,
+    file_path: str,
+    lane: str | None = None,
+    audio_seconds: float | None = None,
+) -> AudioJob:
+    """
+    Queue an uploaded recording for the audio workers.
+
+    Args:
+        session (Session): Database session.
+        owner_id (uuid.UUID): User the resulting conversation belongs to.
+        filename (str): Name of the uploaded file, for display.
+        file_path (str): Where the upload is stored; must be readable by every worker.
+        lane (str, optional): "interactive" or "bulk"; by default chosen from the
+            estimated length of the recording.
+        audio_seconds (float, optional): Length of the recording, estimated from the file if missing.
+
+    Returns:
+        AudioJob: The queued job.
+    """
+    if audio_seconds is None:
+        audio_seconds = estimate_audio_seconds(file_path)
+    job = AudioJob(
+        owner_id=owner_id,
+        filename=filename,
+        file_path=file_path,
+        lane=lane or default_lane(audio_seconds),
+        audio_seconds=audio_seconds,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+# Serializes the fair-share updates of claims, see claim_job()
+CLAIM_LOCK_ID = 0x6A6F6273
+
+
+def _oldest_bulk_wait_seconds(session: Session, now) -> float | None:
+    oldest = session.exec(
+        select(func.min(AudioJob.created_at)).where(
+            (AudioJob.status == "queued") & (AudioJob.lane == LANE_BULK)
+        )
+    ).one()
+    return (now - oldest).total_seconds() if oldest else None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """How long a job waits after its ``attempts``-th attempt failed, before it is retried."""
+    return timedelta(seconds=settings.AUDIO_JOB_RETRY_DELAY_SECONDS * attempts)
+
+
+def _ready(now):
+    """Queued jobs that are not waiting for their retry delay."""
+    return (AudioJob.status == "queued") & (
+        AudioJob.not_before.is_(None) | (AudioJob.not_before <= now)
+    )
+
+
+def _lane_heads(session: Session, lane: str, skipped: set[uuid.UUID], now) -> dict:
+    """Oldest ready job of every owner in a lane, as owner -> (job id, cost)."""
+    heads = session.exec(
+        select(AudioJob.id, AudioJob.owner_id, AudioJob.audio_seconds)
+        .where(
+            _ready(now) & (AudioJob.lane == lane) & AudioJob.id.not_in(list(skipped))
+        )
+        .order_by(AudioJob.owner_id, AudioJob.created_at)
+        .distinct(AudioJob.owner_id)
+    ).all()
+    return {owner: (id, max(cost, 1.0)) for id, owner, cost in heads}
+
+
+def _lane_states(session: Session, lane: str) -> dict:
+    statement = select(AudioFairShare).where(AudioFairShare.lane == lane)
+    return {
+        state.owner_id: state
+        # Re-read, the states may have changed since they were last loaded in this session
+        for state in session.exec(
+            statement.execution_options(populate_existing=True)
+        ).all()
+    }
+
+
+def _pick_in_lane(
+    session: Session, lane: str, now, skipped: set[uuid.UUID]
+) -> uuid.UUID | None:
+    """Picks the next job of a lane by deficit round-robin over the owners' oldest jobs."""
+    heads = _lane_heads(session, lane, skipped, now)
+    if not heads:
+        return None
+    states = _lane_states(session, lane)
+    never = now.replace(year=1)
+
+    def last_served(owner):
+        state = states.get(owner)
+        return (
+            state.last_served_at if state and state.last_served_at else never,
+            str(owner),
+        )
+
+    # Owners without queued jobs have no credit, as in plain DRR
+    deficits = {
+        owner: state.deficit for owner, state in states.items() if owner in heads
+    }
+    costs = {owner: cost for owner, (_, cost) in heads.items()}
+    chosen, _ = drr_pick(
+        costs,
+        deficits,
+        sorted(costs, key=last_served),
+        settings.AUDIO_FAIR_SHARE_QUANTUM_SECONDS,
+    )
+    return heads[chosen][0]
+
+
+def _charge(session: Session, job: AudioJob, now) -> None:
+    """Charges the owner of a just locked job for it in the fair-share state of its lane."""
+    session.execute(select(func.pg_advisory_xact_lock(CLAIM_LOCK_ID)))
+    costs = {
+        owner: cost
+        for owner, (_, cost) in _lane_heads(session, job.lane, set(), now).items()
+    }
+    costs[job.owner_id] = max(job.audio_seconds, 1.0)
+    states = _lane_states(session, job.lane)
+    # Owners without queued jobs lose their credit, as in plain DRR
+    for owner_id, state in states.items():
+        if state.deficit and owner_id not in costs:
+            state.deficit = 0
+            session.add(state)
+    deficits = {owner: state.deficit for owner, state in states.items()}
+    new_deficits = drr_charge(
+        costs, deficits, job.owner_id, settings.AUDIO_FAIR_SHARE_QUANTUM_SECONDS
+    )
+    for owner, deficit in new_deficits.items():
+        state = states.get(owner) or AudioFairShare(lane=job.lane, owner_id=owner)
+        state.deficit = deficit
+        if owner == job.owner_id:
+            state.last_served_at = now
+        session.add(state)
+
+
+def claim_job(*, session: Session, worker_id: str) -> AudioJob | None:
+    """
+    Claim the next job for a worker.
+
+    Lanes are served in priority order (see fair_share.lane_order()); within a
+    lane, owners take turns by deficit round-robin over audio seconds, so one
+    owner's large upload batch cannot starve everybody else. Jobs waiting for
+    their retry delay (``not_before``) are not claimed yet.
+
+    The picked job row is locked with ``FOR UPDATE SKIP LOCKED``, so concurrent
+    claims never wait on each other's rows; a job another worker is claiming is
+    skipped and the next one picked. Only once the row is locked is its owner
+    charged, under a transaction-level advisory lock that serializes the
+    fair-share updates and is held until the claim commits.
+
+    Returns:
+        AudioJob | None: The claimed job, now running, or None if the queue is empty.
+    """
+    now = utcnow()
+    job = None
+    for lane in lane_order(_oldest_bulk_wait_seconds(session, now)):
+        skipped: set[uuid.UUID] = set()
+        while job is None:
+            job_id = _pick_in_lane(session, lane, now, skipped)
+            if job_id is None:
+                break
+            job = session.exec(
+                select(AudioJob)
+                .where((AudioJob.id == job_id) & _ready(now))
+                .with_for_update(skip_locked=True)
+            ).first()
+            skipped.add(job_id)
+        if job is not None:
+            break
+    if job is None:
+        session.rollback()
+        return None
+    _charge(session, job, now)
+    job.status = "running"
+    job.worker_id = worker_id
+    job.attempts += 1
+    job.started_at = now
+    job.heartbeat_at = now
+    job.error = None
+    job.not_before = None
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def _owned(job_id: uuid.UUID, worker_id: str):
+    return (
+        (AudioJob.id == job_id)
+        & (AudioJob.status == "running")
+        & (AudioJob.worker_id == worker_id)
+    )
+
+
+def heartbeat(*, session: Session, job_id: uuid.UUID, worker_id: str) -> bool:
+    """
+    Mark a running job as alive.
+
+    Returns:
+        bool: False if the job is no longer owned by this worker (it was re-queued).
+    """
+    result = session.execute(
+        update(AudioJob).where(_owned(job_id, worker_id)).values(heartbeat_at=utcnow())
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def complete_job(
+    *,
+    session: Session,
+    job_id: uuid.UUID,
+    worker_id: str,
+    processed: dict,
+    event: str | None = None,
+) -> AudioJob | None:
+    """
+    Store the processed conversation and finish the job in one transaction.
+
+    Args:
+        session (Session): Database session.
+        job_id (uuid.UUID): The job.
+        worker_id (str): Worker that ran the job.
+        processed (dict): Result of audio_pipeline.process().
+        event (str, optional): Event name stored on the conversation.
+
+    Returns:
+        AudioJob | None: The finished (or, if cancellation was requested meanwhile,
+        cancelled) job, or None if the job was re-queued in the meantime and the
+        result is discarded.
+    """
+    job = session.exec(
+        select(AudioJob).where(_owned(job_id, worker_id)).with_for_update()
+    ).first()
+    if job is None:
+        session.rollback()
+        logger.warning(
+            f"Job {job_id} is no longer owned by {worker_id}, discarding its result"
+        )
+        return None
+    now = utcnow()
+    if job.cancel_requested:
+        # Cancelled while the result was being stored
+        job.status = "cancelled"
+        job.finished_at = now
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        remove_upload(job)
+        return job
+    conversation = crud.new_processed_conversation(
+        owner_id=job.owner_id,
+        transcript=processed["content"],
+        result=processed["result"],
+        day=now.strftime("%Y-%m-%d %H:%M:%S"),
+        event=event,
+    )
+    session.add(conversation)
+    session.flush()
+    job.status = "done"
+    job.conversation_id = conversation.id
+    job.stages = processed.get("stages")
+    job.finished_at = now
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    remove_upload(job)
+    return job
+
+
+def fail_job(
+    *, session: Session, job_id: uuid.UUID, worker_id: str, error: str, retry: bool
+) -> None:
+    """
+    Record a failed attempt.
+
+    With ``retry`` the job is queued again after retry_delay(); a job the user
+    cancelled meanwhile is cancelled instead. A job that is not retried is
+    finished and its upload deleted.
+    """
+    job = session.exec(
+        select(AudioJob).where(_owned(job_id, worker_id)).with_for_update()
+    ).first()
+    if job is None:
+        session.rollback()
+        return
+    now = utcnow()
+    job.error = error
+    job.worker_id = None
+    job.heartbeat_at = None
+    if retry and not job.cancel_requested:
+        job.status = "queued"
+        job.not_before = now + retry_delay(job.attempts)
+    else:
+        job.status = "cancelled" if retry else "failed"
+        job.finished_at = now
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    if job.status != "queued":
+        remove_upload(job)
+
+
+def cancel_job(*, session: Session, job_id: uuid.UUID) -> AudioJob | None:
+    """
+    Cancel a job.
+
+    A queued job is cancelled right away and its upload deleted. For a running
+    job cancellation is requested; its worker stops the pipeline at the next
+    cancellation check and cleans up. Finished jobs are left alone.
+
+    Returns:
+        AudioJob | None: The job, or None if it does not exist.
+    """
+    job = session.exec(
+        select(AudioJob).where(AudioJob.id == job_id).with_for_update()
+    ).first()
+    if job is None:
+        session.rollback()
+        return None
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = utcnow()
+    elif job.status == "running":
+        job.cancel_requested = True
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    if job.status == "cancelled":
+        remove_upload(job)
+    return job
+
+
+def is_cancel_requested(*, session: Session, job_id: uuid.UUID) -> bool:
+    return bool(
+        session.exec(
+            select(AudioJob.cancel_requested).where(AudioJob.id == job_id)
+        ).first()
+    )
+
+
+def finish_cancelled_job(
+    *, session: Session, job_id: uuid.UUID, worker_id: str
+) -> None:
+    """Marks a running job as cancelled once its worker stopped it, and deletes its upload."""
+    finish = (
+        update(AudioJob)
+        .where(_owned(job_id, worker_id))
+        .values(
+            status="cancelled", worker_id=None, heartbeat_at=None, finished_at=utcnow()
+        )
+    )
+    file_paths = session.scalars(finish.returning(AudioJob.file_path)).all()
+    session.commit()
+    for file_path in file_paths:
+        _remove_file(file_path)
+
+
+def add_job_event(
+    *, session: Session, job_id: uuid.UUID, type: str, data: dict
+) -> AudioJobEvent:
+    event = AudioJobEvent(job_id=job_id, type=type, data=data)
+    session.add(event)
+    session.commit()
+    return event
+
+
+def read_job_events(
+    *, session: Session, job_id: uuid.UUID, after_id: int = 0, limit: int = 500
+) -> list[AudioJobEvent]:
+    """Events of a job newer than ``after_id``, oldest first."""
+    return session.exec(
+        select(AudioJobEvent)
+        .where((AudioJobEvent.job_id == job_id) & (AudioJobEvent.id > after_id))
+        .order_by(AudioJobEvent.id)
+        .limit(limit)
+    ).all()
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_upload(job: AudioJob) -> None:
+    _remove_file(job.file_path)
+
+
+def _reap(
+    session: Session, lost, max_attempts: int, error: str
+) -> tuple[int, int, int]:
+    """
+    Re-queues (after retry_delay()), fails or cancels running jobs matching
+    ``lost``; the uploads of failed and cancelled jobs are deleted.
+    """
+    now = utcnow()
+    lost = (AudioJob.status == "running") & lost
+    cancel = (
+        update(AudioJob)
+        .where(lost & AudioJob.cancel_requested)
+        .values(status="cancelled", worker_id=None, heartbeat_at=None, finished_at=now)
+    )
+    cancelled = session.scalars(cancel.returning(AudioJob.file_path)).all()
+    fail = (
+        update(AudioJob)
+        .where(lost & (AudioJob.attempts >= max_attempts))
+        .values(
+            status="failed",
+            worker_id=None,
+            heartbeat_at=None,
+            error=error,
+            finished_at=now,
+        )
+    )
+    failed = session.scalars(fail.returning(AudioJob.file_path)).all()
+    requeued = session.execute(
+        update(AudioJob)
+        .where(lost)
+        .values(
+            status="queued",
+            worker_id=None,
+            heartbeat_at=None,
+            error=error,
+            # retry_delay() in SQL, as each job has its own number of attempts
+            not_before=literal(now, DateTime(timezone=True))
+            + AudioJob.attempts * literal(retry_delay(1), Interval()),
+        )
+    ).rowcount
+    session.commit()
+    for file_path in (*cancelled, *failed):
+        _remove_file(file_path)
+    return requeued, len(failed), len(cancelled)
+
+
+def requeue_stale_jobs(
+    *, session: Session, stale_after: timedelta, max_attempts: int
+) -> int:
+    """
+    Reaper for jobs whose worker stopped sending heartbeats.
+
+    Stale jobs are queued again, failed once they used up ``max_attempts``,
+    or cancelled if their cancellation was requested.
+
+    Returns:
+        int: Number of jobs reaped.
+    """
+    cutoff: datetime = utcnow() - stale_after
+    requeued, failed, cancelled = _reap(
+        session,
+        AudioJob.heartbeat_at < cutoff,
+        max_attempts,
+        "Worker stopped responding",
+    )
+    if cancelled or failed or requeued:
+        logger.warning(
+            f"Reaped stale jobs: {requeued} re-queued, {failed} failed, {cancelled} cancelled"
+        )
+    return cancelled + failed + requeued
+
+
+def release_worker_jobs(*, session: Session, worker_id: str, max_attempts: int) -> int:
+    """
+    Hands the running jobs of a dead worker back to the queue right away,
+    instead of waiting for the reaper.
+
+    Returns:
+        int: Number of jobs released.
+    """
+    requeued, failed, cancelled = _reap(
+        session, AudioJob.worker_id == worker_id, max_attempts, "Worker process died"
+    )
+    if cancelled or failed or requeued:
+        logger.warning(
+            f"Released jobs of {worker_id}: {requeued} re-queued, {failed} failed, {cancelled} cancelled"
+        )
+    return cancelled + failed + requeued
+
+
+def queue_stats(*, session: Session, window_minutes: int) -> AudioQueueStats:
+    """
+    Queue depth and wait times per lane.
+
+    Wait times are measured from upload to the latest claim, over the jobs
+    claimed in the last ``window_minutes``.
+    """
+    now = utcnow()
+    since = now - timedelta(minutes=window_minutes)
+    wait = func.extract("epoch", AudioJob.started_at - AudioJob.created_at)
+    started = {
+        row.lane: row
+        for row in session.exec(
+            select(
+                AudioJob.lane,
+                func.count().label("started"),
+                func.percentile_cont(0.5).within_group(wait).label("p50"),
+                func.percentile_cont(0.95).within_group(wait).label("p95"),
+                func.max(wait).label("max"),
+            )
+            .where(AudioJob.started_at >= since)
+            .group_by(AudioJob.lane)
+        ).all()
+    }
+    queued = {
+        row.lane: row
+        for row in session.exec(
+            select(
+                AudioJob.lane,
+                func.count().label("queued"),
+                func.min(AudioJob.created_at).label("oldest"),
+            )
+            .where(AudioJob.status == "queued")
+            .group_by(AudioJob.lane)
+        ).all()
+    }
+    lanes = []
+    for lane in LANES:
+        waiting = queued.get(lane)
+        served = started.get(lane)
+        lanes.append(
+            AudioLaneStats(
+                lane=lane,
+                queued=waiting.queued if waiting else 0,
+                oldest_queued_seconds=(now - waiting.oldest).total_seconds()
+                if waiting
+                else None,
+                started=served.started if served else 0,
+                wait_p50_seconds=float(served.p50) if served else None,
+                wait_p95_seconds=float(served.p95) if served else None,
+                wait_max_seconds=float(served.max) if served else None,
+            )
+        )
+    return AudioQueueStats(window_minutes=window_minutes, lanes=lanes)
+
+
+def report_worker(
+    *,
+    session: Session,
+    worker_id: str,
+    jobs: int,
+    rss_mb: float | None,
+    model_cache: dict,
+    llm: dict | None = None,
+    available_mb: float | None = None,
+) -> None:
+    """Stores the current state of a worker process for GET /utils/audio-workers/."""
+    worker = session.get(AudioWorker, worker_id) or AudioWorker(id=worker_id)
+    worker.jobs = jobs
+    worker.rss_mb = rss_mb
+    worker.available_mb = available_mb
+    worker.model_cache = model_cache
+    worker.llm = llm or {}
+    worker.updated_at = utcnow()
+    session.add(worker)
+    session.commit()
+
+
+def remove_worker(*, session: Session, worker_id: str) -> None:
+    session.execute(delete(AudioWorker).where(AudioWorker.id == worker_id))
+    session.commit()
+
+
+def list_workers(*, session: Session, active_within: timedelta) -> list[AudioWorker]:
+    """Workers that reported within ``active_within``."""
+    return list(
+        session.exec(
+            select(AudioWorker)
+            .where(AudioWorker.updated_at >= utcnow() - active_within)
+            .order_by(AudioWorker.id)
+        ).all()
+    )
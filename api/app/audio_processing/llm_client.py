@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+import threading
+from functools import lru_cache
+
+from dotenv import load_dotenv
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+LLM_MODEL = "gemini-2.0-flash"
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+@lru_cache
+def get_llm(model: str = LLM_MODEL) -> ChatGoogleGenerativeAI:
+    """
+    Returns the shared Gemini client of this process.
+
+    The client keeps its channels open, so every call after the first one
+    reuses the existing connection instead of doing a new handshake.
+
+    Retries belong to the LLM scheduler, so every attempt goes through its
+    rate budgets: calls pass ``retry=None`` (see sum_chain._ainvoke) to turn
+    off the Gemini API client's own retries. langchain-google-genai still
+    makes up to two attempts per call, which cannot be configured.
+
+    Args:
+        model (str): Gemini model name (default "gemini-2.0-flash").
+
+    Returns:
+        ChatGoogleGenerativeAI: The cached client for that model.
+    """
+    logger.info(f"Creating shared LLM client for '{model}'")
+    return ChatGoogleGenerativeAI(
+        model=model, google_api_key=os.getenv("GEMINI_API_KEY"), max_retries=0
+    )
+
+
+def get_llm_loop() -> asyncio.AbstractEventLoop:
+    """Returns the long-lived event loop all async LLM calls run on."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever, name="llm-loop", daemon=True
+            )
+            thread.start()
+        return _loop
+
+
+def run_async(coro):
+    """
+    Runs a coroutine on the shared LLM event loop and waits for its result.
+
+    The async Gemini client binds to the loop it is first used on, so all
+    async LLM work of the process goes through one loop in a background thread.
+    This also makes it safe to call from sync code running inside another loop.
+
+    Args:
+        coro: The coroutine to run.
+
+    Returns:
+        The value returned by the coroutine.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_llm_loop()).result()
@@ -0,0 +1,279 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+
+from tenacity import (
+    AsyncRetrying,
+    before_sleep_log,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Number of latencies kept per call name for the percentiles
+LATENCY_WINDOW = 500
+
+
+class LLMCallError(Exception):
+    """Raised when an LLM call still fails after all retries."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Quota, overload and transient network errors are worth retrying."""
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """
+    Delay the server asked for before a retry: the Retry-After header of an
+    HTTP error, or the RetryInfo of a gRPC error. None if there is none.
+    """
+    response = getattr(exc, "response", None)
+    value = getattr(response, "headers", {}).get("Retry-After")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # The HTTP-date form, which Gemini does not send
+            return None
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.rate_per_second = rate_per_minute / 60
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate_per_second
+        )
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are available now)."""
+        self._refill()
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Job:
+    def __init__(self, call, tokens, name, future):
+        self.call = call
+        self.tokens = tokens
+        self.name = name
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class LLMScheduler:
+    """
+    Central scheduler for all LLM calls of a process.
+
+    Calls wait in a priority queue until the requests-per-minute and
+    tokens-per-minute budgets allow them, at most ``max_concurrency`` run at
+    the same time, and retryable errors are retried with jittered exponential
+    backoff. A Retry-After sent with an error is waited for at least, and
+    holds back all other calls of the process as well. Must be used from a
+    single event loop (see llm_client.run_async).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_attempts: int = 5,
+        max_concurrency: int = 8,
+        max_backoff_seconds: float = 60,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_attempts = max_attempts
+        self.max_backoff_seconds = max_backoff_seconds
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._queue = None
+        self._dispatcher = None
+        # Running calls, referenced so they are not garbage-collected mid-flight
+        self._tasks = set()
+        self._backoff = wait_random_exponential(multiplier=1, max=max_backoff_seconds)
+        self._cooldown_until = 0.0
+        self._counter = itertools.count()
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._calls = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._retries = defaultdict(int)
+
+    async def submit(
+        self,
+        call,
+        *,
+        prompt: str = "",
+        priority: int = PRIORITY_NORMAL,
+        name: str = "llm",
+    ):
+        """
+        Queues an LLM call and waits for its result.
+
+        Args:
+            call: Zero-argument function returning a new awaitable for each attempt.
+            prompt (str): The prompt sent, used to charge the token budget.
+            priority (int): Lower values are served first.
+            name (str): Label used in the latency metrics.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            LLMCallError: If the call failed after all retries or with a non-retryable error.
+        """
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(call, estimate_tokens(prompt), name, future)
+        await self._queue.put((priority, next(self._counter), job))
+        return await future
+
+    async def _acquire(self, tokens: int) -> None:
+        while True:
+            wait = max(
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens),
+                self._cooldown_until - time.monotonic(),
+            )
+            if wait <= 0:
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+                return
+            await asyncio.sleep(wait)
+
+    async def _dispatch(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            await self._semaphore.acquire()
+            await self._acquire(job.tokens)
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"LLM scheduler task failed: {task.exception()!r}")
+
+    def _wait(self, retry_state) -> float:
+        """Backoff before a retry, at least the Retry-After of the error."""
+        wait = self._backoff(retry_state)
+        retry_after = retry_after_seconds(retry_state.outcome.exception())
+        if retry_after is not None:
+            self._cooldown_until = max(
+                self._cooldown_until, time.monotonic() + retry_after
+            )
+            wait = max(wait, retry_after)
+        return wait
+
+    async def _run(self, job: _Job) -> None:
+        start = time.monotonic()
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.max_attempts),
+                wait=self._wait,
+                retry=retry_if_exception(is_retryable),
+                before_sleep=before_sleep_log(logger, logging.WARNING),
+                reraise=True,
+            ):
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        self._retries[job.name] += 1
+                        await self._acquire(job.tokens)
+                    result = await job.call()
+        except Exception as e:
+            self._errors[job.name] += 1
+            if not job.future.done():
+                job.future.set_exception(
+                    LLMCallError(f"LLM call '{job.name}' failed: {e}")
+                )
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._semaphore.release()
+            latency = time.monotonic() - start
+            self._calls[job.name] += 1
+            self._latencies[job.name].append(latency)
+            logger.info(
+                f"LLM call '{job.name}' took {latency:.2f}s "
+                f"(queued {start - job.queued_at:.2f}s)"
+            )
+
+    def stats(self) -> dict:
+        """Returns queue depth and per-call counters and latency percentiles."""
+        calls = {}
+        for name, latencies in list(self._latencies.items()):
+            ordered = sorted(latencies)
+            calls[name] = {
+                "calls": self._calls[name],
+                "errors": self._errors[name],
+                "retries": self._retries[name],
+                "latency_p50": ordered[len(ordered) // 2],
+                "latency_p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            }
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "calls": calls,
+        }
+
+
+@lru_cache
+def get_llm_scheduler() -> LLMScheduler:
+    """Returns the process-wide LLM scheduler configured in the settings."""
+    return LLMScheduler(
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        max_attempts=settings.LLM_MAX_ATTEMPTS,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    )
@@ -0,0 +1,249 @@
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import torch
+import whisper
+
+from app.audio_processing.diarize_audio import PyannoteDiarizer
+from app.core.config import settings
+from app.models import utcnow
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WHISPER_MODEL = "tiny"
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+LOADERS = {
+    "whisper": lambda name: whisper.load_model(name),
+    "pyannote": lambda name: PyannoteDiarizer(
+        model_name=name, hf_token=os.getenv("HF_TOKEN")
+    ),
+}
+
+
+@dataclass
+class CachedModel:
+    model: object
+    bytes: int
+    loaded_at: object = field(default_factory=utcnow)
+    last_used: float = field(default_factory=time.monotonic)
+    in_use: int = 0
+    # Handed out once but not kept, e.g. a diarizer whose pipeline failed to load
+    transient: bool = False
+
+
+def model_bytes(model, depth: int = 4) -> int:
+    """
+    Bytes of the torch parameters and buffers held by a model.
+
+    Wrappers such as PyannoteDiarizer are searched for torch modules up to
+    ``depth`` attributes deep.
+    """
+    seen = set()
+    tensors = {}
+
+    def visit(obj, level):
+        if id(obj) in seen or level > depth:
+            return
+        seen.add(id(obj))
+        if isinstance(obj, torch.nn.Module):
+            for tensor in (*obj.parameters(), *obj.buffers()):
+                tensors[id(tensor)] = tensor.numel() * tensor.element_size()
+            return
+        for value in getattr(obj, "__dict__", {}).values():
+            visit(value, level + 1)
+
+    visit(model, 0)
+    return sum(tensors.values())
+
+
+class ModelCache:
+    """
+    The models loaded by this process, within a memory budget.
+
+    Models are handed out by use(); a model nobody is using is idle, and idle
+    models are evicted least recently used first whenever a load would take
+    the resident models over ``budget_bytes``. Models in use are never
+    evicted, so the budget can be exceeded while all of them are busy. Loads
+    and evictions are logged and kept in ``events``.
+    """
+
+    def __init__(self, budget_bytes: int, loaders=LOADERS):
+        self.budget_bytes = budget_bytes
+        self.loaders = loaders
+        self.models: OrderedDict[tuple, CachedModel] = OrderedDict()
+        # Sizes of evicted models, to make room before they are loaded again
+        self.sizes: dict[tuple, int] = {}
+        self.events = deque(maxlen=100)
+        self._lock = threading.Lock()
+        # One lock per model, so Whisper and pyannote load in parallel
+        self._load_locks = defaultdict(threading.Lock)
+
+    def _event(self, type: str, key: tuple, **data) -> None:
+        self.events.append(
+            {"type": type, "model": ":".join(key), "at": utcnow().isoformat(), **data}
+        )
+
+    def resident_bytes(self) -> int:
+        return sum(cached.bytes for cached in self.models.values())
+
+    def _evict_for(self, needed: int, keep: tuple) -> None:
+        # Called with self._lock held
+        for key in list(self.models):
+            if self.resident_bytes() + needed <= self.budget_bytes:
+                return
+            cached = self.models[key]
+            if key == keep or cached.in_use:
+                continue
+            del self.models[key]
+            self.sizes[key] = cached.bytes
+            logger.info(
+                f"Evicted model {':'.join(key)} ({cached.bytes / 2**20:.0f} MB)"
+            )
+            self._event("evict", key, bytes=cached.bytes)
+
+    def _load(self, key: tuple, evict: bool = True) -> CachedModel:
+        with self._load_locks[key]:
+            with self._lock:
+                cached = self.models.get(key)
+                if cached is not None:
+                    return cached
+                if evict:
+                    self._evict_for(self.sizes.get(key, 0), keep=key)
+            gc.collect()
+            logger.info(f"Loading model {':'.join(key)}")
+            start = time.perf_counter()
+            model = self.loaders[key[0]](key[1])
+            seconds = time.perf_counter() - start
+            if isinstance(model, PyannoteDiarizer) and model.pipeline is None:
+                # Not kept, so the next job tries again
+                return CachedModel(model, 0, transient=True)
+            cached = CachedModel(model, model_bytes(model))
+            with self._lock:
+                self.sizes[key] = cached.bytes
+                if (
+                    not evict
+                    and self.resident_bytes() + cached.bytes > self.budget_bytes
+                ):
+                    logger.warning(
+                        f"Dropping {':'.join(key)}, it does not fit the model budget"
+                    )
+                    return CachedModel(model, cached.bytes, transient=True)
+                self._evict_for(cached.bytes, keep=key)
+                self.models[key] = cached
+                self._event("load", key, bytes=cached.bytes, seconds=round(seconds, 3))
+            logger.info(
+                f"Loaded model {':'.join(key)} ({cached.bytes / 2**20:.0f} MB) in {seconds:.1f}s"
+            )
+            return cached
+
+    @contextmanager
+    def use(self, kind: str, name: str):
+        """Yields the model, loading it if needed; it is not evicted until the block exits."""
+        key = (kind, name)
+        while True:
+            cached = self._load(key)
+            with self._lock:
+                # It may have been evicted between loading and here
+                if cached.transient or self.models.get(key) is cached:
+                    cached.in_use += 1
+                    cached.last_used = time.monotonic()
+                    if key in self.models:
+                        self.models.move_to_end(key)
+                    break
+        try:
+            yield cached.model
+        finally:
+            with self._lock:
+                cached.in_use -= 1
+                cached.last_used = time.monotonic()
+
+    def preload(self, key: tuple) -> bool:
+        """Loads a model if it fits next to the resident ones without evicting any; returns whether it is loaded."""
+        with self._lock:
+            if key in self.models:
+                return True
+            size = self.sizes.get(key)
+            if size is not None and self.resident_bytes() + size > self.budget_bytes:
+                logger.warning(
+                    f"Not preloading {':'.join(key)}, it does not fit the model budget"
+                )
+                return False
+        return not self._load(key, evict=False).transient
+
+    def stats(self) -> dict:
+        """Resident models with their sizes, the budget and recent load/evict events."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self.resident_bytes(),
+                "models": [
+                    {
+                        "model": ":".join(key),
+                        "bytes": cached.bytes,
+                        "in_use": cached.in_use,
+                        "idle_seconds": None
+                        if cached.in_use
+                        else round(now - cached.last_used, 1),
+                        "loaded_at": cached.loaded_at.isoformat(),
+                    }
+                    for key, cached in self.models.items()
+                ],
+                "events": list(self.events),
+            }
+
+
+_cache: ModelCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache(settings.AUDIO_MODEL_CACHE_MB * 2**20)
+        return _cache
+
+
+def use_whisper_model(name: str = WHISPER_MODEL):
+    """Whisper model, loaded once per process while it fits the budget."""
+    return get_model_cache().use("whisper", name)
+
+
+def use_diarizer(name: str = DIARIZATION_MODEL):
+    """
+    pyannote diarizer, loaded once per process while it fits the budget.
+
+    A diarizer whose pipeline failed to load is handed out but not kept, so
+    the next job tries again.
+    """
+    return get_model_cache().use("pyannote", name)
+
+
+def preload() -> None:
+    """
+    Loads the pipeline's models and the AUDIO_MODEL_PRELOAD hints, so a fresh
+    worker does not pay for them in its first job.
+
+    Hints are given as "whisper:<size>" or "pyannote:<pipeline>" and skipped
+    when they do not fit the budget.
+    """
+    cache = get_model_cache()
+    keys = [("whisper", WHISPER_MODEL), ("pyannote", DIARIZATION_MODEL)]
+    for hint in settings.AUDIO_MODEL_PRELOAD:
+        kind, _, name = hint.partition(":")
+        if kind not in cache.loaders or not name:
+            logger.warning(f"Ignoring invalid model preload hint '{hint}'")
+            continue
+        keys.append((kind, name))
+    for key in keys:
+        cache.preload(key)
@@ -1,13 +1,17 @@
 import os
+import asyncio
 import logging
 from dotenv import load_dotenv
 from typing import Literal, List
 import pandas as pd
 from datetime import datetime
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.pydantic_v1 import BaseModel, Field
 
+from app.audio_processing.llm_client import LLM_MODEL, get_llm, run_async
+from app.audio_processing.llm_scheduler import PRIORITY_NORMAL, LLMCallError, get_llm_scheduler
+from app.audio_processing.llm_cache import LLMResponseCache, get_llm_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,38 +54,251 @@ class Conversation(BaseModel):
         description="A list of persons mentioned in the text. Each person is returned as a Person object.",
     )
 
-def process_conversation(
-    file_content: str
-):
+
+class Interviewer(BaseModel):
+    """The person asking the questions in a conversation."""
+
+    name: str = Field(
+        ...,
+        description="The full name of the person who asks questions to the other person. If no name is mentioned, return an empty string.",
+    )
+
+
+CLEAN_PROMPT = (
+    "In the following you get a dialogue. Identify the people who speak. If you can find a name of a person, "
+    "use the name before the text of that person instead of the generic 'Speaker SPEAKER_00'. "
+    "If you cannot find a name, try to label them by functionality (interviewer, interviewee, speaker, host, guest, etc). "
+    "After that remove filler words like 'um', 'uh', 'you know', 'like' so it is easier to read, like a transcript of a podcast."
+    "Also remove phrases that are not relevant to the conversation, like 'I see', 'I understand', etc."
+    "Remove consecutive phrases that have the same meaning like : 'Even more, that is actually even more stressfull' will be 'that is actually even more stressfull' "
+    "The dialogue is as follows: "
+)
+
+DEFAULT_INTERESTS = ["AI", "Machine Learning", "Data Science", "Technology", "Innovation"]
+
+
+def extraction_prompt(file_content):
+    return "Answer the following questions based on the conversation:\n\n" + file_content
+
+
+def _follow_up_prompt(user, file_content, interests):
+    return (
+        f"Act as {user}. You want a follow up email for the following conversation: "
+        f"{file_content}\nKeep in mind the following interests: {', '.join(interests)}. "
+        "If you have not enough information to write the email completely, leave the missing parts blank."
+    )
+
+
+def _conversation_cache_key(file_content):
+    return LLMResponseCache.make_key(LLM_MODEL, extraction_prompt(file_content), Conversation)
+
+
+def _cached_conversation(key):
+    value = get_llm_cache().get(key)
+    if value is None:
+        return None
+    logger.info("Using cached conversation parsing")
+    return Conversation.parse_raw(value)
+
+
+def _interviewer_name(result):
+    interviewers = [person for person in getattr(result, "persons", []) if getattr(person, "role", "") == "INTERVIEWER"]
+    if interviewers:
+        return getattr(interviewers[0], "name", "Person A")
+    return "Person A"
+
+
+async def _ainvoke(runnable, prompt, name, priority=PRIORITY_NORMAL):
+    """Sends one LLM call through the shared scheduler (rate limits and retries)."""
+    # retry=None: no retries inside the Gemini client, the scheduler retries
+    return await get_llm_scheduler().submit(
+        lambda: runnable.ainvoke(prompt, retry=None), prompt=prompt, priority=priority, name=name
+    )
+
+
+async def aclean_transcript(raw_transcript: str, priority: int = PRIORITY_NORMAL) -> str:
     """
-    Reads a transcript file, parses it with an LLM, and returns the result.
+    Labels the speakers of a raw transcript and removes filler words.
 
     Args:
-        file_path (str): Path to the transcript file.
+        raw_transcript (str): The aligned transcript with generic speaker labels.
+        priority (int): Scheduler priority of the call.
 
     Returns:
-        The result from the LLM, or None if an error occurs.
+        str: The cleaned transcript.
+
+    Raises:
+        LLMCallError: If the LLM could not be reached after all retries.
     """
-    # Read transcript file content
-    
-    # LLM setup
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash",google_api_key=os.getenv("GEMINI_API_KEY"))
-    structured_llm = llm.with_structured_output(Conversation)
+    final_transcription = await _ainvoke(get_llm(), CLEAN_PROMPT + raw_transcript, "clean", priority)
+    return getattr(final_transcription, "content", str(final_transcription))
+
+
+async def aprocess_conversation(file_content: str, use_cache: bool = True, priority: int = PRIORITY_NORMAL):
+    """
+    Async variant of process_conversation() using the shared LLM client.
+
+    Returns:
+        The parsed Conversation.
+
+    Raises:
+        LLMCallError: If the LLM could not be reached after all retries.
+    """
+    key = _conversation_cache_key(file_content)
+    if use_cache:
+        cached = _cached_conversation(key)
+        if cached is not None:
+            return cached
 
-    # Invoke LLM for structured output
+    structured_llm = get_llm().with_structured_output(Conversation)
     logger.info("Parsing conversation via LLM...")
+    result = await _ainvoke(structured_llm, extraction_prompt(file_content), "extract", priority)
+    get_llm_cache().set(key, result.json())
+    return result
+
+
+async def aidentify_interviewer(file_content: str, priority: int = PRIORITY_NORMAL) -> str:
+    """
+    Extracts only the interviewer's name, which is all the follow-up email needs.
+
+    This is a much smaller structured call than the full Conversation extraction,
+    so the follow-up email can be drafted while the extraction is still running.
+
+    Returns:
+        str: The interviewer's name, or "Person A" if none is found.
+    """
+    structured_llm = get_llm().with_structured_output(Interviewer)
     try:
-        result = structured_llm.invoke(
-            "Answer the following questions based on the conversation:\n\n"
-            + file_content
+        interviewer = await _ainvoke(
+            structured_llm,
+            "Who is asking the questions in the following conversation?\n\n" + file_content,
+            "interviewer",
+            priority,
         )
-        return result
-    except Exception as e:
-        logger.error(f"LLM parsing failed: {e}")
+    except LLMCallError as e:
+        logger.error(f"Interviewer lookup failed: {e}")
+        return "Person A"
+    return getattr(interviewer, "name", "") or "Person A"
+
+
+async def agenerate_follow_up_email(file_content, user="Person A", interests=None, priority=PRIORITY_NORMAL):
+    """
+    Async variant of generate_follow_up_email() taking the interviewer's name directly.
+
+    Returns:
+        str: The generated follow-up email text, or an empty string if an error occurs.
+    """
+    if interests is None:
+        interests = DEFAULT_INTERESTS
+    try:
+        follow_up = await _ainvoke(get_llm(), _follow_up_prompt(user, file_content, interests), "follow_up", priority)
+        return getattr(follow_up, "content", str(follow_up))
+    except LLMCallError as e:
+        logger.error(f"Follow-up LLM invocation failed: {e}")
+        return ""
+
+
+async def adraft_follow_up(file_content, interests=None, priority=PRIORITY_NORMAL):
+    """
+    Drafts the follow-up email for a transcript without a prior full extraction.
+
+    Only the interviewer's name is looked up, so this is cheap enough to run
+    on demand, e.g. when a user first opens the follow-up of a conversation.
+
+    Returns:
+        str: The generated follow-up email text, or an empty string if an error occurs.
+    """
+    user = await aidentify_interviewer(file_content, priority=priority)
+    return await agenerate_follow_up_email(file_content=file_content, user=user, interests=interests, priority=priority)
+
+
+async def areprocess_transcript(
+    file_content: str,
+    stages=("extract",),
+    interests=None,
+    use_cache: bool = False,
+    priority: int = PRIORITY_NORMAL,
+):
+    """
+    Re-runs selected LLM stages on an already cleaned transcript.
+
+    Args:
+        file_content (str): The stored (cleaned) transcript.
+        stages: Any of "extract" and "follow_up".
+        interests (list, optional): Interests for the follow-up email.
+        use_cache (bool): Whether the extraction may be answered from the cache.
+        priority (int): Scheduler priority of the calls.
+
+    Returns:
+        dict: "result" (Conversation or None) and "follow_up_text" (str or None).
+
+    Raises:
+        LLMCallError: If the extraction failed after all retries.
+    """
+
+    async def skipped():
         return None
-    
 
-    
+    result, follow_up_text = await asyncio.gather(
+        aprocess_conversation(file_content, use_cache=use_cache, priority=priority)
+        if "extract" in stages
+        else skipped(),
+        adraft_follow_up(file_content, interests=interests, priority=priority)
+        if "follow_up" in stages
+        else skipped(),
+    )
+    return {"result": result, "follow_up_text": follow_up_text}
+
+
+async def areprocess_transcripts(transcripts, concurrency: int, **kwargs):
+    """
+    Re-runs selected LLM stages for many transcripts, at most ``concurrency`` at a time.
+
+    Args:
+        transcripts (dict): Transcripts by an arbitrary key (e.g. conversation id).
+        concurrency (int): Maximum number of transcripts processed at the same time.
+        **kwargs: Passed on to areprocess_transcript().
+
+    Returns:
+        dict: The output of areprocess_transcript() per key, or the raised exception.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def reprocess(file_content):
+        async with semaphore:
+            return await areprocess_transcript(file_content, **kwargs)
+
+    keys = list(transcripts)
+    outputs = await asyncio.gather(
+        *(reprocess(transcripts[key]) for key in keys), return_exceptions=True
+    )
+    return dict(zip(keys, outputs, strict=True))
+
+
+def process_conversation(
+    file_content: str,
+    use_cache: bool = True,
+):
+    """
+    Reads a transcript file, parses it with an LLM, and returns the result.
+
+    Identical prompts are answered from the LLM response cache unless
+    ``use_cache`` is False. The call goes through the shared LLM scheduler,
+    which retries quota and overload errors.
+
+    Args:
+        file_path (str): Path to the transcript file.
+        use_cache (bool): Set to False to bypass the LLM response cache.
+
+    Returns:
+        The result from the LLM.
+
+    Raises:
+        LLMCallError: If the LLM could not be reached after all retries.
+    """
+    return run_async(aprocess_conversation(file_content, use_cache=use_cache))
+
+
 def generate_follow_up_email(result, file_content, interests=None):
     """
     Generates a follow-up email suggestion using an LLM based on the conversation and user interests.
@@ -94,32 +311,11 @@ def generate_follow_up_email(result, file_content, interests=None):
     Returns:
         str: The generated follow-up email text, or an empty string if an error occurs.
     """
-    if interests is None:
-        interests = ["AI", "Machine Learning", "Data Science", "Technology", "Innovation"]
-
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash",google_api_key=os.getenv("GEMINI_API_KEY"))
-
     # Identify user (INTERVIEWER preferred)
-    user = "Person A"
-    interviewers = [person for person in getattr(result, "persons", []) if getattr(person, "role", "") == "INTERVIEWER"]
-    if interviewers:
-        user = getattr(interviewers[0], "name", "Person A")
+    user = _interviewer_name(result)
+    return run_async(agenerate_follow_up_email(file_content, user=user, interests=interests))
 
-    prompt = (
-        f"Act as {user}. You want a follow up email for the following conversation: "
-        f"{file_content}\nKeep in mind the following interests: {', '.join(interests)}. "
-        "If you have not enough information to write the email completely, leave the missing parts blank."
-    )
 
-    # Get follow-up email suggestion
-    try:
-        follow_up = llm.invoke(prompt)
-        follow_up_text = getattr(follow_up, "content", str(follow_up))
-    except Exception as e:
-        logger.error(f"Follow-up LLM invocation failed: {e}")
-        follow_up_text = ""
-
-    return follow_up_text
 def export_results_from_transcript(result, file_content,follow_up_text,out_path):
     """
     exports file to an Excel file with conversation summary, key topics, and persons.
@@ -170,7 +366,11 @@ def main():
         logger.error(f"Could not read file: {file_path}. Error: {e}")
         return None
 
-    result = process_conversation(file_content=file_content)
+    try:
+        result = process_conversation(file_content=file_content)
+    except LLMCallError as e:
+        logger.error(f"LLM parsing failed: {e}")
+        return None
 
     follow_up_text = generate_follow_up_email(result=result, file_content=file_content)
     export_results_from_transcript(
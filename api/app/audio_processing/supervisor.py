@@ -0,0 +1,216 @@
+import ctypes
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from sqlmodel import Session
+
+from app.audio_processing.job_queue import release_worker_jobs, remove_worker
+from app.audio_processing.tuning import pin_threads, worker_config
+from app.core.config import settings
+from app.core.db import engine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Without AUDIO_WORKER_FORK workers start from a fresh interpreter and the
+# supervisor never imports torch
+_spawn = multiprocessing.get_context("spawn")
+
+
+def worker_id_for(pid: int | None = None) -> str:
+    return f"{socket.gethostname()}-{pid or os.getpid()}"
+
+
+def rss_mb(pid: int | str = "self") -> float | None:
+    """Resident memory of a process in MB, or None if it cannot be read (non-Linux)."""
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def private_mb(pid: int | str = "self") -> float | None:
+    """
+    Memory only this process uses, in MB; pages shared copy-on-write with the
+    supervisor are not counted. Falls back to the RSS without smaps_rollup.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            kb = sum(int(line.split()[1]) for line in f if line.startswith("Private_"))
+    except (OSError, IndexError, ValueError):
+        return rss_mb(pid)
+    return kb / 1024
+
+
+def trim_memory() -> None:
+    """Collects garbage and hands free heap pages back to the OS (glibc only)."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _worker_process(index: int, threads: int | None) -> None:
+    # Before the import, so torch and OpenMP size their pools for this worker
+    pin_threads(threads)
+    # Imported here, so only the worker processes load the ML stack
+    from app.audio_processing.worker import serve
+
+    serve(index)
+
+
+def _forked_worker_process(index: int, threads: int | None) -> None:
+    # The supervisor's pooled connections stay with the supervisor
+    engine.dispose(close=False)
+    # The supervisor ran single-threaded, the worker sizes its own pools
+    pin_threads(threads)
+    from app.audio_processing.worker import serve
+
+    serve(index)
+
+
+class Supervisor:
+    """
+    Keeps ``processes`` worker processes with ``threads`` torch threads each
+    running on this node, see tuning.worker_config().
+
+    Workers recycle themselves after AUDIO_WORKER_MAX_JOBS jobs or when their
+    memory passes AUDIO_WORKER_MAX_RSS_MB after a job; the supervisor starts a
+    replacement, which re-warms the models. A worker above
+    AUDIO_WORKER_HARD_RSS_MB is killed right away, and the running jobs of
+    any worker that died are handed back to the queue. On SIGTERM/SIGINT the
+    workers finish their current job and the supervisor exits once all are
+    gone, killing the rest after AUDIO_WORKER_DRAIN_SECONDS.
+
+    With ``fork`` the supervisor imports the ML stack and loads the models
+    itself, then forks the workers: they share the weights copy-on-write and
+    a replacement is ready in milliseconds. Memory caps count private memory
+    only, so the shared weights are not charged to every worker. The OpenMP
+    runtime (libgomp) is not fork-safe once it started its thread pool, so
+    the supervisor loads the models with a single thread and only the forked
+    workers raise it to ``threads`` (by default torch's own default).
+    """
+
+    def __init__(self, processes: int, threads: int | None = None, fork: bool = False):
+        self.processes = processes
+        self.threads = threads
+        self.fork = fork
+        self.children: dict[int, multiprocessing.Process] = {}
+        self.drain_deadline: float | None = None
+
+    def _prepare_fork(self) -> bool:
+        """Loads the models to share with forked workers; returns False if forking is not safe here."""
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return False
+        import torch
+
+        # CUDA cannot be used in a process forked after it was initialized
+        if torch.cuda.is_available():
+            logger.info("CUDA is available, starting workers with spawn")
+            return False
+        if self.threads is None:
+            self.threads = torch.get_num_threads()
+        # A forked child inherits libgomp's thread pool without its threads and
+        # hangs in its first parallel region, so the supervisor never starts one
+        pin_threads(1)
+        from app.audio_processing.model_cache import preload
+
+        preload()
+        # Objects that exist now are never collected in the workers, so the
+        # collector does not write to (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+        return True
+
+    def _start(self, index: int) -> None:
+        if self.fork:
+            context, target = (
+                multiprocessing.get_context("fork"),
+                _forked_worker_process,
+            )
+        else:
+            context, target = _spawn, _worker_process
+        process = context.Process(
+            target=target, args=(index, self.threads), name=f"audio-worker-{index}"
+        )
+        process.start()
+        self.children[index] = process
+        logger.info(f"Started worker {index} (pid {process.pid})")
+
+    def drain(self, signum=None, frame=None) -> None:
+        if self.drain_deadline is not None:
+            return
+        logger.info("Draining workers")
+        self.drain_deadline = time.monotonic() + settings.AUDIO_WORKER_DRAIN_SECONDS
+        for process in self.children.values():
+            if process.is_alive():
+                process.terminate()
+
+    def _reap(self, index: int, process: multiprocessing.Process) -> None:
+        process.join()
+        if process.exitcode != 0:
+            logger.warning(
+                f"Worker {index} (pid {process.pid}) died with exit code {process.exitcode}"
+            )
+            with Session(engine) as session:
+                release_worker_jobs(
+                    session=session,
+                    worker_id=worker_id_for(process.pid),
+                    max_attempts=settings.AUDIO_JOB_MAX_ATTEMPTS,
+                )
+                remove_worker(session=session, worker_id=worker_id_for(process.pid))
+        del self.children[index]
+
+    def check(self) -> None:
+        """One supervision round: replaces exited workers and enforces the hard memory cap."""
+        for index, process in list(self.children.items()):
+            if not process.is_alive():
+                self._reap(index, process)
+                if self.drain_deadline is None:
+                    self._start(index)
+                continue
+            memory = private_mb(process.pid)
+            if memory is not None and memory > settings.AUDIO_WORKER_HARD_RSS_MB:
+                logger.warning(
+                    f"Killing worker {index}: {memory:.0f} MB private memory"
+                )
+                process.kill()
+            elif (
+                self.drain_deadline is not None
+                and time.monotonic() > self.drain_deadline
+            ):
+                logger.warning(f"Killing worker {index}, it did not drain in time")
+                process.kill()
+
+    def run(self, poll_seconds: float = 1.0) -> None:
+        if self.fork:
+            self.fork = self._prepare_fork()
+        signal.signal(signal.SIGTERM, self.drain)
+        signal.signal(signal.SIGINT, self.drain)
+        for index in range(self.processes):
+            self._start(index)
+        while self.children:
+            self.check()
+            time.sleep(poll_seconds)
+        logger.info("All workers stopped")
+
+
+def main():
+    processes, threads = worker_config()
+    logger.info(
+        f"Running {processes} worker(s) with {threads or 'default'} threads each"
+    )
+    Supervisor(processes, threads, fork=settings.AUDIO_WORKER_FORK).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,91 @@
-import os
+import json
 import logging
+import os
+
 import whisper
 
+from app.audio_processing.cancellation import CancelToken, JobCancelled, check_cancelled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def transcribe_audio(audio_path: str, model_name: str = "tiny", key: str = "text"):
+def _transcribe_windows(
+    model,
+    audio_path: str,
+    checkpoint_dir: str,
+    window_seconds: int,
+    cancel_token: CancelToken | None = None,
+    on_segments=None,
+):
+    """
+    Transcribes an audio file window by window, persisting each window's segments.
+
+    Windows that already have a checkpoint file are read back instead of being
+    transcribed again. Every window is prompted with the text of the previous
+    one, taken from the persisted segments, and the returned segments are always
+    the ones read back from disk, so a resumed run yields the same segment list
+    as an uninterrupted one.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    audio = whisper.load_audio(audio_path)
+    window = int(window_seconds * whisper.audio.SAMPLE_RATE)
+
+    segments = []
+    prompt = None
+    for index, offset in enumerate(range(0, len(audio), window)):
+        checkpoint_path = os.path.join(checkpoint_dir, f"window_{index:05d}.json")
+        if os.path.exists(checkpoint_path):
+            logger.info(f"Window {index} restored from checkpoint")
+        else:
+            check_cancelled(cancel_token)
+            logger.info(f"Transcribing window {index} of {audio_path}...")
+            result = model.transcribe(
+                audio[offset : offset + window], initial_prompt=prompt
+            )
+            start = offset / whisper.audio.SAMPLE_RATE
+            window_segments = [
+                {
+                    **segment,
+                    "start": segment["start"] + start,
+                    "end": segment["end"] + start,
+                }
+                for segment in result["segments"]
+            ]
+            tmp_path = checkpoint_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"language": result.get("language"), "segments": window_segments}, f
+                )
+            os.replace(tmp_path, checkpoint_path)
+
+        with open(checkpoint_path, encoding="utf-8") as f:
+            window_segments = json.load(f)["segments"]
+        for id, segment in enumerate(window_segments, start=len(segments)):
+            segment["id"] = id
+        if on_segments is not None:
+            on_segments(index, window_segments)
+        segments.extend(window_segments)
+        if window_segments:
+            prompt = "".join(segment["text"] for segment in window_segments)
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+    }
+
+
+def transcribe_audio(
+    audio_path: str,
+    model_name: str = "tiny",
+    key: str = "text",
+    checkpoint_dir: str | None = None,
+    window_seconds: int = 300,
+    cancel_token: CancelToken | None = None,
+    on_segments=None,
+    model=None,
+):
     """
     Transcribe an audio file using Whisper.
 
@@ -15,9 +93,20 @@ def transcribe_audio(audio_path: str, model_name: str = "tiny", key: str = "text
         audio_path (str): Path to the audio file.
         model_name (str): Whisper model to use (default "tiny").
         key (str): Key to extract from the result ("text" or "segments").
+        checkpoint_dir (str, optional): If given, the audio is transcribed in
+            windows of ``window_seconds`` and each finished window is persisted
+            there, so a restarted transcription continues after the last one.
+        window_seconds (int): Length of a checkpointed window (default 300).
+        cancel_token (CancelToken, optional): Checked before every window.
+        on_segments (callable, optional): Called as on_segments(window, segments)
+            with the segments of every finished window, in order.
+        model (optional): Already loaded Whisper model; ``model_name`` is loaded if missing.
 
     Returns:
         str | list: Transcribed text or list of segments.
+
+    Raises:
+        JobCancelled: If the token was cancelled.
     """
     try:
         # Check if file exists
@@ -25,17 +114,32 @@ def transcribe_audio(audio_path: str, model_name: str = "tiny", key: str = "text
             logger.error(f"Audio file not found: {audio_path}")
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-        logger.info(f"Loading Whisper model '{model_name}'...")
-        model = whisper.load_model(model_name)
+        check_cancelled(cancel_token)
+        if model is None:
+            logger.info(f"Loading Whisper model '{model_name}'...")
+            model = whisper.load_model(model_name)
 
         logger.info(f"Transcribing {audio_path}...")
-        result = model.transcribe(audio_path)
+        if checkpoint_dir is None:
+            result = model.transcribe(audio_path)
+        else:
+            result = _transcribe_windows(
+                model,
+                audio_path,
+                checkpoint_dir,
+                window_seconds,
+                cancel_token,
+                on_segments,
+            )
 
         if key not in result:
             logger.error(f"Key '{key}' not found in transcription result.")
             raise KeyError(f"Key '{key}' not found in transcription result.")
         return result[key]
 
+    except JobCancelled:
+        logger.info(f"Transcription of {audio_path} cancelled")
+        raise
     except Exception as e:
         logger.error(f"Error during transcription: {e}")
         return None
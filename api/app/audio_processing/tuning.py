@@ -0,0 +1,213 @@
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from app.audio_processing.fair_share import estimate_audio_seconds
+from app.core.config import settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_context = multiprocessing.get_context("spawn")
+
+# Thread pools that would otherwise each start one thread per core
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def pin_threads(threads: int | None) -> None:
+    """
+    Limits torch and the OpenMP/BLAS pools of this process to ``threads`` threads.
+
+    Call it before the models are loaded; the environment variables only
+    reach libraries that are initialized after it.
+    """
+    if threads is None:
+        return
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def load_tuning(path: str | None = None) -> dict | None:
+    """The configuration written by the last tuning run, or None if there is none."""
+    path = path or settings.AUDIO_TUNING_PATH
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            tuning = json.load(f)
+        return {
+            "processes": int(tuning["processes"]),
+            "threads": int(tuning["threads"]),
+        }
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring invalid tuning file {path}: {e}")
+        return None
+
+
+def worker_config() -> tuple[int, int | None]:
+    """
+    Worker processes and threads per worker for this node.
+
+    AUDIO_WORKER_PROCESSES/AUDIO_WORKER_THREADS win over the tuning file;
+    without either, one worker runs with torch's default thread count.
+    """
+    tuning = load_tuning() or {}
+    processes = settings.AUDIO_WORKER_PROCESSES or tuning.get("processes") or 1
+    threads = settings.AUDIO_WORKER_THREADS or tuning.get("threads")
+    return processes, threads
+
+
+def candidates(
+    cpu_count: int, max_processes: int | None = None
+) -> list[tuple[int, int]]:
+    """
+    Process × thread combinations that do not oversubscribe ``cpu_count`` cores.
+
+    Threads per process are powers of two up to the core count (and the core
+    count itself); every combination uses at least half of the cores.
+    """
+    thread_counts = sorted(
+        {2**i for i in range(cpu_count.bit_length()) if 2**i <= cpu_count} | {cpu_count}
+    )
+    combinations = []
+    for threads in thread_counts:
+        most = cpu_count // threads
+        if max_processes is not None:
+            most = min(most, max_processes)
+        for processes in range(1, most + 1):
+            if processes * threads * 2 >= cpu_count:
+                combinations.append((processes, threads))
+    return combinations
+
+
+def _run_pipeline_models(whisper_model, diarizer, audio_path: str) -> None:
+    # Diarization and transcription run side by side, as in the pipeline
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        transcription = executor.submit(whisper_model.transcribe, audio_path)
+        diarization = executor.submit(diarizer.diarize, audio_path)
+        transcription.result()
+        diarization.result()
+
+
+def _benchmark_process(audio_path: str, threads: int, barrier, results) -> None:
+    pin_threads(threads)
+    from app.audio_processing.model_cache import use_diarizer, use_whisper_model
+
+    with use_whisper_model() as whisper_model, use_diarizer() as diarizer:
+        if diarizer.pipeline is None:
+            logger.warning("pyannote is not available, only Whisper is benchmarked")
+        # Warm-up, so one-off allocations and lazy initialization are not timed
+        _run_pipeline_models(whisper_model, diarizer, audio_path)
+        barrier.wait()
+        start = time.perf_counter()
+        _run_pipeline_models(whisper_model, diarizer, audio_path)
+        results.put(time.perf_counter() - start)
+
+
+def benchmark(audio_path: str, processes: int, threads: int) -> float | None:
+    """
+    Runs ``processes`` workers with ``threads`` threads each on the same recording at once.
+
+    Returns:
+        float | None: Audio seconds processed per wall-clock second by all
+        workers together, or None if a worker failed (e.g. ran out of memory).
+    """
+    barrier = _context.Barrier(processes)
+    results = _context.Queue()
+    workers = [
+        _context.Process(
+            target=_benchmark_process, args=(audio_path, threads, barrier, results)
+        )
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    while any(worker.is_alive() for worker in workers):
+        if any(worker.exitcode not in (None, 0) for worker in workers):
+            # The others would wait at the barrier forever
+            for worker in workers:
+                worker.terminate()
+        time.sleep(1)
+    for worker in workers:
+        worker.join()
+    if any(worker.exitcode != 0 for worker in workers):
+        return None
+    seconds = max(results.get() for _ in workers)
+    return processes * estimate_audio_seconds(audio_path) / seconds
+
+
+def tune(
+    audio_path: str, output_path: str | None = None, max_processes: int | None = None
+) -> dict:
+    """
+    Benchmarks the configured Whisper and pyannote models on this host and writes the best configuration.
+
+    Every candidate from candidates() processes ``audio_path`` once per worker;
+    the combination with the highest throughput wins, the one with fewer
+    processes (less memory) on a tie.
+
+    Args:
+        audio_path (str): A representative recording; a minute or two is enough.
+        output_path (str, optional): Where to write the result (default AUDIO_TUNING_PATH).
+        max_processes (int, optional): Upper bound on processes, e.g. for the memory of the host.
+
+    Returns:
+        dict: The written configuration, including all measurements.
+    """
+    from app.audio_processing.model_cache import DIARIZATION_MODEL, WHISPER_MODEL
+
+    output_path = output_path or settings.AUDIO_TUNING_PATH
+    cpu_count = os.cpu_count() or 1
+    results = []
+    for processes, threads in candidates(cpu_count, max_processes):
+        logger.info(f"Benchmarking {processes} process(es) × {threads} thread(s)...")
+        throughput = benchmark(audio_path, processes, threads)
+        logger.info(
+            f"{processes} × {threads}: {throughput or 0:.2f} audio seconds per second"
+        )
+        results.append(
+            {"processes": processes, "threads": threads, "throughput": throughput}
+        )
+
+    finished = [result for result in results if result["throughput"] is not None]
+    if not finished:
+        raise RuntimeError("Every benchmark run failed.")
+    best = max(
+        finished, key=lambda result: (result["throughput"], -result["processes"])
+    )
+    tuning = {
+        "processes": best["processes"],
+        "threads": best["threads"],
+        "throughput": best["throughput"],
+        "cpu_count": cpu_count,
+        "whisper_model": WHISPER_MODEL,
+        "diarization_model": DIARIZATION_MODEL,
+        "tuned_at": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(tuning, f, indent=2)
+    logger.info(f"Wrote {best['processes']} × {best['threads']} to {output_path}")
+    return tuning
+
+
+def main():
+    audio_file = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join("..", "conversations", "test.wav")
+    )
+    tune(audio_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import logging
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from sqlmodel import Session
+
+from app.audio_processing.admission import available_memory_mb
+from app.audio_processing.artifacts import ArtifactStore
+from app.audio_processing.cancellation import CancelToken, JobCancelled
+from app.audio_processing.job_queue import (
+    add_job_event,
+    claim_job,
+    complete_job,
+    fail_job,
+    finish_cancelled_job,
+    heartbeat,
+    is_cancel_requested,
+    remove_worker,
+    report_worker,
+    requeue_stale_jobs,
+)
+from app.audio_processing.llm_cache import get_llm_cache
+from app.audio_processing.llm_scheduler import get_llm_scheduler
+from app.audio_processing.supervisor import (
+    private_mb,
+    rss_mb,
+    trim_memory,
+    worker_id_for,
+)
+from app.audio_processing.tuning import pin_threads, worker_config
+from app.core.config import settings
+from app.core.db import engine
+from app.core.startup import warm_llm
+from app.models import AudioJob
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JobWatch(threading.Thread):
+    """
+    Keeps a claimed job alive while the pipeline is running and watches for cancellation.
+
+    Sends a heartbeat every AUDIO_JOB_HEARTBEAT_SECONDS and polls the job's
+    cancel_requested flag every AUDIO_CANCEL_POLL_SECONDS, cancelling the
+    pipeline's token when it is set.
+    """
+
+    def __init__(self, job_id, worker_id: str, cancel_token: CancelToken):
+        super().__init__(name=f"job-watch-{job_id}", daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.cancel_token = cancel_token
+        self.stopped = threading.Event()
+
+    def run(self):
+        last_beat = time.monotonic()
+        while not self.stopped.wait(settings.AUDIO_CANCEL_POLL_SECONDS):
+            try:
+                with Session(engine) as session:
+                    # Heartbeats go on after a cancel, until the pipeline reaches its next check
+                    if not self.cancel_token.cancelled and is_cancel_requested(
+                        session=session, job_id=self.job_id
+                    ):
+                        logger.info(f"Cancelling job {self.job_id}")
+                        self.cancel_token.cancel()
+                    if (
+                        time.monotonic() - last_beat
+                        < settings.AUDIO_JOB_HEARTBEAT_SECONDS
+                    ):
+                        continue
+                    last_beat = time.monotonic()
+                    if not heartbeat(
+                        session=session, job_id=self.job_id, worker_id=self.worker_id
+                    ):
+                        logger.warning(
+                            f"Lost job {self.job_id}, it was handed to another worker"
+                        )
+                        return
+            except Exception as e:
+                # A missed beat is fine, the reaper only acts after AUDIO_JOB_STALE_SECONDS
+                logger.error(f"Watching job {self.job_id} failed: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class JobEventLog:
+    """
+    Stores a job's pipeline events for GET /audio/jobs/{id}/events.
+
+    Diarization progress arrives per inference batch, so it is only stored
+    when a step starts or ends or its progress moved by AUDIO_PROGRESS_STEP.
+    A failing write is logged and never fails the job.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._progress = {}
+        self._lock = threading.Lock()
+
+    def _skip(self, type, data):
+        if type != "diarization":
+            return False
+        fraction = data["completed"] / data["total"] if data["total"] else 1.0
+        data["fraction"] = round(fraction, 3)
+        with self._lock:
+            last = self._progress.get(data["step"])
+            if (
+                last is not None
+                and fraction < 1.0
+                and fraction - last < settings.AUDIO_PROGRESS_STEP
+            ):
+                return True
+            self._progress[data["step"]] = fraction
+        return False
+
+    def __call__(self, type, data):
+        if self._skip(type, data):
+            return
+        try:
+            with Session(engine) as session:
+                add_job_event(session=session, job_id=self.job_id, type=type, data=data)
+        except Exception as e:
+            logger.error(f"Could not store {type} event of job {self.job_id}: {e}")
+
+
+def run_job(session: Session, job: AudioJob, worker_id: str) -> None:
+    """
+    Runs the audio pipeline for a claimed job and stores its conversation.
+
+    Unexpected errors re-queue the job until it used up AUDIO_JOB_MAX_ATTEMPTS;
+    a recording that cannot be diarized or transcribed fails right away. A
+    cancelled job is stopped at the pipeline's next cancellation check, and
+    its upload and partial artifacts are deleted.
+    """
+    # Imported here, so main() pins the torch threads before the ML stack is loaded
+    from app.audio_processing.audio_pipeline import process
+
+    logger.info(f"Worker {worker_id} processing job {job.id} (attempt {job.attempts})")
+    cancel_token = CancelToken()
+    watch = JobWatch(job.id, worker_id, cancel_token)
+    watch.start()
+    try:
+        processed = process(
+            job.file_path, cancel_token=cancel_token, on_event=JobEventLog(job.id)
+        )
+    except JobCancelled:
+        finish_cancelled_job(session=session, job_id=job.id, worker_id=worker_id)
+        logger.info(f"Job {job.id} cancelled")
+        return
+    except Exception as e:
+        logger.exception(f"Job {job.id} failed")
+        fail_job(
+            session=session,
+            job_id=job.id,
+            worker_id=worker_id,
+            error=str(e) or type(e).__name__,
+            retry=job.attempts < settings.AUDIO_JOB_MAX_ATTEMPTS,
+        )
+        return
+    finally:
+        watch.stop()
+
+    if not processed:
+        fail_job(
+            session=session,
+            job_id=job.id,
+            worker_id=worker_id,
+            error="Audio processing failed.",
+            retry=False,
+        )
+        return
+    done = complete_job(
+        session=session,
+        job_id=job.id,
+        worker_id=worker_id,
+        processed=processed,
+        event="Audio Processing Event",
+    )
+    if done is not None:
+        logger.info(f"Job {job.id} {done.status}")
+
+
+def _report(session: Session, worker_id: str, jobs: int) -> None:
+    from app.audio_processing.model_cache import get_model_cache
+
+    try:
+        report_worker(
+            session=session,
+            worker_id=worker_id,
+            jobs=jobs,
+            rss_mb=rss_mb(),
+            available_mb=available_memory_mb(),
+            model_cache=get_model_cache().stats(),
+            llm={
+                "cache": get_llm_cache().stats(),
+                "scheduler": get_llm_scheduler().stats(),
+            },
+        )
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Could not report worker {worker_id}: {e}")
+
+
+def _warm_llm() -> None:
+    try:
+        warm_llm()
+    except Exception as e:
+        logger.error(f"Could not warm up the LLM client: {e}")
+
+
+def _sweep_artifacts() -> None:
+    try:
+        ArtifactStore(settings.ARTIFACT_DIR).sweep(settings.ARTIFACT_MAX_AGE_SECONDS)
+    except OSError as e:
+        logger.error(f"Could not sweep artifacts: {e}")
+
+
+def run_worker(
+    worker_id: str,
+    stop: threading.Event,
+    max_jobs: int | None = None,
+    max_rss_mb: float | None = None,
+) -> None:
+    """
+    Claims and runs jobs until ``stop`` is set.
+
+    A running job is always finished before the loop exits. Every worker also
+    acts as reaper for jobs of workers that stopped sending heartbeats,
+    sweeps old artifacts every ARTIFACT_SWEEP_SECONDS, and reports its memory
+    and model cache every AUDIO_JOB_HEARTBEAT_SECONDS and after each job.
+
+    Args:
+        worker_id (str): Identifies the worker in claimed jobs.
+        stop (threading.Event): Set to drain the worker.
+        max_jobs (int, optional): Exit after this many jobs.
+        max_rss_mb (float, optional): Exit when the private memory of the process is above this
+            after a job, so a supervisor can replace it with a fresh process.
+    """
+    stale_after = timedelta(seconds=settings.AUDIO_JOB_STALE_SECONDS)
+    last_reap = float("-inf")
+    last_report = float("-inf")
+    last_sweep = float("-inf")
+    jobs = 0
+    while not stop.is_set():
+        with Session(engine) as session:
+            if time.monotonic() - last_report > settings.AUDIO_JOB_HEARTBEAT_SECONDS:
+                _report(session, worker_id, jobs)
+                last_report = time.monotonic()
+            if time.monotonic() - last_reap > settings.AUDIO_JOB_STALE_SECONDS / 2:
+                requeue_stale_jobs(
+                    session=session,
+                    stale_after=stale_after,
+                    max_attempts=settings.AUDIO_JOB_MAX_ATTEMPTS,
+                )
+                last_reap = time.monotonic()
+            if time.monotonic() - last_sweep > settings.ARTIFACT_SWEEP_SECONDS:
+                _sweep_artifacts()
+                last_sweep = time.monotonic()
+            job = claim_job(session=session, worker_id=worker_id)
+            if job is not None:
+                run_job(session, job, worker_id)
+                jobs += 1
+                trim_memory()
+                memory = private_mb()
+                _report(session, worker_id, jobs)
+                last_report = time.monotonic()
+                if max_jobs is not None and jobs >= max_jobs:
+                    logger.info(f"Worker {worker_id} recycling after {jobs} jobs")
+                    break
+                if (
+                    max_rss_mb is not None
+                    and memory is not None
+                    and memory > max_rss_mb
+                ):
+                    logger.info(
+                        f"Worker {worker_id} recycling at {memory:.0f} MB private memory"
+                    )
+                    break
+                continue
+        stop.wait(settings.AUDIO_WORKER_POLL_SECONDS)
+    with Session(engine) as session:
+        remove_worker(session=session, worker_id=worker_id)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def _drain_on_signals(stop: threading.Event) -> None:
+    def drain(signum, _frame):
+        logger.info(f"Received signal {signum}, finishing the current job")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, drain)
+    signal.signal(signal.SIGINT, drain)
+
+
+def serve(index: int) -> None:
+    """Entry point of a worker process started by the supervisor."""
+    stop = threading.Event()
+    _drain_on_signals(stop)
+    if settings.AUDIO_WORKER_PRELOAD_MODELS:
+        from app.audio_processing.model_cache import preload
+
+        preload()
+    # Here and not in the supervisor, as the gRPC client does not survive a fork
+    _warm_llm()
+    logger.info(f"Worker {index} ({worker_id_for()}) started")
+    run_worker(
+        worker_id_for(),
+        stop,
+        max_jobs=settings.AUDIO_WORKER_MAX_JOBS,
+        max_rss_mb=settings.AUDIO_WORKER_MAX_RSS_MB,
+    )
+
+
+def main():
+    # A single worker without supervision, e.g. for development
+    pin_threads(worker_config()[1])
+    stop = threading.Event()
+    _drain_on_signals(stop)
+    logger.info(f"Worker {worker_id_for()} started")
+    run_worker(worker_id_for(), stop)
+
+
+if __name__ == "__main__":
+    main()
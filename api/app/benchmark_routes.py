@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlmodel import select, text
+
+from app.api.deps import AsyncSessionDep, SessionDep
+from app.core.db import async_engine, engine
+from app.models import Person
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The same query behind a sync route (threadpool + Session) and an async one
+# (event loop + AsyncSession); pg_sleep stands in for a slower query
+bench = FastAPI()
+
+
+@bench.get("/sync")
+def sync_route(session: SessionDep, sleep_ms: int = 0) -> int:
+    if sleep_ms:
+        session.execute(text("SELECT pg_sleep(:s)"), {"s": sleep_ms / 1000})
+    return len(session.exec(select(Person).limit(100)).all())
+
+
+@bench.get("/async")
+async def async_route(session: AsyncSessionDep, sleep_ms: int = 0) -> int:
+    if sleep_ms:
+        await session.execute(text("SELECT pg_sleep(:s)"), {"s": sleep_ms / 1000})
+    return len((await session.exec(select(Person).limit(100))).all())
+
+
+async def run(path: str, concurrency: int, requests: int, sleep_ms: int) -> dict:
+    """Sends ``requests`` requests to ``path``, ``concurrency`` at a time, and returns throughput and latencies."""
+    latencies = []
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=bench)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def user():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get(path, params={"sleep_ms": sleep_ms})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "path": path,
+        "requests_per_second": round(requests / seconds, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "pool": (engine if path == "/sync" else async_engine).pool.stats(),
+    }
+
+
+async def compare(concurrency: int, requests: int, sleep_ms: int) -> None:
+    for path in ("/sync", "/async"):
+        # Warm-up, so both variants start with an open pool
+        await run(path, concurrency, concurrency, sleep_ms)
+        result = await run(path, concurrency, requests, sleep_ms)
+        logger.info(
+            f"{path}: {result['requests_per_second']} req/s, p50 {result['p50_ms']} ms, "
+            f"p95 {result['p95_ms']} ms, pool wait p95 {result['pool']['wait_p95_ms']} ms"
+        )
+    await async_engine.dispose()
+
+
+def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    sleep_ms = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    logger.info(
+        f"{requests} requests, {concurrency} concurrent, {sleep_ms} ms simulated query time"
+    )
+    asyncio.run(compare(concurrency, requests, sleep_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import sys
+import time
+
+from sqlmodel import Session, delete, func, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.crud import asearch_conversations_db, get_user_by_email
+from app.models import Conversation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EVENT = "search-benchmark"
+BATCH_SIZE = 10_000
+
+# Synthetic conversations owned by the first superuser. Words are drawn
+# log-uniformly from term1..term5000, so low terms are common and high ones
+# rare, roughly like natural language
+SEED = text(
+    """
+    INSERT INTO conversation (id, owner_id, created_at, event, summary, key_topics, transcript)
+    SELECT
+        gen_random_uuid(),
+        :owner_id,
+        now() - make_interval(secs => i),
+        :event,
+        (SELECT string_agg('term' || floor(exp(random() * ln(5000)))::int, ' ')
+         FROM generate_series(1, 20 + i % 1)),
+        jsonb_build_array('term' || floor(exp(random() * ln(5000)))::int),
+        (SELECT string_agg('term' || floor(exp(random() * ln(5000)))::int, ' ')
+         FROM generate_series(1, 300 + i % 1))
+    FROM generate_series(:start, :stop) AS i
+    """
+)
+
+QUERIES = [
+    "term1",
+    "term40",
+    "term3000",
+    "term2 term9",
+    '"term1 term2"',
+    "term5 -term1",
+]
+
+
+def seed(owner_id, rows: int) -> None:
+    with Session(engine) as session:
+        existing = session.exec(
+            select(func.count())
+            .select_from(Conversation)
+            .where(Conversation.event == EVENT)
+        ).one()
+        for start in range(existing + 1, rows + 1, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE - 1, rows)
+            session.execute(
+                SEED,
+                {"owner_id": owner_id, "event": EVENT, "start": start, "stop": stop},
+            )
+            session.commit()
+            logger.info(f"Seeded {stop}/{rows} conversations")
+        session.execute(text("ANALYZE conversation"))
+        session.commit()
+
+
+async def measure(owner_id, runs: int) -> dict[str, list[float]]:
+    """Latencies of the first page of each query, in ms."""
+    latencies = {q: [] for q in QUERIES}
+    async with AsyncSession(async_engine) as session:
+        for _ in range(runs):
+            for q in QUERIES:
+                start = time.perf_counter()
+                await asearch_conversations_db(
+                    session=session, q=q, owner_id=owner_id, after=None, limit=21
+                )
+                latencies[q].append((time.perf_counter() - start) * 1000)
+    await async_engine.dispose()
+    return latencies
+
+
+def main() -> None:
+    with Session(engine) as session:
+        owner_id = get_user_by_email(session=session, email=settings.FIRST_SUPERUSER).id
+    if len(sys.argv) > 1 and sys.argv[1] == "cleanup":
+        with Session(engine) as session:
+            session.exec(delete(Conversation).where(Conversation.event == EVENT))
+            session.commit()
+        return
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    target_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 200
+    seed(owner_id, rows)
+    for q, values in asyncio.run(measure(owner_id, runs)).items():
+        values.sort()
+        p50 = values[len(values) // 2]
+        p95 = values[int(len(values) * 0.95)]
+        status = "ok" if p95 <= target_ms else "OVER TARGET"
+        logger.info(f"{q!r}: p50 {p50:.1f} ms, p95 {p95:.1f} ms ({status})")
+
+
+if __name__ == "__main__":
+    main()
@@ -95,6 +95,111 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Memora"
     FIRST_SUPERUSER: str = "admin@example.com"
     FIRST_SUPERUSER_PASSWORD: str = "securepassword123"
+
+    # Database engine; the pool limits are per process. Statements running longer than
+    # DB_STATEMENT_TIMEOUT_MS are cancelled by Postgres (0 disables the timeout)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+
+    # Startup polls the database with exponential backoff, from STARTUP_DB_RETRY_SECONDS up
+    # to STARTUP_DB_RETRY_MAX_SECONDS between attempts, and gives up after STARTUP_DB_TIMEOUT_SECONDS
+    STARTUP_DB_RETRY_SECONDS: float = 0.5
+    STARTUP_DB_RETRY_MAX_SECONDS: float = 10
+    STARTUP_DB_TIMEOUT_SECONDS: float = 120
+    # Load the LLM client and chains while waiting for the database. Off by default, as
+    # the API only needs them for reprocessing; audio workers always warm up at start
+    STARTUP_WARM_LLM: bool = False
+
+    # LLM response cache (SQLite file, shared by all processes on a host)
+    LLM_CACHE_PATH: str = "cache/llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    LLM_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Budgets and retries for Gemini calls (per process)
+    LLM_REQUESTS_PER_MINUTE: int = 60
+    LLM_TOKENS_PER_MINUTE: int = 1_000_000
+    LLM_MAX_ATTEMPTS: int = 5
+    LLM_MAX_CONCURRENCY: int = 8
+    # Conversations re-summarized at the same time by POST /conversation/reprocess
+    REPROCESS_CONCURRENCY: int = 4
+
+    # Content-addressed artifacts of the audio pipeline stages
+    ARTIFACT_DIR: str = "artifacts"
+    # Artifacts not used for ARTIFACT_MAX_AGE_SECONDS are deleted by the workers, which
+    # sweep ARTIFACT_DIR every ARTIFACT_SWEEP_SECONDS
+    ARTIFACT_MAX_AGE_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    ARTIFACT_SWEEP_SECONDS: float = 60 * 60
+    # Whisper checkpoints once per window; keep it a multiple of Whisper's 30s chunks
+    TRANSCRIBE_WINDOW_SECONDS: int = 300
+
+    # Audio job queue; UPLOAD_DIR must be shared by the API and all worker nodes
+    UPLOAD_DIR: str = "uploads"
+    AUDIO_WORKER_POLL_SECONDS: float = 2
+    AUDIO_JOB_HEARTBEAT_SECONDS: float = 15
+    # How quickly a running job notices DELETE /audio/jobs/{id}
+    AUDIO_CANCEL_POLL_SECONDS: float = 2
+    # Worker processes per node (python -m app.audio_processing.supervisor) and torch/OpenMP
+    # threads per worker. Unset, they come from the file written by
+    # python -m app.audio_processing.tuning, else 1 process with torch's default threads.
+    AUDIO_WORKER_PROCESSES: int | None = None
+    AUDIO_WORKER_THREADS: int | None = None
+    AUDIO_TUNING_PATH: str = "audio_tuning.json"
+    # A worker exits after AUDIO_WORKER_MAX_JOBS jobs or once its private memory (RSS without
+    # pages shared with the supervisor) passes AUDIO_WORKER_MAX_RSS_MB after a job, and is
+    # replaced; one above AUDIO_WORKER_HARD_RSS_MB is killed mid-job.
+    AUDIO_WORKER_MAX_JOBS: int = 50
+    AUDIO_WORKER_MAX_RSS_MB: int = 6 * 1024
+    AUDIO_WORKER_HARD_RSS_MB: int = 10 * 1024
+    # Time workers get to finish their job on shutdown before they are killed
+    AUDIO_WORKER_DRAIN_SECONDS: float = 15 * 60
+    AUDIO_WORKER_PRELOAD_MODELS: bool = True
+    # Load the models once in the supervisor and fork the workers from it, so they share
+    # the weights copy-on-write and start in milliseconds (falls back to spawn with CUDA).
+    # The supervisor then loads the models with one torch/OpenMP thread, as OpenMP's
+    # thread pool does not survive a fork; the workers use AUDIO_WORKER_THREADS.
+    AUDIO_WORKER_FORK: bool = True
+    # Memory for the models of one worker; idle models are evicted least recently used
+    # first. AUDIO_MODEL_PRELOAD lists extra models to load at worker start, as
+    # "whisper:<size>" or "pyannote:<pipeline>", if they fit.
+    AUDIO_MODEL_CACHE_MB: int = 4 * 1024
+    AUDIO_MODEL_PRELOAD: list[str] = []
+    # Progress events: minimum diarization progress between two stored events,
+    # and how often GET /audio/jobs/{id}/events looks for new ones
+    AUDIO_PROGRESS_STEP: float = 0.02
+    AUDIO_EVENTS_POLL_SECONDS: float = 1
+    AUDIO_EVENTS_KEEPALIVE_SECONDS: float = 15
+    # A running job without heartbeat for this long is handed to another worker
+    AUDIO_JOB_STALE_SECONDS: float = 120
+    AUDIO_JOB_MAX_ATTEMPTS: int = 3
+    # A failed attempt is retried after AUDIO_JOB_RETRY_DELAY_SECONDS times the attempts so far
+    AUDIO_JOB_RETRY_DELAY_SECONDS: float = 30
+    # Scheduling: uploads up to AUDIO_INTERACTIVE_MAX_SECONDS go to the interactive
+    # lane; owners share workers by deficit round-robin over audio seconds
+    AUDIO_BYTES_PER_SECOND: int = 16_000  # ~128 kbit/s, for non-WAV duration estimates
+    AUDIO_INTERACTIVE_MAX_SECONDS: float = 600
+    AUDIO_BULK_MAX_WAIT_SECONDS: float = 30 * 60
+    AUDIO_FAIR_SHARE_QUANTUM_SECONDS: float = 300
+    AUDIO_QUEUE_STATS_WINDOW_MINUTES: int = 60
+    # Admission control on POST /audio/upload
+    AUDIO_MAX_QUEUED_JOBS: int = 200
+    AUDIO_MAX_PENDING_JOBS_PER_OWNER: int = 50
+    AUDIO_MAX_PENDING_AUDIO_SECONDS: float = 6 * 60 * 60
+    # Uploads are refused while every live worker reports less free memory than this
+    AUDIO_MIN_FREE_MEMORY_MB: int = 512
+    # Audio seconds processed per second, used for ETAs until jobs finished recently
+    AUDIO_DEFAULT_THROUGHPUT: float = 1.0
+    AUDIO_THROUGHPUT_WINDOW_MINUTES: int = 30
+
+    # Nightly re-extraction through the Gemini Batch API
+    GEMINI_API_BASE_URL: str = "https://generativelanguage.googleapis.com"
+    BACKFILL_BATCH_SIZE: int = 500
+    BACKFILL_MAX_PENDING_BATCHES: int = 4
+    BACKFILL_POLL_SECONDS: float = 60
+    BACKFILL_CHECKPOINT_PATH: str = "cache/backfill_checkpoint.json"
     model_config = SettingsConfigDict(
         # Use top level .env file (one level above ./backend/)
         env_file=".env",
@@ -1,5 +1,12 @@
+import time
+import threading
+from collections import deque
+
 from sqlmodel import Session, create_engine, select, text
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app import crud
 from app.core.config import settings
 from app.models import User, UserCreate, Conversation, ConversationCreate, Person, PersonCreate
@@ -7,11 +14,107 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class PoolStatsMixin:
+    """
+    Records how long checkouts of a QueuePool wait for a connection, how
+    often connections beyond ``pool_size`` are opened and how often a
+    checkout timed out. Reported by GET /utils/db-pool/.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._waits = deque(maxlen=1000)
+        self._checkouts = 0
+        self._overflow_connections = 0
+        self._timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        overflow = self.overflow()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        with self._stats_lock:
+            self._waits.append(time.perf_counter() - start)
+            self._checkouts += 1
+            if self.overflow() > overflow and self.overflow() > 0:
+                self._overflow_connections += 1
+        return connection
+
+    def recreate(self):
+        # Keeps the statistics when the pool is replaced, e.g. by engine.dispose()
+        pool = super().recreate()
+        pool._stats_lock = self._stats_lock
+        pool._waits = self._waits
+        pool._checkouts = self._checkouts
+        pool._overflow_connections = self._overflow_connections
+        pool._timeouts = self._timeouts
+        return pool
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            checkouts = self._checkouts
+            overflow_connections = self._overflow_connections
+            timeouts = self._timeouts
+
+        def percentile(q):
+            return round(waits[min(int(q * len(waits)), len(waits) - 1)] * 1000, 3) if waits else None
+
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": checkouts,
+            "overflow_connections": overflow_connections,
+            "timeouts": timeouts,
+            "wait_p50_ms": percentile(0.5),
+            "wait_p95_ms": percentile(0.95),
+            "wait_max_ms": round(waits[-1] * 1000, 3) if waits else None,
+        }
+
+
+class InstrumentedQueuePool(PoolStatsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(PoolStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options() -> dict:
+    """Engine keyword arguments from the DB_* settings."""
+    options = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": True,  # Checks connection health before use
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
 # Create the database engine
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
-    pool_pre_ping=True,  # Checks connection health before use
-    echo=True,  # Log SQL queries (disable in production)
+    poolclass=InstrumentedQueuePool,
+    **engine_options(),
+)
+# Same database through psycopg's async driver, for the async routes (AsyncSessionDep);
+# it has a pool of its own with the same limits
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    **engine_options(),
 )
 def check_db_connection():
     """Test if the database is reachable."""
@@ -30,27 +133,23 @@ def check_db_connection():
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
 
 
-def init_db(session: Session) -> None:
-    logger.info("Entered init_db() function")
-    # Tables should be created with Alembic migrations
-    # But if you don't want to use migrations, create
-    # the tables un-commenting the next lines
+def init_db(session: Session, create_tables: bool = True) -> None:
+    """
+    Creates the first superuser if it is missing.
+
+    With ``create_tables`` missing tables are created from the models first,
+    for databases that were not set up with Alembic.
+    """
     from sqlmodel import SQLModel
-    logger.info("Connection status: %s", check_db_connection())
-    if check_db_connection():
+
+    if create_tables:
         logger.info("Creating database tables if they do not exist...")
         SQLModel.metadata.create_all(engine)
-        logger.info("Database tables initialized (if missing)")
-        user = session.exec(
-        select(User).where(User.email == settings.FIRST_SUPERUSER)).first()
-        if not user:
-            user_in = UserCreate(
-                email=settings.FIRST_SUPERUSER,
-                password=settings.FIRST_SUPERUSER_PASSWORD,
-                is_superuser=True,
-            )
-            user = crud.create_user(session=session, user_create=user_in)
-    else:
-        logger.error("Could not connect to the database. Skipping table creation.")
-
-    
+    user = session.exec(select(User).where(User.email == settings.FIRST_SUPERUSER)).first()
+    if not user:
+        user_in = UserCreate(
+            email=settings.FIRST_SUPERUSER,
+            password=settings.FIRST_SUPERUSER_PASSWORD,
+            is_superuser=True,
+        )
+        user = crud.create_user(session=session, user_create=user_in)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from sqlalchemy import inspect
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import check_db_connection, engine, init_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class Readiness:
+    """
+    State of the startup checks, for GET /utils/health/live and /utils/health/ready.
+
+    The app is ready once every check finished and all required ones passed.
+    A failed required check leaves the process not live either, so it gets
+    restarted. A failed optional check (a warm-up) is only reported.
+    """
+
+    def __init__(self):
+        self.checks: dict[str, dict] = {}
+        self.required: set[str] = set()
+
+    def reset(self) -> None:
+        self.checks.clear()
+        self.required.clear()
+
+    def add(self, name: str, required: bool = True) -> None:
+        self.checks[name] = {"status": "pending", "seconds": None, "error": None}
+        if required:
+            self.required.add(name)
+
+    def finish(self, name: str, seconds: float, error: str | None = None) -> None:
+        self.checks[name] = {
+            "status": "failed" if error else "ok",
+            "seconds": round(seconds, 3),
+            "error": error,
+        }
+
+    @property
+    def live(self) -> bool:
+        return not any(
+            self.checks[name]["status"] == "failed" for name in self.required
+        )
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.checks) and all(
+            check["status"] == "ok"
+            or (check["status"] == "failed" and name not in self.required)
+            for name, check in self.checks.items()
+        )
+
+
+readiness = Readiness()
+
+
+async def wait_for_db() -> None:
+    """
+    Waits until the database accepts connections.
+
+    Attempts run in a thread, so the event loop keeps serving (e.g. liveness
+    probes); the delay between them doubles up to STARTUP_DB_RETRY_MAX_SECONDS.
+
+    Raises:
+        RuntimeError: If the database is not reachable within STARTUP_DB_TIMEOUT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.STARTUP_DB_TIMEOUT_SECONDS
+    delay = settings.STARTUP_DB_RETRY_SECONDS
+    attempt = 1
+    while not await asyncio.to_thread(check_db_connection):
+        if time.monotonic() + delay > deadline:
+            raise RuntimeError(f"Database not reachable after {attempt} attempts.")
+        logger.warning(
+            f"DB not ready yet (attempt {attempt}), retrying in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.STARTUP_DB_RETRY_MAX_SECONDS)
+        attempt += 1
+
+
+def migrations_pending() -> bool:
+    """Whether the database is behind the Alembic head, or its revision cannot be determined."""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    if not ALEMBIC_INI.is_file():
+        return True
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option(
+        "script_location", str(ALEMBIC_INI.parent / "app" / "alembic")
+    )
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current != heads
+
+
+def alembic_managed() -> bool:
+    """Whether the database schema is managed by Alembic (has an alembic_version table)."""
+    with engine.connect() as connection:
+        return inspect(connection).has_table("alembic_version")
+
+
+def prepare_db() -> None:
+    """
+    Creates the first superuser, after the tables of a database that is not
+    managed by Alembic.
+
+    Raises:
+        RuntimeError: If Alembic migrations are pending. They are left to
+            ``alembic upgrade head``, which create_all would break.
+    """
+    managed = alembic_managed()
+    if managed and migrations_pending():
+        logger.error("Database migrations are pending, run 'alembic upgrade head'")
+        raise RuntimeError("Database migrations are pending.")
+    with Session(engine) as session:
+        init_db(session, create_tables=not managed)
+
+
+def warm_llm() -> None:
+    """Imports the LLM chains and creates the shared client, cache and scheduler."""
+    from app.audio_processing import sum_chain  # noqa: F401
+    from app.audio_processing.llm_cache import get_llm_cache
+    from app.audio_processing.llm_client import get_llm
+    from app.audio_processing.llm_scheduler import get_llm_scheduler
+
+    get_llm()
+    get_llm_cache()
+    get_llm_scheduler()
+
+
+async def _check(name: str, check) -> bool:
+    start = time.perf_counter()
+    try:
+        await check()
+    except Exception as e:
+        logger.exception(f"Startup check '{name}' failed")
+        readiness.finish(
+            name, time.perf_counter() - start, error=str(e) or type(e).__name__
+        )
+        return False
+    readiness.finish(name, time.perf_counter() - start)
+    logger.info(f"Startup check '{name}' passed in {time.perf_counter() - start:.2f}s")
+    return True
+
+
+async def _database() -> None:
+    if await _check("database", wait_for_db):
+        await _check("schema", lambda: asyncio.to_thread(prepare_db))
+
+
+async def start() -> None:
+    """
+    Runs the startup checks: database readiness, then the schema, and the LLM
+    warm-up in parallel to both.
+    """
+    readiness.reset()
+    readiness.add("database")
+    readiness.add("schema")
+    tasks = [_database()]
+    if settings.STARTUP_WARM_LLM:
+        readiness.add("llm", required=False)
+        tasks.append(_check("llm", lambda: asyncio.to_thread(warm_llm)))
+    await asyncio.gather(*tasks)
+    if readiness.ready:
+        logger.info("Application ready")
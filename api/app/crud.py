@@ -1,14 +1,18 @@
 import uuid
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy import Text, cast
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, select, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from fastapi import HTTPException
 
 from app.core.security import get_password_hash, verify_password
 from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
-from app.models import Conversation, ConversationCreate, ConversationUpdate
-from app.models import Person, PersonCreate, PersonUpdate
+from app.models import Conversation, ConversationCreate, ConversationUpdate, SEARCH_CONFIG
+from app.models import Person, PersonCreate, PersonUpdate, TopicCount, TopicCountPublic
 
 
 
@@ -73,6 +77,20 @@ def create_conversation_db(*, session: Session, conversation_in: ConversationCre
     session.refresh(db_conversation)
     return db_conversation
 
+
+def _apply_conversation_update(conversation: Conversation, conversation_in: ConversationUpdate) -> None:
+    update_dict = conversation_in.model_dump(exclude_unset=True)
+    # A changed transcript invalidates the cached follow-up email
+    if (
+        "transcript" in update_dict
+        and update_dict["transcript"] != conversation.transcript
+        and "follow_up_text" not in update_dict
+    ):
+        update_dict["follow_up_text"] = None
+        conversation.follow_up_interests = None
+    conversation.sqlmodel_update(update_dict)
+
+
 def update_conversation_db(
     *, session: Session,
     owner_id: uuid.UUID,
@@ -88,8 +106,7 @@ def update_conversation_db(
         raise HTTPException(status_code=404, detail="conversation not found")
     if not is_superuser and (conversation.owner_id != owner_id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    update_dict = conversation_in.model_dump(exclude_unset=True)
-    conversation.sqlmodel_update(update_dict)
+    _apply_conversation_update(conversation, conversation_in)
      # Handle persons if person_ids are provided
     if conversation_in.person_ids is not None:
         if conversation_in.person_ids:
@@ -106,6 +123,144 @@ def update_conversation_db(
     session.refresh(conversation)
     return conversation
 
+
+def _persons_from_result(result: Any, owner_id: uuid.UUID) -> list[Person]:
+    return [
+        Person(
+            owner_id=owner_id,
+            name=person.name,
+            person_description=person.person_description,
+            key_topics=person.key_topics,
+        )
+        for person in result.persons
+    ]
+
+
+def new_processed_conversation(
+    *,
+    owner_id: uuid.UUID,
+    transcript: str,
+    result: Any,
+    day: str | None = None,
+    event: str | None = None,
+) -> Conversation:
+    """
+    Build (but do not add) a conversation and its persons from a pipeline result.
+    """
+    conversation = Conversation(
+        owner_id=owner_id,
+        day=day,
+        event=event,
+        transcript=transcript,
+        summary=result.summary,
+        key_topics=result.key_topics,
+    )
+    conversation.persons = _persons_from_result(result, owner_id)
+    return conversation
+
+
+def create_processed_conversation_db(
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    transcript: str,
+    result: Any,
+    day: str | None = None,
+    event: str | None = None,
+) -> Conversation:
+    """
+    Store a processed conversation and its extracted persons in one transaction.
+    """
+    conversation = new_processed_conversation(
+        owner_id=owner_id, transcript=transcript, result=result, day=day, event=event
+    )
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    return conversation
+
+
+def _replace_extraction(session: Session, conversation: Conversation, result: Any) -> None:
+    conversation.summary = result.summary
+    conversation.key_topics = result.key_topics
+    # Persons found again are updated in place (by name), so their ids and links survive
+    old_persons = {person.name.strip().lower(): person for person in conversation.persons}
+    persons = []
+    for person in _persons_from_result(result, conversation.owner_id):
+        existing = old_persons.pop(person.name.strip().lower(), None)
+        if existing is None:
+            persons.append(person)
+            continue
+        existing.person_description = person.person_description
+        existing.key_topics = person.key_topics
+        persons.append(existing)
+    conversation.persons = persons
+    session.flush()
+    for person in old_persons.values():
+        if not person.conversations:
+            session.delete(person)
+    session.add(conversation)
+
+
+def apply_reprocessed_conversation_db(
+    *,
+    session: Session,
+    conversation: Conversation,
+    result: Any = None,
+    follow_up_text: str | None = None,
+    interests: list[str] | None = None,
+) -> Conversation:
+    """
+    Store the re-run LLM stages of a conversation in one transaction.
+
+    A new extraction replaces the summary, key topics and persons. Persons
+    extracted again keep their row and are updated; persons no longer extracted
+    are unlinked, and deleted if they are not part of any other conversation.
+    """
+    if result is not None:
+        _replace_extraction(session, conversation, result)
+    if follow_up_text:
+        conversation.follow_up_text = follow_up_text
+        conversation.follow_up_interests = interests
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    return conversation
+
+
+def apply_extractions_db(*, session: Session, results: dict[uuid.UUID, Any]) -> int:
+    """
+    Store new extractions for many conversations in one transaction.
+
+    Returns the number of conversations updated.
+    """
+    if not results:
+        return 0
+    conversations = session.exec(
+        select(Conversation)
+        .where(Conversation.id.in_(list(results)))
+        .options(selectinload(Conversation.persons))
+    ).all()
+    for conversation in conversations:
+        _replace_extraction(session, conversation, results[conversation.id])
+    session.commit()
+    return len(conversations)
+
+
+def save_conversation_follow_up(
+    *, session: Session, conversation: Conversation, follow_up_text: str, interests: list[str]
+) -> Conversation:
+    """
+    Cache a generated follow-up email on the conversation.
+    """
+    conversation.follow_up_text = follow_up_text
+    conversation.follow_up_interests = interests
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    return conversation
+
+
 def create_person_db(*, session: Session, person_in: PersonCreate, owner_id: uuid.UUID) -> Person:
      
     person = Person.model_validate(person_in, update={"owner_id": owner_id})
@@ -122,6 +277,7 @@ def create_person_db(*, session: Session, person_in: PersonCreate, owner_id: uui
     session.refresh(person)
     return person
 
+
 def update_person_db(
     *,
     session: Session,
@@ -154,4 +310,175 @@ def update_person_db(
     session.add(person)
     session.commit()
     session.refresh(person)
-    return person
\ No newline at end of file
+    return person
+
+
+# Async versions for the routes on AsyncSessionDep. Relationships are never
+# lazy loaded outside of the session's own calls, so collections that get
+# replaced are loaded up front.
+
+
+async def acreate_conversation_db(
+    *, session: AsyncSession, conversation_in: ConversationCreate, owner_id: uuid.UUID
+) -> Conversation:
+    db_conversation = Conversation.model_validate(conversation_in, update={"owner_id": owner_id})
+    if conversation_in.person_ids:
+        persons = await session.exec(select(Person).where(Person.id.in_(conversation_in.person_ids)))
+        db_conversation.persons = persons.all()
+
+    session.add(db_conversation)
+    await session.commit()
+    await session.refresh(db_conversation)
+    return db_conversation
+
+
+async def aupdate_conversation_db(
+    *, session: AsyncSession,
+    owner_id: uuid.UUID,
+    is_superuser: bool,
+    id: uuid.UUID,
+    conversation_in: ConversationUpdate,
+) -> Conversation:
+    conversation = await session.get(Conversation, id, options=[selectinload(Conversation.persons)])
+    if not conversation:
+        raise HTTPException(status_code=404, detail="conversation not found")
+    if not is_superuser and (conversation.owner_id != owner_id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    _apply_conversation_update(conversation, conversation_in)
+    if conversation_in.person_ids is not None:
+        if conversation_in.person_ids:
+            persons = await session.exec(select(Person).where(Person.id.in_(conversation_in.person_ids)))
+            conversation.persons = persons.all()
+        else:
+            conversation.persons = []
+
+    session.add(conversation)
+    await session.commit()
+    await session.refresh(conversation)
+    return conversation
+
+
+def key_topics_filter(model: Any, topics: list[str], match: str = "any") -> Any:
+    """
+    Condition on ``model.key_topics`` having any / all of ``topics``.
+
+    Both forms (?| and @>) can use the GIN index on key_topics.
+    """
+    if match == "all":
+        return model.key_topics.contains(topics)
+    return model.key_topics.has_any(cast(topics, ARRAY(Text)))
+
+
+async def atopic_counts_db(
+    *, session: AsyncSession, owner_id: uuid.UUID | None, kind: str, limit: int
+) -> list[TopicCountPublic]:
+    """
+    The ``limit`` most frequent key topics of an owner's conversations or
+    persons, or of everybody's if ``owner_id`` is None.
+    """
+    total = func.sum(TopicCount.count)
+    statement = select(TopicCount.topic, total).where(TopicCount.kind == kind)
+    if owner_id is not None:
+        statement = statement.where(TopicCount.owner_id == owner_id)
+    statement = statement.group_by(TopicCount.topic).order_by(total.desc(), TopicCount.topic).limit(limit)
+    rows = (await session.exec(statement)).all()
+    return [TopicCountPublic(topic=topic, count=count) for topic, count in rows]
+
+
+# ts_headline options for search snippets: up to two fragments of a few words
+SEARCH_HEADLINE = "MaxFragments=2, MaxWords=20, MinWords=8, FragmentDelimiter= … "
+
+
+async def asearch_conversations_db(
+    *,
+    session: AsyncSession,
+    q: str,
+    owner_id: uuid.UUID | None,
+    after: tuple[float, uuid.UUID] | None,
+    limit: int,
+) -> list[Any]:
+    """
+    Conversations matching the web-search style query ``q``, best match first.
+
+    Matches are found through the GIN index on search_vector and ranked; only
+    the returned page gets snippets, as ts_headline re-parses the text.
+
+    Args:
+        owner_id (uuid.UUID, optional): Only search this owner's conversations.
+        after (tuple, optional): (rank, id) of the last row of the previous page.
+        limit (int): Rows to return.
+
+    Returns:
+        list: Rows with the ConversationSearchResult fields.
+    """
+    vector = Conversation.__table__.c.search_vector
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(vector, query)
+    matches = select(Conversation.id, rank.label("rank")).where(vector.bool_op("@@")(query))
+    if owner_id is not None:
+        matches = matches.where(Conversation.owner_id == owner_id)
+    if after is not None:
+        matches = matches.where(tuple_(rank, Conversation.id) < tuple_(*after))
+    matches = matches.order_by(rank.desc(), Conversation.id.desc()).limit(limit).subquery()
+
+    document = func.concat_ws(" … ", Conversation.summary, Conversation.transcript)
+    statement = (
+        select(
+            Conversation.id,
+            Conversation.owner_id,
+            Conversation.day,
+            Conversation.event,
+            Conversation.summary,
+            Conversation.key_topics,
+            matches.c.rank,
+            func.ts_headline(SEARCH_CONFIG, document, query, SEARCH_HEADLINE).label("snippet"),
+        )
+        .join(matches, Conversation.id == matches.c.id)
+        .order_by(matches.c.rank.desc(), Conversation.id.desc())
+    )
+    return (await session.execute(statement)).all()
+
+
+async def acreate_person_db(
+    *, session: AsyncSession, person_in: PersonCreate, owner_id: uuid.UUID
+) -> Person:
+    person = Person.model_validate(person_in, update={"owner_id": owner_id})
+    if person_in.conversation_ids:
+        conversations = await session.exec(
+            select(Conversation).where(Conversation.id.in_(person_in.conversation_ids))
+        )
+        person.conversations = conversations.all()
+
+    session.add(person)
+    await session.commit()
+    await session.refresh(person)
+    return person
+
+
+async def aupdate_person_db(
+    *,
+    session: AsyncSession,
+    owner_id: uuid.UUID,
+    is_superuser: bool,
+    id: uuid.UUID,
+    person_in: PersonUpdate,
+) -> Person:
+    person = await session.get(Person, id, options=[selectinload(Person.conversations)])
+    if not person:
+        raise HTTPException(status_code=404, detail="person not found")
+    if not is_superuser and (person.owner_id != owner_id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    person.sqlmodel_update(person_in.model_dump(exclude_unset=True))
+    if person_in.conversation_ids is not None:
+        if person_in.conversation_ids:
+            conversations = await session.exec(
+                select(Conversation).where(Conversation.id.in_(person_in.conversation_ids))
+            )
+            person.conversations = conversations.all()
+        else:
+            person.conversations = []
+
+    session.add(person)
+    await session.commit()
+    await session.refresh(person)
+    return person
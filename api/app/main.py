@@ -1,18 +1,17 @@
+import asyncio
 import sentry_sdk
 import logging
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
-from sqlmodel import Session
-import time
-from sqlalchemy.exc import OperationalError
+from contextlib import asynccontextmanager, suppress
 
 
 
 from app.api.main import api_router
 from app.core.config import settings
-from app.core.db import engine, init_db
+from app.core.db import async_engine, engine
+from app.core.startup import start
 
 
 from fastapi import Request
@@ -26,23 +25,15 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    max_retries = 10
-    delay = 2
-    for attempt in range(max_retries):
-        try:
-            with Session(engine) as session:
-                logger.info("Trying to initialize DB (attempt %d)...", attempt + 1)
-                init_db(session)
-                logger.info("DB initialized successfully.")
-                break
-        except OperationalError as e:
-            logger.warning("DB not ready yet (attempt %d): %s", attempt + 1, e)
-            time.sleep(delay)
-    else:
-        logger.error("DB could not be reached after %d attempts.", max_retries)
-        raise RuntimeError("Database connection failed during startup.")
+    # Startup checks run in the background, so the server answers liveness
+    # probes right away; GET /utils/health/ready reports when they are done
+    startup = asyncio.create_task(start())
     yield
+    startup.cancel()
+    with suppress(asyncio.CancelledError):
+        await startup
     engine.dispose()
+    await async_engine.dispose()
     logger.info("Database connections closed")
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
@@ -1,10 +1,15 @@
 import uuid
+from datetime import datetime, timezone
 
 from pydantic import EmailStr
 from sqlmodel import Field, Relationship, SQLModel
-from typing import List, Optional, TYPE_CHECKING
-from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import JSONB
+from typing import List, Literal, Optional, TYPE_CHECKING
+from sqlalchemy import DDL, Column, Computed, DateTime, Index, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 # Shared properties
@@ -44,8 +49,14 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Listings are paginated by (created_at, id), see app/api/pagination.py
+    created_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
     
     items: "Item" = Relationship(
         back_populates="owner",
@@ -64,7 +75,9 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    # Left out unless requested, see app/api/pagination.py
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -108,10 +121,20 @@ class ItemsPublic(SQLModel):
 #Conversations 
 
 class Participation(SQLModel, table=True):
+    # The primary key covers lookups by person, this one those by conversation
+    __table_args__ = (Index("ix_participation_conversation_id", "conversation_id"),)
+
     person_id: uuid.UUID = Field(foreign_key="person.id", primary_key=True)
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id", primary_key=True)
 
 class Conversation(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_conversation_created_at_id", "created_at", "id"),
+        # Owner-scoped listings: the filter and the keyset order in one index
+        Index("ix_conversation_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_conversation_key_topics", "key_topics", postgresql_using="gin"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
@@ -124,6 +147,12 @@ class Conversation(SQLModel, table=True):
     key_topics: Optional[List[str]] = Field(default=None,sa_column=Column(JSONB))    
     persons: List["Person"] = Relationship(back_populates="conversations", link_model=Participation)
     follow_up_text: str | None = Field(default=None)
+    # Interests the cached follow_up_text was generated for (None means the defaults)
+    follow_up_interests: list[str] | None = Field(default=None, sa_column=Column(JSONB))
+    # Listings are paginated by (created_at, id), see app/api/pagination.py
+    created_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
 
 # Properties to receive on item creation
 class ConversationCreate(SQLModel):
@@ -151,10 +180,78 @@ class ConversationPublic(SQLModel):
 
 class ConversationsPublic(SQLModel):
     data: list[ConversationPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+# Full-text search over the summary, key topics and transcript, weighted in
+# that order. Generated by Postgres and not mapped, so loading a
+# conversation does not load it; see asearch_conversations_db
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(summary, '')), 'A') || "
+    f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}', coalesce(key_topics, '[]'), '[\"string\"]'), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(transcript, '')), 'C')"
+)
+Conversation.__table__.append_column(
+    Column("search_vector", TSVECTOR, Computed(SEARCH_VECTOR, persisted=True))
+)
+Index("ix_conversation_search_vector", Conversation.__table__.c.search_vector, postgresql_using="gin")
+
+
+class ConversationSearchResult(SQLModel):
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    day: str | None
+    event: str | None
+    summary: str | None
+    key_topics: list[str] | None
+    rank: float
+    # Matching fragments of the summary and transcript, matches within <b></b>
+    snippet: str
+
+
+class ConversationSearchResults(SQLModel):
+    data: list[ConversationSearchResult]
+    next_cursor: str | None = None
+
+
+class ConversationFollowUp(SQLModel):
+    conversation_id: uuid.UUID
+    follow_up_text: str
+    interests: list[str]
+    cached: bool
+
+
+# Re-run LLM stages on the stored transcript
+class ConversationReprocess(SQLModel):
+    stages: list[Literal["extract", "follow_up"]] = Field(default=["extract"], min_length=1)
+    interests: list[str] | None = None
+    use_cache: bool = False  # a re-summarize usually wants a fresh answer
+
+
+class ConversationsReprocess(ConversationReprocess):
+    ids: list[uuid.UUID] = Field(min_length=1, max_length=1000)
+
+
+class ConversationReprocessed(SQLModel):
+    conversation_id: uuid.UUID
+    stages: list[str]
+    person_ids: list[uuid.UUID]
+
+
+class ConversationsReprocessed(SQLModel):
+    data: list[ConversationReprocessed]
+    failed: list[uuid.UUID]
 
 
 class Person(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_person_created_at_id", "created_at", "id"),
+        Index("ix_person_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_person_key_topics", "key_topics", postgresql_using="gin"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
@@ -168,6 +265,10 @@ class Person(SQLModel, table=True):
         sa_column=Column(JSONB)  # use JSON for SQLite or other DBs
     )
     conversations: List["Conversation"] =  Relationship(back_populates="persons", link_model=Participation)
+    # Listings are paginated by (created_at, id), see app/api/pagination.py
+    created_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
 
 
 # Properties to receive on item creation
@@ -194,6 +295,229 @@ class PersonPublic(SQLModel):
 
 class PersonsPublic(SQLModel):
     data: list[PersonPublic]
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+# Topic facets: how many of an owner's conversations / persons have each key
+# topic. Kept up to date by a trigger on both tables, so the counts change in
+# the same transaction as the rows and no write path can miss them
+
+class TopicCount(SQLModel, table=True):
+    __tablename__ = "topic_count"
+
+    owner_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    kind: str = Field(primary_key=True, max_length=20)  # "conversation" or "person"
+    topic: str = Field(primary_key=True)
+    count: int
+
+
+class TopicCountPublic(SQLModel):
+    topic: str
+    count: int
+
+
+class TopicCountsPublic(SQLModel):
+    data: list[TopicCountPublic]
+
+
+TOPIC_COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION topic_count_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND jsonb_typeof(OLD.key_topics) = 'array' THEN
+        UPDATE topic_count SET count = count - 1
+        WHERE owner_id = OLD.owner_id AND kind = TG_TABLE_NAME
+            AND topic IN (SELECT jsonb_array_elements_text(OLD.key_topics));
+        DELETE FROM topic_count
+        WHERE owner_id = OLD.owner_id AND kind = TG_TABLE_NAME AND count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND jsonb_typeof(NEW.key_topics) = 'array' THEN
+        INSERT INTO topic_count (owner_id, kind, topic, count)
+        SELECT DISTINCT NEW.owner_id, TG_TABLE_NAME, topic, 1
+        FROM jsonb_array_elements_text(NEW.key_topics) AS topic
+        ORDER BY topic
+        ON CONFLICT (owner_id, kind, topic) DO UPDATE SET count = topic_count.count + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TOPIC_COUNT_TRIGGER = """
+CREATE TRIGGER {table}_topic_count
+AFTER INSERT OR DELETE OR UPDATE OF key_topics, owner_id ON {table}
+FOR EACH ROW EXECUTE FUNCTION topic_count_update()
+"""
+
+# Counts of the rows written before the trigger existed
+TOPIC_COUNT_BACKFILL = """
+INSERT INTO topic_count (owner_id, kind, topic, count)
+SELECT owner_id, '{table}', topic, count(*)
+FROM {table}, LATERAL (SELECT DISTINCT jsonb_array_elements_text(key_topics) AS topic) AS topics
+WHERE jsonb_typeof(key_topics) = 'array'
+GROUP BY owner_id, topic
+"""
+
+# For databases created from the models (init_db); Alembic databases get
+# these in migration 0b7f3c9a5e62. create_all() may run on existing tables,
+# so the counts are rebuilt from scratch every time
+event.listen(SQLModel.metadata, "after_create", DDL(TOPIC_COUNT_FUNCTION).execute_if(dialect="postgresql"))
+for _table in ("conversation", "person"):
+    event.listen(
+        SQLModel.metadata,
+        "after_create",
+        DDL(f"DROP TRIGGER IF EXISTS {_table}_topic_count ON {_table}").execute_if(dialect="postgresql"),
+    )
+    event.listen(
+        SQLModel.metadata,
+        "after_create",
+        DDL(f"DELETE FROM topic_count WHERE kind = '{_table}'").execute_if(dialect="postgresql"),
+    )
+    event.listen(
+        SQLModel.metadata,
+        "after_create",
+        DDL(TOPIC_COUNT_BACKFILL.format(table=_table)).execute_if(dialect="postgresql"),
+    )
+    event.listen(
+        SQLModel.metadata,
+        "after_create",
+        DDL(TOPIC_COUNT_TRIGGER.format(table=_table)).execute_if(dialect="postgresql"),
+    )
+
+
+# Audio processing jobs, claimed by the workers in app/audio_processing/worker.py
+
+class AudioJob(SQLModel, table=True):
+    __tablename__ = "audio_job"
+    __table_args__ = (
+        # Oldest queued job per owner and lane, see job_queue.claim_job()
+        Index("ix_audio_job_queue", "status", "lane", "owner_id", "created_at"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    owner_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
+    # queued -> running -> done | failed | cancelled; a stuck running job goes back to queued
+    status: str = Field(default="queued", max_length=20, index=True)
+    filename: str = Field(max_length=255)
+    file_path: str = Field(max_length=1024)
+    lane: str = Field(default="interactive", max_length=20)
+    # Estimated length of the recording, the cost of the job for fair sharing
+    audio_seconds: float = 0
+    attempts: int = 0
+    # Set by DELETE /audio/jobs/{id} on a running job, the worker stops it
+    cancel_requested: bool = False
+    worker_id: str | None = Field(default=None, max_length=255)
+    error: str | None = Field(default=None)
+    # Per-stage cache keys and timings of the pipeline run
+    stages: dict | None = Field(default=None, sa_column=Column(JSONB))
+    conversation_id: uuid.UUID | None = Field(
+        default=None, foreign_key="conversation.id", ondelete="SET NULL"
+    )
+    created_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    started_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    heartbeat_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    finished_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    # A re-queued job is not claimed before this, see job_queue.retry_delay()
+    not_before: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+
+
+class AudioJobPublic(SQLModel):
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    status: str
+    filename: str
+    lane: str
+    audio_seconds: float
+    attempts: int
+    cancel_requested: bool
+    error: str | None
+    stages: dict | None
+    conversation_id: uuid.UUID | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    # Only set on upload: estimated seconds until the job is processed
+    eta_seconds: int | None = None
+
+# Progress of a running job, streamed by GET /audio/jobs/{id}/events
+class AudioJobEvent(SQLModel, table=True):
+    __tablename__ = "audio_job_event"
+
+    id: int | None = Field(default=None, primary_key=True)
+    job_id: uuid.UUID = Field(
+        foreign_key="audio_job.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    type: str = Field(max_length=20)
+    data: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    created_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+
+
+# Deficit round-robin state per lane and owner
+class AudioFairShare(SQLModel, table=True):
+    __tablename__ = "audio_fair_share"
+
+    lane: str = Field(primary_key=True, max_length=20)
+    owner_id: uuid.UUID = Field(
+        foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
+    deficit: float = 0
+    last_served_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+
+
+class AudioLaneStats(SQLModel):
+    lane: str
+    queued: int
+    oldest_queued_seconds: float | None
+    started: int
+    wait_p50_seconds: float | None
+    wait_p95_seconds: float | None
+    wait_max_seconds: float | None
+
+
+class AudioQueueStats(SQLModel):
+    window_minutes: int
+    lanes: list[AudioLaneStats]
+
+
+# Last report of a worker process: memory and the state of its model cache
+class AudioWorker(SQLModel, table=True):
+    __tablename__ = "audio_worker"
+
+    id: str = Field(primary_key=True, max_length=255)
+    jobs: int = 0
+    rss_mb: float | None = None
+    # Memory available on the worker's host, see admission.check_memory()
+    available_mb: float | None = None
+    model_cache: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    # Stats of the worker's LLM response cache and scheduler, see GET /utils/llm-cache/
+    llm: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    started_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    updated_at: datetime = Field(
+        default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+
+
+class AudioWorkerPublic(SQLModel):
+    id: str
+    jobs: int
+    rss_mb: float | None
+    available_mb: float | None
+    model_cache: dict
+    llm: dict
+    started_at: datetime
+    updated_at: datetime
+
+
+class AudioWorkersPublic(SQLModel):
+    data: list[AudioWorkerPublic]
     count: int
 
 
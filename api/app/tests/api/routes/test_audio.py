@@ -0,0 +1,215 @@
+import os
+import uuid
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete
+
+from app import crud
+from app.audio_processing.job_queue import add_job_event, remove_worker, report_worker
+from app.core.config import settings
+from app.models import AudioJob, AudioWorker
+from app.tests.utils.audio_job import create_queued_job
+
+
+def upload(client: TestClient, headers: dict[str, str]):
+    return client.post(
+        f"{settings.API_V1_STR}/audio/upload",
+        headers=headers,
+        files={"file": ("meeting.m4a", b"not really audio", "audio/mp4")},
+    )
+
+
+def test_upload_audio_queues_job(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    response = upload(client, superuser_token_headers)
+    assert response.status_code == 202
+    content = response.json()
+    assert content["status"] == "queued"
+    assert content["filename"] == "meeting.m4a"
+    assert content["eta_seconds"] >= 1
+    job = db.get(AudioJob, uuid.UUID(content["id"]))
+    assert job is not None
+    assert (
+        job.owner_id
+        == crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER).id
+    )
+    with open(job.file_path, "rb") as f:
+        assert f.read() == b"not really audio"
+
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{job.id}", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == str(job.id)
+
+
+def test_read_audio_job_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{uuid.uuid4()}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Job not found"
+
+
+def test_read_audio_job_of_other_owner(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_queued_job(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{job.id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Not enough permissions"
+
+
+def test_upload_audio_rejected_when_queue_is_full(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    uploads_before = set(os.listdir(settings.UPLOAD_DIR))
+    with patch.object(settings, "AUDIO_MAX_QUEUED_JOBS", 0):
+        response = upload(client, normal_user_token_headers)
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    detail = response.json()["detail"]
+    assert detail["eta_seconds"] >= 1
+    assert detail["retry_after_seconds"] == int(response.headers["Retry-After"])
+    # The refused upload is not kept
+    assert set(os.listdir(settings.UPLOAD_DIR)) == uploads_before
+
+
+def test_upload_audio_rejected_when_owner_has_too_many_jobs(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    with patch.object(settings, "AUDIO_MAX_PENDING_JOBS_PER_OWNER", 0):
+        response = upload(client, normal_user_token_headers)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_upload_audio_rejected_when_workers_are_low_on_memory(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    db.execute(delete(AudioWorker))
+    db.commit()
+    report_worker(
+        session=db,
+        worker_id="worker-1",
+        jobs=0,
+        rss_mb=None,
+        model_cache={},
+        available_mb=1.0,
+    )
+    response = upload(client, normal_user_token_headers)
+    remove_worker(session=db, worker_id="worker-1")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+
+
+def test_delete_audio_job(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    job_id = upload(client, normal_user_token_headers).json()["id"]
+    response = client.delete(
+        f"{settings.API_V1_STR}/audio/jobs/{job_id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/audio/jobs/{job_id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+
+    job = db.get(AudioJob, uuid.UUID(job_id))
+    assert job is not None
+    db.refresh(job)
+    job.status = "done"
+    db.add(job)
+    db.commit()
+    response = client.delete(
+        f"{settings.API_V1_STR}/audio/jobs/{job_id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Job is already done"
+
+
+def test_delete_audio_job_of_other_owner(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_queued_job(db)
+    response = client.delete(
+        f"{settings.API_V1_STR}/audio/jobs/{job.id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 403
+    db.refresh(job)
+    assert job.status == "queued"
+
+
+def test_read_audio_job_events(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    job_id = uuid.UUID(upload(client, normal_user_token_headers).json()["id"])
+    first = add_job_event(
+        session=db,
+        job_id=job_id,
+        type="stage",
+        data={"stage": "decode", "status": "started"},
+    )
+    add_job_event(
+        session=db,
+        job_id=job_id,
+        type="segments",
+        data={
+            "window": 0,
+            "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": " Hi"}],
+        },
+    )
+    client.delete(
+        f"{settings.API_V1_STR}/audio/jobs/{job_id}", headers=normal_user_token_headers
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{job_id}/events",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    body = response.text
+    assert "event: stage" in body
+    assert '"text": " Hi"' in body
+    assert 'event: status\ndata: {"status": "cancelled"' in body
+    assert body.rstrip().split("\n\n")[-1].startswith("event: end")
+
+    # Resuming after the first event skips it
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{job_id}/events",
+        headers={**normal_user_token_headers, "Last-Event-ID": str(first.id)},
+    )
+    assert "event: stage" not in response.text
+    assert "event: segments" in response.text
+
+
+def test_read_audio_job_events_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{uuid.uuid4()}/events",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+
+
+def test_read_audio_job_events_of_other_owner(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    job = create_queued_job(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/audio/jobs/{job.id}/events",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 403
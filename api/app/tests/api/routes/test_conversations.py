@@ -0,0 +1,377 @@
+import uuid
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, delete
+
+from app import crud
+from app.audio_processing.sum_chain import Conversation as ConversationResult
+from app.audio_processing.sum_chain import Person as PersonResult
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Conversation, ConversationUpdate, Person, TopicCount
+from app.tests.utils.conversation import create_random_conversation
+
+
+async def fake_draft_follow_up(file_content: str, interests: list[str]) -> str:
+    return f"Follow-up for {file_content} about {', '.join(interests)}"
+
+
+def test_read_follow_up_is_generated_once(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    with patch(
+        "app.audio_processing.sum_chain.adraft_follow_up",
+        side_effect=fake_draft_follow_up,
+    ) as draft:
+        first = client.get(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/follow-up",
+            headers=superuser_token_headers,
+        )
+        second = client.get(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/follow-up",
+            headers=superuser_token_headers,
+        )
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["cached"] is False
+    assert second.json()["cached"] is True
+    assert second.json()["follow_up_text"] == first.json()["follow_up_text"]
+    assert draft.call_count == 1
+
+
+def test_read_follow_up_with_custom_interests(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    with patch(
+        "app.audio_processing.sum_chain.adraft_follow_up",
+        side_effect=fake_draft_follow_up,
+    ):
+        response = client.get(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/follow-up",
+            headers=superuser_token_headers,
+            params={"interests": ["Robotics", "Biology"]},
+        )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["interests"] == ["Robotics", "Biology"]
+    assert content["follow_up_text"].endswith("Robotics, Biology")
+
+
+def test_transcript_change_invalidates_follow_up(db: Session) -> None:
+    conversation = create_random_conversation(db)
+    crud.save_conversation_follow_up(
+        session=db,
+        conversation=conversation,
+        follow_up_text="Hello",
+        interests=["AI"],
+    )
+    updated = crud.update_conversation_db(
+        session=db,
+        owner_id=conversation.owner_id,
+        is_superuser=False,
+        id=conversation.id,
+        conversation_in=ConversationUpdate(transcript="A new transcript"),
+    )
+    assert updated.follow_up_text is None
+    assert updated.follow_up_interests is None
+
+
+def test_read_follow_up_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/conversation/{uuid.uuid4()}/follow-up",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Conversation not found"
+
+
+def fake_result(name: str) -> ConversationResult:
+    return ConversationResult(
+        summary=f"Summary with {name}",
+        key_topics=["Reprocessing"],
+        persons=[
+            PersonResult(
+                name=name,
+                person_description="- Asks questions",
+                key_topics=["Interviews"],
+                role="INTERVIEWER",
+            )
+        ],
+    )
+
+
+def test_reprocess_conversation_replaces_summary_and_persons(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    outputs = [
+        {"result": fake_result("Ada"), "follow_up_text": None},
+        {"result": fake_result("Grace"), "follow_up_text": None},
+    ]
+    with patch(
+        "app.audio_processing.sum_chain.areprocess_transcript", side_effect=outputs
+    ):
+        first = client.post(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/reprocess",
+            headers=superuser_token_headers,
+            json={"stages": ["extract"]},
+        )
+        second = client.post(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/reprocess",
+            headers=superuser_token_headers,
+            json={"stages": ["extract"]},
+        )
+    assert first.status_code == 200
+    assert second.status_code == 200
+    db.expire_all()
+    stored = db.get(Conversation, conversation.id)
+    assert stored
+    assert stored.summary == "Summary with Grace"
+    assert [person.name for person in stored.persons] == ["Grace"]
+    assert [str(person.id) for person in stored.persons] == second.json()["person_ids"]
+
+
+def test_reprocess_conversation_keeps_persons_found_again(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    outputs = [
+        {"result": fake_result("Ada"), "follow_up_text": None},
+        {"result": fake_result("Ada"), "follow_up_text": None},
+    ]
+    with patch(
+        "app.audio_processing.sum_chain.areprocess_transcript", side_effect=outputs
+    ):
+        first = client.post(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/reprocess",
+            headers=superuser_token_headers,
+            json={"stages": ["extract"]},
+        )
+        person = db.get(Person, uuid.UUID(first.json()["person_ids"][0]))
+        assert person
+        person.links = ["https://example.com/ada"]
+        db.add(person)
+        db.commit()
+        second = client.post(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/reprocess",
+            headers=superuser_token_headers,
+            json={"stages": ["extract"]},
+        )
+    assert second.status_code == 200
+    assert second.json()["person_ids"] == first.json()["person_ids"]
+    db.expire_all()
+    stored = db.get(Person, person.id)
+    assert stored
+    assert stored.links == ["https://example.com/ada"]
+
+
+def test_reprocess_conversation_follow_up_failure(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    crud.save_conversation_follow_up(
+        session=db, conversation=conversation, follow_up_text="Hello", interests=["AI"]
+    )
+    with patch(
+        "app.audio_processing.sum_chain.areprocess_transcript",
+        return_value={"result": None, "follow_up_text": ""},
+    ):
+        response = client.post(
+            f"{settings.API_V1_STR}/conversation/{conversation.id}/reprocess",
+            headers=superuser_token_headers,
+            json={"stages": ["follow_up"]},
+        )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "60"
+    db.expire_all()
+    stored = db.get(Conversation, conversation.id)
+    assert stored
+    assert stored.follow_up_text == "Hello"
+
+
+def test_reprocess_conversations_reports_failures(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    missing_id = uuid.uuid4()
+
+    async def fake_reprocess(
+        transcripts: dict[uuid.UUID, str], concurrency: int, **_: object
+    ) -> dict[uuid.UUID, dict[str, object]]:
+        assert concurrency == settings.REPROCESS_CONCURRENCY
+        return {
+            id: {"result": fake_result("Ada"), "follow_up_text": None}
+            for id in transcripts
+        }
+
+    with patch(
+        "app.audio_processing.sum_chain.areprocess_transcripts",
+        side_effect=fake_reprocess,
+    ):
+        response = client.post(
+            f"{settings.API_V1_STR}/conversation/reprocess",
+            headers=superuser_token_headers,
+            json={"ids": [str(conversation.id), str(missing_id)]},
+        )
+    assert response.status_code == 200
+    content = response.json()
+    assert [item["conversation_id"] for item in content["data"]] == [
+        str(conversation.id)
+    ]
+    assert content["failed"] == [str(missing_id)]
+
+
+def test_search_conversations(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    word = f"zyx{uuid.uuid4().hex[:8]}"
+    ids = []
+    for transcript, summary in [
+        (f"We talked about the {word} budget.", "Planning meeting"),
+        ("Nothing related.", f"Decisions on {word} and {word} hiring"),
+        ("Unrelated small talk.", "Coffee"),
+    ]:
+        response = client.post(
+            f"{settings.API_V1_STR}/conversation/",
+            headers=normal_user_token_headers,
+            json={"transcript": transcript, "summary": summary},
+        )
+        ids.append(response.json()["id"])
+
+    response = client.get(
+        f"{settings.API_V1_STR}/conversation/search",
+        headers=normal_user_token_headers,
+        params={"q": word, "limit": 1},
+    )
+    assert response.status_code == 200
+    first = response.json()
+    # Summary matches rank above transcript matches
+    assert [result["id"] for result in first["data"]] == [ids[1]]
+    assert f"<b>{word}</b>" in first["data"][0]["snippet"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/conversation/search",
+        headers=normal_user_token_headers,
+        params={"q": word, "limit": 1, "cursor": first["next_cursor"]},
+    )
+    second = response.json()
+    assert [result["id"] for result in second["data"]] == [ids[0]]
+    assert second["next_cursor"] is None
+
+
+def test_search_conversations_is_owner_scoped(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    word = f"zyx{uuid.uuid4().hex[:8]}"
+    client.post(
+        f"{settings.API_V1_STR}/conversation/",
+        headers=superuser_token_headers,
+        json={"transcript": f"Only the admin said {word}."},
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/conversation/search",
+        headers=normal_user_token_headers,
+        params={"q": word},
+    )
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+
+
+def test_read_conversations_by_topics(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    a, b = (f"topic-{uuid.uuid4().hex[:8]}" for _ in range(2))
+    ids = []
+    for key_topics in ([a], [a, b], [b]):
+        response = client.post(
+            f"{settings.API_V1_STR}/conversation/",
+            headers=normal_user_token_headers,
+            json={"key_topics": key_topics},
+        )
+        ids.append(response.json()["id"])
+
+    def listed(**params) -> set[str]:
+        response = client.get(
+            f"{settings.API_V1_STR}/conversation/",
+            headers=normal_user_token_headers,
+            params={"topics": [a, b], **params},
+        )
+        assert response.status_code == 200
+        return {conversation["id"] for conversation in response.json()["data"]}
+
+    assert listed() == set(ids)
+    assert listed(match="all") == {ids[1]}
+
+
+def test_topic_counts_follow_writes(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    a, b = (f"topic-{uuid.uuid4().hex[:8]}" for _ in range(2))
+
+    def counts() -> dict[str, int]:
+        response = client.get(
+            f"{settings.API_V1_STR}/conversation/topics",
+            headers=normal_user_token_headers,
+            params={"limit": 1000},
+        )
+        assert response.status_code == 200
+        return {
+            facet["topic"]: facet["count"]
+            for facet in response.json()["data"]
+            if facet["topic"] in (a, b)
+        }
+
+    first = client.post(
+        f"{settings.API_V1_STR}/conversation/",
+        headers=normal_user_token_headers,
+        json={"key_topics": [a, a, b]},
+    ).json()["id"]
+    client.post(
+        f"{settings.API_V1_STR}/conversation/",
+        headers=normal_user_token_headers,
+        json={"key_topics": [a]},
+    )
+    assert counts() == {a: 2, b: 1}
+
+    client.put(
+        f"{settings.API_V1_STR}/conversation/{first}",
+        headers=normal_user_token_headers,
+        json={"key_topics": [b]},
+    )
+    assert counts() == {a: 1, b: 1}
+
+    client.delete(
+        f"{settings.API_V1_STR}/conversation/{first}",
+        headers=normal_user_token_headers,
+    )
+    assert counts() == {a: 1}
+
+
+def test_topic_counts_are_backfilled_on_create_all(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    topic = f"topic-{uuid.uuid4().hex[:8]}"
+    client.post(
+        f"{settings.API_V1_STR}/conversation/",
+        headers=normal_user_token_headers,
+        json={"key_topics": [topic]},
+    )
+    # As if the conversation was written before the trigger existed
+    db.exec(delete(TopicCount).where(TopicCount.topic == topic))
+    db.commit()
+
+    SQLModel.metadata.create_all(engine)
+    response = client.get(
+        f"{settings.API_V1_STR}/conversation/topics",
+        headers=normal_user_token_headers,
+        params={"limit": 1000},
+    )
+    facets = {facet["topic"]: facet["count"] for facet in response.json()["data"]}
+    assert facets[topic] == 1
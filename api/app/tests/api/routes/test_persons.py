@@ -0,0 +1,145 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.tests.utils.conversation import create_random_conversation
+
+
+def test_create_read_delete_person(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/persons/",
+        headers=superuser_token_headers,
+        json={"name": "Ada", "key_topics": ["math"]},
+    )
+    assert response.status_code == 200
+    person_id = response.json()["id"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/persons/{person_id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == person_id
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/persons/{person_id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    response = client.get(
+        f"{settings.API_V1_STR}/persons/{person_id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+
+
+def test_update_person_conversations(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    conversation = create_random_conversation(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/persons/",
+        headers=superuser_token_headers,
+        json={"name": "Grace"},
+    )
+    person_id = response.json()["id"]
+    response = client.put(
+        f"{settings.API_V1_STR}/persons/{person_id}",
+        headers=superuser_token_headers,
+        json={"conversation_ids": [str(conversation.id)]},
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == person_id
+
+
+def test_read_person_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/persons/{uuid.uuid4()}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+
+
+def test_read_persons_pages(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    created = []
+    for name in ("a", "b", "c"):
+        response = client.post(
+            f"{settings.API_V1_STR}/persons/",
+            headers=normal_user_token_headers,
+            json={"name": name},
+        )
+        created.append(response.json()["id"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "count": "exact"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            f"{settings.API_V1_STR}/persons/",
+            headers=normal_user_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        content = response.json()
+        assert len(content["data"]) <= 2
+        assert content["count"] >= 3
+        seen += [person["id"] for person in content["data"]]
+        cursor = content["next_cursor"]
+        if cursor is None:
+            break
+    # Newest first, every person exactly once
+    assert len(seen) == len(set(seen))
+    assert seen[:3] == created[::-1]
+
+
+def test_read_persons_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/persons/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+
+
+def test_person_topics_match_listing_scope(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    topic = f"topic-{uuid.uuid4().hex[:8]}"
+    client.post(
+        f"{settings.API_V1_STR}/persons/",
+        headers=normal_user_token_headers,
+        json={"name": "Linus", "key_topics": [topic]},
+    )
+    client.post(
+        f"{settings.API_V1_STR}/persons/",
+        headers=superuser_token_headers,
+        json={"name": "Barbara", "key_topics": [topic]},
+    )
+
+    def count(headers: dict[str, str]) -> int:
+        response = client.get(
+            f"{settings.API_V1_STR}/persons/topics",
+            headers=headers,
+            params={"limit": 1000},
+        )
+        assert response.status_code == 200
+        facets = {facet["topic"]: facet["count"] for facet in response.json()["data"]}
+        return facets[topic]
+
+    # Superusers list everybody's persons, and so get everybody's topics
+    assert count(superuser_token_headers) == 2
+    assert count(normal_user_token_headers) == 1
@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.audio_processing.job_queue import remove_worker, report_worker
+from app.core.config import settings
+
+
+def test_health_live(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/health/live")
+    assert r.status_code == 200
+    assert r.json()["live"] is True
+
+
+def test_health_ready(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/health/ready")
+    body = r.json()
+    assert set(body["checks"]) >= {"database", "schema"}
+    assert r.status_code == (200 if body["ready"] else 503)
+
+
+def test_db_pool_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["sync"]["pool_size"] == settings.DB_POOL_SIZE
+    assert stats["sync"]["checkouts"] > 0
+    assert stats["async"]["pool_size"] == settings.DB_POOL_SIZE
+
+
+def test_llm_cache_stats_include_workers(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    cache = {"hits": 3, "misses": 1, "hit_rate": 0.75, "entries": 4}
+    report_worker(
+        session=db,
+        worker_id="llm-worker",
+        jobs=1,
+        rss_mb=None,
+        model_cache={},
+        llm={"cache": cache},
+    )
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/llm-cache/", headers=superuser_token_headers
+    )
+    remove_worker(session=db, worker_id="llm-worker")
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["workers"]["llm-worker"] == cache
+    assert stats["total"]["hits"] == stats["api"]["hits"] + 3
+
+
+def test_llm_scheduler_stats_include_workers(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    scheduler = {"queued": 2, "calls": {}}
+    report_worker(
+        session=db,
+        worker_id="llm-worker",
+        jobs=1,
+        rss_mb=None,
+        model_cache={},
+        llm={"scheduler": scheduler},
+    )
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/llm-scheduler/", headers=superuser_token_headers
+    )
+    remove_worker(session=db, worker_id="llm-worker")
+    assert r.status_code == 200
+    assert r.json()["workers"]["llm-worker"] == scheduler
@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from app.api.pagination import count_statement, decode_cursor, encode_cursor, page
+from app.models import Conversation
+
+
+def row(created_at: datetime) -> SimpleNamespace:
+    return SimpleNamespace(created_at=created_at, id=uuid.uuid4())
+
+
+def test_cursor_round_trip() -> None:
+    last = row(datetime(2026, 10, 19, 12, 30, 1, 5, tzinfo=timezone.utc))
+    assert decode_cursor(encode_cursor(last)) == (last.created_at, last.id)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "W10", "WyJ4IiwgInkiXQ"])
+def test_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_page() -> None:
+    rows = [row(datetime.now(timezone.utc)) for _ in range(3)]
+    assert page(rows, 3) == (rows, None)
+    data, next_cursor = page(rows, 2)
+    assert data == rows[:2]
+    assert decode_cursor(next_cursor)[1] == rows[1].id
+
+
+def test_count_statement_drops_order() -> None:
+    statement = select(Conversation).where(Conversation.owner_id == uuid.uuid4())
+    sql = str(count_statement(statement.order_by(Conversation.created_at)))
+    assert "count(*)" in sql
+    assert "ORDER BY" not in sql
+    assert "owner_id" in sql
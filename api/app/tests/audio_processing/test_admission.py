@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, update
+from sqlmodel import Session
+
+from app.audio_processing.admission import (
+    AdmissionRejected,
+    check_memory,
+    throughput,
+)
+from app.audio_processing.job_queue import remove_worker, report_worker
+from app.models import AudioJob, AudioWorker, utcnow
+from app.tests.utils.audio_job import create_queued_job
+
+
+def test_throughput_of_single_finished_job(db: Session) -> None:
+    # Only the job below finished in the window, and no worker is running
+    db.execute(
+        update(AudioJob)
+        .where(AudioJob.status == "done")
+        .values(finished_at=utcnow() - timedelta(days=1))
+    )
+    db.execute(delete(AudioWorker))
+    db.commit()
+    job = create_queued_job(db, audio_seconds=120)
+    now = utcnow()
+    # Processed in a minute, then the workers were idle for 20 minutes
+    job.status = "done"
+    job.started_at = now - timedelta(minutes=21)
+    job.finished_at = now - timedelta(minutes=20)
+    db.add(job)
+    db.commit()
+    assert throughput(db) == pytest.approx(2.0)
+
+    for worker_id in ("worker-1", "worker-2"):
+        report_worker(
+            session=db, worker_id=worker_id, jobs=0, rss_mb=None, model_cache={}
+        )
+    assert throughput(db) == pytest.approx(4.0)
+    db.execute(delete(AudioWorker))
+    db.commit()
+
+
+def test_check_memory_uses_worker_reports(db: Session) -> None:
+    db.execute(delete(AudioWorker))
+    db.commit()
+    # Without live workers, only the queue limits apply
+    check_memory(session=db)
+
+    report_worker(
+        session=db,
+        worker_id="worker-1",
+        jobs=0,
+        rss_mb=None,
+        model_cache={},
+        available_mb=1.0,
+    )
+    with pytest.raises(AdmissionRejected) as e:
+        check_memory(session=db)
+    assert e.value.status_code == 503
+
+    # One worker with room is enough
+    report_worker(
+        session=db,
+        worker_id="worker-2",
+        jobs=0,
+        rss_mb=None,
+        model_cache={},
+        available_mb=4096.0,
+    )
+    check_memory(session=db)
+    remove_worker(session=db, worker_id="worker-1")
+    remove_worker(session=db, worker_id="worker-2")
@@ -0,0 +1,37 @@
+import os
+import time
+from pathlib import Path
+
+from app.audio_processing.artifacts import ArtifactStore, stage_key
+
+
+def _age(path: str, seconds: float) -> None:
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_sweep_deletes_unused_artifacts(tmp_path: Path) -> None:
+    store = ArtifactStore(str(tmp_path))
+    old = stage_key("decode", "1", ["old"])
+    recent = stage_key("decode", "1", ["recent"])
+    loaded = stage_key("decode", "1", ["loaded"])
+    for key in (old, recent, loaded):
+        store.save(key, key)
+    wav_path = store.file_path(old, ".wav")
+    Path(wav_path).write_bytes(b"RIFF")
+    store.save_record(old, {"source": old})
+    for path in (
+        store._path(old),
+        wav_path,
+        store._path(loaded),
+        os.path.join(tmp_path, "runs", f"{old}.json"),
+    ):
+        _age(path, 3600)
+    assert store.load(loaded) == loaded
+
+    assert store.sweep(max_age_seconds=60) == 1
+    assert not store.has(old)
+    assert not os.path.exists(wav_path)
+    assert not os.path.exists(os.path.join(tmp_path, "runs", f"{old}.json"))
+    assert store.has(recent)
+    assert store.has(loaded)
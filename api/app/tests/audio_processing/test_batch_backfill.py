@@ -0,0 +1,151 @@
+import json
+import uuid
+from pathlib import Path
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.audio_processing.batch_backfill import (
+    GeminiBatchClient,
+    gemini_schema,
+    run_backfill,
+)
+from app.audio_processing.sum_chain import Conversation as ConversationResult
+from app.audio_processing.sum_chain import extraction_prompt
+from app.models import Conversation, ConversationCreate
+from app.tests.utils.batch_server import create_fake_batch_server
+from app.tests.utils.user import create_random_user
+
+
+def answer(prompt: str) -> dict[str, Any]:
+    return {
+        "summary": f"Backfilled {len(prompt)}",
+        "key_topics": ["Backfill"],
+        "persons": [
+            {
+                "name": "Ada",
+                "person_description": "- Mathematician",
+                "key_topics": ["Math"],
+                "role": "SPEAKER",
+            }
+        ],
+    }
+
+
+def test_gemini_schema_inlines_references() -> None:
+    schema = gemini_schema(ConversationResult.schema())
+    assert schema["type"] == "OBJECT"
+    person = schema["properties"]["persons"]["items"]
+    assert person["type"] == "OBJECT"
+    assert person["properties"]["role"]["enum"] == ["SPEAKER", "INTERVIEWER"]
+    assert "$ref" not in json.dumps(schema)
+
+
+def test_backfill_writes_results_and_resumes(db: Session, tmp_path: Path) -> None:
+    user = create_random_user(db)
+    conversations = [
+        crud.create_conversation_db(
+            session=db,
+            conversation_in=ConversationCreate(transcript=f"Transcript {i}"),
+            owner_id=user.id,
+        )
+        for i in range(5)
+    ]
+    checkpoint_path = tmp_path / "checkpoint.json"
+    server = TestClient(create_fake_batch_server(answer, polls_until_done=2))
+    client = GeminiBatchClient(
+        http=server, api_key="test", base_url="http://testserver"
+    )
+
+    # Simulate a backfill that submitted a batch and was interrupted before polling
+    first_ids = sorted(str(conversation.id) for conversation in conversations)[:2]
+    transcripts = {str(c.id): c.transcript for c in conversations}
+    name = client.submit(
+        {id: extraction_prompt(transcripts[id]) for id in first_ids},
+        ConversationResult,
+        display_name="interrupted",
+    )
+    checkpoint_path.write_text(
+        json.dumps(
+            {
+                "cursor": first_ids[-1],
+                "pending": [{"name": name, "ids": first_ids}],
+                "completed": 0,
+                "failed": [],
+            }
+        )
+    )
+
+    checkpoint = run_backfill(
+        session=db,
+        client=client,
+        checkpoint_path=str(checkpoint_path),
+        batch_size=2,
+        max_pending=2,
+        poll_seconds=0,
+        owner_id=user.id,
+    )
+
+    assert checkpoint["pending"] == []
+    assert checkpoint["completed"] == 5
+    assert checkpoint["failed"] == []
+    # Only the three conversations after the cursor were submitted again
+    assert len(server.app.state.batches) == 3
+    db.expire_all()
+    for conversation in conversations:
+        stored = db.get(Conversation, conversation.id)
+        assert stored
+        assert stored.summary and stored.summary.startswith("Backfilled")
+        assert [person.name for person in stored.persons] == ["Ada"]
+
+
+def test_backfill_does_not_count_deleted_conversations(
+    db: Session, tmp_path: Path
+) -> None:
+    user = create_random_user(db)
+    conversations = [
+        crud.create_conversation_db(
+            session=db,
+            conversation_in=ConversationCreate(transcript=f"Transcript {i}"),
+            owner_id=user.id,
+        )
+        for i in range(2)
+    ]
+    server = TestClient(create_fake_batch_server(answer, polls_until_done=1))
+    client = GeminiBatchClient(
+        http=server, api_key="test", base_url="http://testserver"
+    )
+    ids = sorted(str(conversation.id) for conversation in conversations)
+    name = client.submit(
+        {id: extraction_prompt(f"Transcript {id}") for id in ids},
+        ConversationResult,
+        display_name="deleted",
+    )
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint_path.write_text(
+        json.dumps(
+            {
+                "cursor": ids[-1],
+                "pending": [{"name": name, "ids": ids}],
+                "completed": 0,
+                "failed": [],
+            }
+        )
+    )
+    # Deleted after the batch was submitted
+    db.delete(db.get(Conversation, uuid.UUID(ids[0])))
+    db.commit()
+
+    checkpoint = run_backfill(
+        session=db,
+        client=client,
+        checkpoint_path=str(checkpoint_path),
+        batch_size=2,
+        max_pending=2,
+        poll_seconds=0,
+        owner_id=user.id,
+    )
+
+    assert checkpoint["completed"] == 1
@@ -0,0 +1,86 @@
+import wave
+from pathlib import Path
+
+from app.audio_processing.fair_share import (
+    LANE_BULK,
+    LANE_INTERACTIVE,
+    default_lane,
+    drr_charge,
+    drr_pick,
+    estimate_audio_seconds,
+    lane_order,
+)
+from app.core.config import settings
+
+
+def serve(heads: dict[str, list[float]], quantum: float, count: int) -> list[str]:
+    """Runs drr_pick like claim_job does, with queues of job costs per owner."""
+    deficits: dict[str, float] = {}
+    last_served: dict[str, int] = {}
+    served = []
+    for tick in range(count):
+        active = {owner: costs[0] for owner, costs in heads.items() if costs}
+        for owner in deficits:
+            if owner not in active:
+                deficits[owner] = 0
+        order = sorted(active, key=lambda owner: (last_served.get(owner, -1), owner))
+        chosen, new_deficits = drr_pick(active, deficits, order, quantum)
+        deficits.update(new_deficits)
+        last_served[chosen] = tick
+        heads[chosen].pop(0)
+        served.append(chosen)
+    return served
+
+
+def test_bulk_owner_does_not_starve_others() -> None:
+    heads = {"archive": [60.0] * 200, "alice": [60.0] * 2, "bob": [60.0]}
+    served = serve(heads, quantum=60, count=6)
+    assert served[:3] == ["alice", "archive", "bob"]
+    assert served[3:5] == ["alice", "archive"]
+
+
+def test_owners_share_audio_seconds_not_job_counts() -> None:
+    heads = {"long": [300.0] * 10, "short": [30.0] * 100}
+    served = serve(heads, quantum=300, count=33)
+    # One 300s job of "long" for every ten 30s jobs of "short"
+    assert served.count("long") == 3
+    assert served.count("short") == 30
+
+
+def test_new_owner_is_served_next() -> None:
+    chosen, deficits = drr_pick(
+        {"busy": 60.0, "new": 60.0}, {"busy": 0.0}, ["new", "busy"], quantum=60
+    )
+    assert chosen == "new"
+    assert deficits == {"new": 0.0, "busy": 60.0}
+
+
+def test_charge_matches_pick() -> None:
+    heads = {"a": 90.0, "b": 30.0, "c": 200.0}
+    deficits = {"a": 10.0, "c": 150.0}
+    chosen, new_deficits = drr_pick(heads, deficits, ["a", "b", "c"], quantum=60)
+    assert drr_charge(heads, deficits, chosen, quantum=60) == new_deficits
+
+
+def test_lanes() -> None:
+    assert default_lane(settings.AUDIO_INTERACTIVE_MAX_SECONDS) == LANE_INTERACTIVE
+    assert default_lane(settings.AUDIO_INTERACTIVE_MAX_SECONDS + 1) == LANE_BULK
+    assert lane_order(None) == (LANE_INTERACTIVE, LANE_BULK)
+    assert lane_order(settings.AUDIO_BULK_MAX_WAIT_SECONDS + 1) == (
+        LANE_BULK,
+        LANE_INTERACTIVE,
+    )
+
+
+def test_estimate_audio_seconds(tmp_path: Path) -> None:
+    wav_path = tmp_path / "clip.wav"
+    with wave.open(str(wav_path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * 16000 * 3)
+    assert estimate_audio_seconds(str(wav_path)) == 3
+
+    m4a_path = tmp_path / "clip.m4a"
+    m4a_path.write_bytes(b"\0" * settings.AUDIO_BYTES_PER_SECOND * 2)
+    assert estimate_audio_seconds(str(m4a_path)) == 2
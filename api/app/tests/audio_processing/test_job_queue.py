@@ -0,0 +1,247 @@
+import os
+from datetime import timedelta
+
+from sqlmodel import Session, select
+
+from app.audio_processing.job_queue import (
+    cancel_job,
+    claim_job,
+    complete_job,
+    fail_job,
+    heartbeat,
+    is_cancel_requested,
+    list_workers,
+    release_worker_jobs,
+    remove_worker,
+    report_worker,
+    requeue_stale_jobs,
+)
+from app.audio_processing.sum_chain import Conversation as ConversationResult
+from app.audio_processing.sum_chain import Person as PersonResult
+from app.core.db import engine
+from app.models import AudioJob, Conversation, utcnow
+from app.tests.utils.audio_job import clear_queue, create_queued_job
+from app.tests.utils.user import create_random_user
+
+
+def test_claim_job(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    claimed = claim_job(session=db, worker_id="worker-1")
+    assert claimed is not None
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.worker_id == "worker-1"
+    assert claimed.attempts == 1
+    assert claim_job(session=db, worker_id="worker-2") is None
+
+
+def test_claim_skips_locked_jobs(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    with Session(engine) as other:
+        # Another worker is in the middle of claiming the job
+        other.exec(
+            select(AudioJob).where(AudioJob.id == job.id).with_for_update()
+        ).one()
+        assert claim_job(session=db, worker_id="worker-1") is None
+        other.rollback()
+    claimed = claim_job(session=db, worker_id="worker-1")
+    assert claimed is not None
+    assert claimed.id == job.id
+
+
+def test_claim_picks_next_job_when_locked(db: Session) -> None:
+    clear_queue(db)
+    locked = create_queued_job(db)
+    job = create_queued_job(db)
+    with Session(engine) as other:
+        other.exec(
+            select(AudioJob).where(AudioJob.id == locked.id).with_for_update()
+        ).one()
+        claimed = claim_job(session=db, worker_id="worker-1")
+        other.rollback()
+    assert claimed is not None
+    assert claimed.id == job.id
+
+
+def test_complete_job_stores_conversation(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    claim_job(session=db, worker_id="worker-1")
+    result = ConversationResult(
+        summary="- Talked about robots",
+        key_topics=["Robotics"],
+        persons=[
+            PersonResult(
+                name="Ada",
+                person_description="- Builds robots",
+                key_topics=["Robotics"],
+                role="INTERVIEWEE",
+            )
+        ],
+    )
+    processed = {"content": "Ada: hello", "result": result, "stages": {"stages": {}}}
+
+    # A worker that lost the job cannot complete it
+    assert (
+        complete_job(
+            session=db, job_id=job.id, worker_id="worker-2", processed=processed
+        )
+        is None
+    )
+
+    done = complete_job(
+        session=db, job_id=job.id, worker_id="worker-1", processed=processed
+    )
+    assert done is not None
+    assert done.status == "done"
+    assert done.finished_at is not None
+    conversation = db.get(Conversation, done.conversation_id)
+    assert conversation is not None
+    assert conversation.owner_id == job.owner_id
+    assert conversation.transcript == "Ada: hello"
+    assert [person.name for person in conversation.persons] == ["Ada"]
+
+
+def test_failed_job_is_retried(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    claim_job(session=db, worker_id="worker-1")
+    fail_job(session=db, job_id=job.id, worker_id="worker-1", error="boom", retry=True)
+    db.refresh(job)
+    assert job.status == "queued"
+    assert job.error == "boom"
+    # Not retried before its retry delay
+    assert job.not_before is not None and job.not_before > utcnow()
+    assert claim_job(session=db, worker_id="worker-2") is None
+
+    job.not_before = utcnow()
+    db.add(job)
+    db.commit()
+    claimed = claim_job(session=db, worker_id="worker-2")
+    assert claimed is not None
+    assert claimed.attempts == 2
+    fail_job(session=db, job_id=job.id, worker_id="worker-2", error="boom", retry=False)
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.finished_at is not None
+    assert not os.path.exists(job.file_path)
+
+
+def test_reaper_requeues_stale_jobs(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    claim_job(session=db, worker_id="worker-1")
+    assert heartbeat(session=db, job_id=job.id, worker_id="worker-1")
+
+    job.heartbeat_at = utcnow() - timedelta(minutes=10)
+    db.add(job)
+    db.commit()
+    assert (
+        requeue_stale_jobs(session=db, stale_after=timedelta(minutes=2), max_attempts=3)
+        >= 1
+    )
+    db.refresh(job)
+    assert job.status == "queued"
+    assert job.worker_id is None
+    assert job.not_before is not None
+    # The old worker notices on its next heartbeat
+    assert not heartbeat(session=db, job_id=job.id, worker_id="worker-1")
+
+
+def test_reaper_fails_jobs_out_of_attempts(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    claim_job(session=db, worker_id="worker-1")
+    job.heartbeat_at = utcnow() - timedelta(minutes=10)
+    db.add(job)
+    db.commit()
+    requeue_stale_jobs(session=db, stale_after=timedelta(minutes=2), max_attempts=1)
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.finished_at is not None
+    assert not os.path.exists(job.file_path)
+
+
+def test_interactive_lane_is_served_first(db: Session) -> None:
+    clear_queue(db)
+    bulk = create_queued_job(db, lane="bulk")
+    interactive = create_queued_job(db, lane="interactive")
+    first = claim_job(session=db, worker_id="worker-1")
+    second = claim_job(session=db, worker_id="worker-1")
+    assert first is not None and second is not None
+    assert first.id == interactive.id
+    assert second.id == bulk.id
+
+
+def test_owners_take_turns(db: Session) -> None:
+    clear_queue(db)
+    archive_owner = create_random_user(db)
+    archive = [create_queued_job(db, owner=archive_owner) for _ in range(5)]
+    clip = create_queued_job(db)
+    claimed = [claim_job(session=db, worker_id="worker-1") for _ in range(3)]
+    claimed_ids = [job.id for job in claimed if job is not None]
+    assert clip.id in claimed_ids[:2]
+    assert archive[0].id in claimed_ids[:2]
+    assert claimed_ids[2] == archive[1].id
+
+
+def test_cancel_queued_job(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    cancelled = cancel_job(session=db, job_id=job.id)
+    assert cancelled is not None
+    assert cancelled.status == "cancelled"
+    assert not os.path.exists(job.file_path)
+    assert claim_job(session=db, worker_id="worker-1") is None
+
+
+def test_cancel_running_job(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    claim_job(session=db, worker_id="worker-1")
+    requested = cancel_job(session=db, job_id=job.id)
+    assert requested is not None
+    assert requested.status == "running"
+    assert is_cancel_requested(session=db, job_id=job.id)
+
+    # A failed attempt of a cancelled job is not retried
+    fail_job(session=db, job_id=job.id, worker_id="worker-1", error="boom", retry=True)
+    db.refresh(job)
+    assert job.status == "cancelled"
+    assert job.finished_at is not None
+    assert not os.path.exists(job.file_path)
+
+
+def test_release_worker_jobs(db: Session) -> None:
+    clear_queue(db)
+    job = create_queued_job(db)
+    other = create_queued_job(db)
+    claim_job(session=db, worker_id="worker-1")
+    claim_job(session=db, worker_id="worker-2")
+    released = release_worker_jobs(session=db, worker_id="worker-1", max_attempts=3)
+    assert released == 1
+    db.refresh(job)
+    db.refresh(other)
+    assert job.status == "queued"
+    assert job.worker_id is None
+    assert other.status == "running"
+
+
+def test_report_worker(db: Session) -> None:
+    cache = {"budget_bytes": 1024, "resident_bytes": 0, "models": [], "events": []}
+    report_worker(
+        session=db, worker_id="worker-1", jobs=0, rss_mb=512.0, model_cache=cache
+    )
+    report_worker(
+        session=db, worker_id="worker-1", jobs=1, rss_mb=768.0, model_cache=cache
+    )
+    workers = list_workers(session=db, active_within=timedelta(minutes=1))
+    worker = next(worker for worker in workers if worker.id == "worker-1")
+    assert worker.jobs == 1
+    assert worker.rss_mb == 768.0
+
+    remove_worker(session=db, worker_id="worker-1")
+    workers = list_workers(session=db, active_within=timedelta(minutes=1))
+    assert "worker-1" not in [worker.id for worker in workers]
@@ -0,0 +1,64 @@
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from app.audio_processing.llm_cache import LLMResponseCache
+from app.audio_processing.sum_chain import Conversation
+
+
+def test_make_key_depends_on_model_prompt_and_schema() -> None:
+    key = LLMResponseCache.make_key("gemini-2.0-flash", "prompt", Conversation)
+    assert key == LLMResponseCache.make_key("gemini-2.0-flash", "prompt", Conversation)
+    assert key != LLMResponseCache.make_key("gemini-2.0-pro", "prompt", Conversation)
+    assert key != LLMResponseCache.make_key("gemini-2.0-flash", "other", Conversation)
+    assert key != LLMResponseCache.make_key("gemini-2.0-flash", "prompt")
+
+
+def test_hit_and_miss_counters(tmp_path: Path) -> None:
+    cache = LLMResponseCache(
+        str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=10
+    )
+    assert cache.get("a") is None
+    cache.set("a", "value")
+    assert cache.get("a") == "value"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path: Path) -> None:
+    cache = LLMResponseCache(
+        str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=10
+    )
+    cache.set("a", "value")
+    with patch(
+        "app.audio_processing.llm_cache.time.time", return_value=time.time() + 61
+    ):
+        assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = LLMResponseCache(
+        str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=2
+    )
+    now = time.time()
+    with patch("app.audio_processing.llm_cache.time.time") as clock:
+        clock.return_value = now
+        cache.set("a", "1")
+        clock.return_value = now + 1
+        cache.set("b", "2")
+        clock.return_value = now + 2
+        assert cache.get("a") == "1"
+        clock.return_value = now + 3
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+
+
+def test_cache_persists_across_instances(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    LLMResponseCache(path, ttl_seconds=60, max_entries=10).set("a", "value")
+    assert LLMResponseCache(path, ttl_seconds=60, max_entries=10).get("a") == "value"
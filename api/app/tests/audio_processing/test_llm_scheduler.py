@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.audio_processing.llm_scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    LLMCallError,
+    LLMScheduler,
+    TokenBucket,
+    retry_after_seconds,
+)
+from app.tests.utils.llm import (
+    agenerate,
+    create_fake_llm_server,
+    fake_llm_client,
+    serve,
+)
+
+
+def make_scheduler(**kwargs: int) -> LLMScheduler:
+    options = {
+        "requests_per_minute": 6000,
+        "tokens_per_minute": 1_000_000,
+        "max_attempts": 3,
+        "max_concurrency": 4,
+    }
+    options.update(kwargs)
+    return LLMScheduler(**options, max_backoff_seconds=0.01)
+
+
+def test_retries_quota_errors() -> None:
+    server = create_fake_llm_server(failures=2, error_code=429)
+    scheduler = make_scheduler()
+
+    with serve(server) as base_url:
+        llm = fake_llm_client(base_url)
+
+        async def run() -> str:
+            return await scheduler.submit(
+                lambda: agenerate(llm, "hi"), prompt="hi", name="test"
+            )
+
+        assert asyncio.run(run()) == "answer to hi"
+    assert len(server.state.calls) == 3
+    stats = scheduler.stats()["calls"]["test"]
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_waits_for_retry_after() -> None:
+    server = create_fake_llm_server(failures=1, error_code=429, retry_after="1")
+    scheduler = make_scheduler()
+
+    with serve(server) as base_url:
+        llm = fake_llm_client(base_url)
+
+        async def run() -> str:
+            return await scheduler.submit(lambda: agenerate(llm, "hi"), prompt="hi")
+
+        start = time.monotonic()
+        assert asyncio.run(run()) == "answer to hi"
+    # The backoff alone is at most max_backoff_seconds (0.01)
+    assert time.monotonic() - start >= 1
+
+
+def test_gives_up_after_max_attempts() -> None:
+    server = create_fake_llm_server(failures=10, error_code=503)
+    scheduler = make_scheduler(max_attempts=3)
+
+    with serve(server) as base_url:
+        llm = fake_llm_client(base_url)
+
+        async def run() -> str:
+            return await scheduler.submit(
+                lambda: agenerate(llm, "hi"), prompt="hi", name="test"
+            )
+
+        with pytest.raises(LLMCallError):
+            asyncio.run(run())
+    assert len(server.state.calls) == 3
+    assert scheduler.stats()["calls"]["test"]["errors"] == 1
+
+
+def test_does_not_retry_invalid_requests() -> None:
+    server = create_fake_llm_server(failures=1, error_code=400)
+    scheduler = make_scheduler()
+
+    with serve(server) as base_url:
+        llm = fake_llm_client(base_url)
+
+        async def run() -> str:
+            return await scheduler.submit(lambda: agenerate(llm, "hi"), prompt="hi")
+
+        with pytest.raises(LLMCallError):
+            asyncio.run(run())
+    assert len(server.state.calls) == 1
+
+
+def test_higher_priority_calls_are_served_first() -> None:
+    server = create_fake_llm_server()
+    scheduler = make_scheduler(max_concurrency=1)
+
+    async def run(llm: ChatGoogleGenerativeAI) -> None:
+        server.state.release.clear()
+        blocker = asyncio.create_task(
+            scheduler.submit(lambda: agenerate(llm, "first"), prompt="first")
+        )
+        await asyncio.sleep(0.2)
+        bulk = asyncio.create_task(
+            scheduler.submit(
+                lambda: agenerate(llm, "bulk"), prompt="bulk", priority=PRIORITY_BULK
+            )
+        )
+        interactive = asyncio.create_task(
+            scheduler.submit(
+                lambda: agenerate(llm, "interactive"),
+                prompt="interactive",
+                priority=PRIORITY_INTERACTIVE,
+            )
+        )
+        await asyncio.sleep(0.05)
+        server.state.release.set()
+        await asyncio.gather(blocker, bulk, interactive)
+
+    with serve(server) as base_url:
+        asyncio.run(run(fake_llm_client(base_url)))
+    assert server.state.calls == ["first", "interactive", "bulk"]
+
+
+def test_retry_after_seconds() -> None:
+    class Response:
+        headers = {"Retry-After": "7"}
+
+    class QuotaError(Exception):
+        response = Response()
+
+    assert retry_after_seconds(QuotaError()) == 7
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_token_bucket_budget() -> None:
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    now[0] = 30.0
+    assert bucket.wait_time(30) == 0
+    assert bucket.wait_time(31) == pytest.approx(1.0)
@@ -0,0 +1,78 @@
+import torch
+
+from app.audio_processing.model_cache import ModelCache, model_bytes
+
+# float32 weights and bias of a Linear(n, n): 4 * (n * n + n) bytes
+SIZES = {"small": 16, "medium": 32, "large": 48}
+
+
+def linear_bytes(name: str) -> int:
+    n = SIZES[name]
+    return 4 * (n * n + n)
+
+
+def make_cache(budget_bytes: int) -> tuple[ModelCache, list[str]]:
+    loaded = []
+
+    def load(name):
+        loaded.append(name)
+        return torch.nn.Linear(SIZES[name], SIZES[name])
+
+    return ModelCache(budget_bytes, loaders={"whisper": load}), loaded
+
+
+def test_model_bytes() -> None:
+    class Wrapper:
+        def __init__(self):
+            self.pipeline = torch.nn.Sequential(torch.nn.Linear(16, 16))
+
+    assert model_bytes(Wrapper()) == linear_bytes("small")
+
+
+def test_models_are_loaded_once() -> None:
+    cache, loaded = make_cache(10 * 2**20)
+    with cache.use("whisper", "small") as first:
+        pass
+    with cache.use("whisper", "small") as second:
+        assert second is first
+    assert loaded == ["small"]
+    stats = cache.stats()
+    assert stats["resident_bytes"] == linear_bytes("small")
+    assert [event["type"] for event in stats["events"]] == ["load"]
+
+
+def test_least_recently_used_idle_model_is_evicted() -> None:
+    cache, loaded = make_cache(linear_bytes("small") + linear_bytes("large"))
+    with cache.use("whisper", "small"):
+        pass
+    with cache.use("whisper", "medium"):
+        pass
+    with cache.use("whisper", "small"):
+        pass
+    # "medium" was used least recently
+    with cache.use("whisper", "large"):
+        pass
+    resident = [model["model"] for model in cache.stats()["models"]]
+    assert resident == ["whisper:small", "whisper:large"]
+    evictions = [
+        event["model"] for event in cache.stats()["events"] if event["type"] == "evict"
+    ]
+    assert evictions == ["whisper:medium"]
+
+
+def test_models_in_use_are_not_evicted() -> None:
+    cache, loaded = make_cache(linear_bytes("small"))
+    with cache.use("whisper", "small"):
+        with cache.use("whisper", "medium"):
+            resident = [model["model"] for model in cache.stats()["models"]]
+            assert resident == ["whisper:small", "whisper:medium"]
+    with cache.use("whisper", "large"):
+        pass
+    assert [model["model"] for model in cache.stats()["models"]] == ["whisper:large"]
+
+
+def test_preload_does_not_evict() -> None:
+    cache, loaded = make_cache(linear_bytes("medium"))
+    assert cache.preload(("whisper", "medium"))
+    assert not cache.preload(("whisper", "small"))
+    assert [model["model"] for model in cache.stats()["models"]] == ["whisper:medium"]
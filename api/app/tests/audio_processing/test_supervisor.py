@@ -0,0 +1,74 @@
+import pytest
+
+from app.audio_processing import supervisor
+from app.audio_processing.supervisor import Supervisor, private_mb, rss_mb
+
+
+class FakeProcess:
+    def __init__(self, pid: int, exitcode: int | None):
+        self.pid = pid
+        self.exitcode = exitcode
+
+    def is_alive(self) -> bool:
+        return self.exitcode is None
+
+    def join(self) -> None:
+        pass
+
+
+def test_private_memory_is_part_of_rss() -> None:
+    rss = rss_mb()
+    private = private_mb()
+    if rss is None:
+        pytest.skip("/proc is not available")
+    assert private is not None
+    assert 0 < private <= rss
+
+
+def test_dead_workers_are_replaced(monkeypatch: pytest.MonkeyPatch) -> None:
+    released = []
+    monkeypatch.setattr(
+        supervisor,
+        "release_worker_jobs",
+        lambda session, worker_id, max_attempts: released.append(worker_id),
+    )
+    monkeypatch.setattr(supervisor, "remove_worker", lambda session, worker_id: None)
+    monkeypatch.setattr(supervisor, "private_mb", lambda pid: 100.0)
+    started = []
+    node = Supervisor(3)
+    monkeypatch.setattr(node, "_start", started.append)
+    node.children = {
+        0: FakeProcess(10, None),
+        1: FakeProcess(11, 0),
+        2: FakeProcess(12, -9),
+    }
+
+    node.check()
+    assert started == [1, 2]
+    # Only the worker that was killed had jobs left to release
+    assert released == [supervisor.worker_id_for(12)]
+
+    node.children = {0: FakeProcess(13, 0)}
+    node.drain()
+    node.check()
+    assert started == [1, 2]
+    assert node.children == {}
+
+
+def test_fork_loads_models_single_threaded(monkeypatch: pytest.MonkeyPatch) -> None:
+    torch = pytest.importorskip("torch")
+    calls = []
+    monkeypatch.setattr(
+        supervisor, "pin_threads", lambda threads: calls.append(threads)
+    )
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False, raising=False)
+    monkeypatch.setattr(torch, "get_num_threads", lambda: 8, raising=False)
+    monkeypatch.setattr(
+        "app.audio_processing.model_cache.preload", lambda: calls.append("preload")
+    )
+    monkeypatch.setattr(supervisor.gc, "freeze", lambda: None)
+    node = Supervisor(2, fork=True)
+    assert node._prepare_fork()
+    assert calls == [1, "preload"]
+    # The workers get torch's default, which the supervisor gave up
+    assert node.threads == 8
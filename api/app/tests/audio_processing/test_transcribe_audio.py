@@ -0,0 +1,135 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.audio_processing.cancellation import CancelToken, JobCancelled
+from app.audio_processing.transcribe_audio import transcribe_audio
+
+SAMPLE_RATE = 16000
+
+
+class FakeWhisperModel:
+    """Answers every window with two segments and can crash on a given window."""
+
+    def __init__(self, crash_on_call: int | None = None) -> None:
+        self.crash_on_call = crash_on_call
+        self.calls = 0
+        self.prompts: list[str | None] = []
+
+    def transcribe(
+        self, audio: np.ndarray, initial_prompt: str | None = None
+    ) -> dict[str, Any]:
+        self.calls += 1
+        if self.calls == self.crash_on_call:
+            raise RuntimeError("worker recycled")
+        self.prompts.append(initial_prompt)
+        seconds = len(audio) / SAMPLE_RATE
+        return {
+            "language": "en",
+            "segments": [
+                {
+                    "id": 0,
+                    "start": 0.0,
+                    "end": seconds / 2,
+                    "text": f" first {self.calls}",
+                },
+                {
+                    "id": 1,
+                    "start": seconds / 2,
+                    "end": seconds,
+                    "text": f" second {self.calls}",
+                },
+            ],
+        }
+
+
+def run(audio_file: Path, checkpoint_dir: Path, model: FakeWhisperModel) -> Any:
+    audio = np.zeros(SAMPLE_RATE * 25, dtype=np.float32)
+    with (
+        patch(
+            "app.audio_processing.transcribe_audio.whisper.load_model",
+            return_value=model,
+        ),
+        patch(
+            "app.audio_processing.transcribe_audio.whisper.load_audio",
+            return_value=audio,
+        ),
+    ):
+        return transcribe_audio(
+            str(audio_file),
+            key="segments",
+            checkpoint_dir=str(checkpoint_dir),
+            window_seconds=10,
+        )
+
+
+def test_resumed_transcription_matches_uninterrupted_run(tmp_path: Path) -> None:
+    audio_file = tmp_path / "audio.wav"
+    audio_file.write_bytes(b"")
+
+    uninterrupted = run(audio_file, tmp_path / "full", FakeWhisperModel())
+
+    crashed_model = FakeWhisperModel(crash_on_call=3)
+    assert run(audio_file, tmp_path / "resumed", crashed_model) is None
+    resumed_model = FakeWhisperModel()
+    resumed = run(audio_file, tmp_path / "resumed", resumed_model)
+
+    # Only the window that was interrupted is transcribed again
+    assert resumed_model.calls == 1
+    assert resumed_model.prompts == [" first 2 second 2"]
+    assert [segment["id"] for segment in uninterrupted] == list(range(6))
+    assert [segment["start"] for segment in uninterrupted] == [0, 5, 10, 15, 20, 22.5]
+    assert [segment["text"] for segment in resumed] == [
+        " first 1",
+        " second 1",
+        " first 2",
+        " second 2",
+        " first 1",
+        " second 1",
+    ]
+    assert [(s["start"], s["end"]) for s in resumed] == [
+        (s["start"], s["end"]) for s in uninterrupted
+    ]
+
+
+def test_cancelled_between_windows(tmp_path: Path) -> None:
+    audio_file = tmp_path / "audio.wav"
+    audio_file.write_bytes(b"")
+    cancel_token = CancelToken()
+
+    class CancellingModel(FakeWhisperModel):
+        def transcribe(
+            self, audio: np.ndarray, initial_prompt: str | None = None
+        ) -> dict[str, Any]:
+            result = super().transcribe(audio, initial_prompt)
+            cancel_token.cancel()
+            return result
+
+    model = CancellingModel()
+    audio = np.zeros(SAMPLE_RATE * 25, dtype=np.float32)
+    with (
+        patch(
+            "app.audio_processing.transcribe_audio.whisper.load_model",
+            return_value=model,
+        ),
+        patch(
+            "app.audio_processing.transcribe_audio.whisper.load_audio",
+            return_value=audio,
+        ),
+        pytest.raises(JobCancelled),
+    ):
+        transcribe_audio(
+            str(audio_file),
+            key="segments",
+            checkpoint_dir=str(tmp_path / "windows"),
+            window_seconds=10,
+            cancel_token=cancel_token,
+        )
+    # The window in flight is finished and kept, nothing after it is started
+    assert model.calls == 1
+    assert sorted(path.name for path in (tmp_path / "windows").iterdir()) == [
+        "window_00000.json"
+    ]
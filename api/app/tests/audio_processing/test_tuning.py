@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.audio_processing.tuning import candidates, load_tuning, worker_config
+from app.core.config import settings
+
+
+def test_candidates_do_not_oversubscribe() -> None:
+    combinations = candidates(8)
+    assert (1, 8) in combinations
+    assert (8, 1) in combinations
+    assert (2, 4) in combinations
+    assert all(4 <= processes * threads <= 8 for processes, threads in combinations)
+    assert all(processes <= 2 for processes, _ in candidates(8, max_processes=2))
+
+
+def test_candidates_single_core() -> None:
+    assert candidates(1) == [(1, 1)]
+
+
+def test_worker_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "tuning.json"
+    monkeypatch.setattr(settings, "AUDIO_TUNING_PATH", str(path))
+    monkeypatch.setattr(settings, "AUDIO_WORKER_PROCESSES", None)
+    monkeypatch.setattr(settings, "AUDIO_WORKER_THREADS", None)
+    assert worker_config() == (1, None)
+
+    path.write_text(json.dumps({"processes": 3, "threads": 2, "results": []}))
+    assert worker_config() == (3, 2)
+
+    # Explicit settings win over the tuning file
+    monkeypatch.setattr(settings, "AUDIO_WORKER_THREADS", 4)
+    assert worker_config() == (3, 4)
+
+
+def test_invalid_tuning_file_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "tuning.json"
+    path.write_text("{not json")
+    assert load_tuning(str(path)) is None
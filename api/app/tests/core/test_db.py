@@ -0,0 +1,59 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.db import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool
+
+
+def test_pool_stats(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    first = engine.connect()
+    second = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["overflow_connections"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["wait_max_ms"] is not None
+
+    first.close()
+    second.close()
+    engine.dispose()
+    # Statistics survive the pool being replaced
+    assert engine.pool.stats()["checkouts"] == 2
+    assert engine.pool.stats()["checked_out"] == 0
+
+
+def test_async_pool_stats(tmp_path: Path) -> None:
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=2,
+    )
+
+    async def query() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def run() -> None:
+        await asyncio.gather(query(), query())
+        await engine.dispose()
+
+    asyncio.run(run())
+    stats = engine.pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["checked_out"] == 0
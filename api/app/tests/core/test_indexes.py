@@ -0,0 +1,52 @@
+import uuid
+
+import pytest
+from sqlmodel import Session, select, text
+
+from app.api.pagination import Explain, paginate
+from app.crud import key_topics_filter
+from app.models import Conversation, Participation, Person
+
+
+def plan_indexes(db: Session, statement) -> set[str]:
+    """Indexes used by the plan of ``statement``."""
+    # The test tables are tiny, a sequential scan would always be cheaper
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db.execute(Explain(statement)).scalar_one()
+    db.rollback()
+    indexes = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return indexes
+
+
+@pytest.mark.parametrize("model", [Conversation, Person])
+def test_owner_listing_uses_owner_index(db: Session, model) -> None:
+    statement = select(model).where(model.owner_id == uuid.uuid4())
+    indexes = plan_indexes(db, paginate(statement, model, None, 100))
+    assert f"ix_{model.__tablename__}_owner_id_created_at_id" in indexes
+
+
+def test_participation_by_conversation_uses_reverse_index(db: Session) -> None:
+    statement = select(Participation).where(
+        Participation.conversation_id == uuid.uuid4()
+    )
+    assert "ix_participation_conversation_id" in plan_indexes(db, statement)
+
+
+@pytest.mark.parametrize("model", [Conversation, Person])
+def test_key_topics_containment_uses_gin_index(db: Session, model) -> None:
+    statement = select(model).where(model.key_topics.contains(["budget"]))
+    assert f"ix_{model.__tablename__}_key_topics" in plan_indexes(db, statement)
+
+
+@pytest.mark.parametrize("match", ["any", "all"])
+def test_topics_filter_uses_gin_index(db: Session, match: str) -> None:
+    statement = select(Conversation).where(
+        key_topics_filter(Conversation, ["budget", "hiring"], match)
+    )
+    assert "ix_conversation_key_topics" in plan_indexes(db, statement)
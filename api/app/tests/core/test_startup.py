@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.core import startup
+from app.core.config import settings
+from app.core.startup import Readiness, wait_for_db
+
+
+def test_readiness() -> None:
+    readiness = Readiness()
+    assert not readiness.ready
+    readiness.add("database")
+    readiness.add("llm", required=False)
+    assert readiness.live
+    assert not readiness.ready
+
+    readiness.finish("database", 0.1)
+    readiness.finish("llm", 0.2, error="no API key")
+    # A failed warm-up is reported, but does not keep the app from serving
+    assert readiness.ready
+    assert readiness.checks["llm"]["status"] == "failed"
+
+    readiness.finish("database", 0.1, error="timeout")
+    assert not readiness.live
+    assert not readiness.ready
+
+
+def test_wait_for_db_backs_off(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts = iter([False, False, False, True])
+    delays = []
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(startup, "check_db_connection", lambda: next(attempts))
+    monkeypatch.setattr(startup.asyncio, "sleep", sleep)
+    monkeypatch.setattr(settings, "STARTUP_DB_RETRY_SECONDS", 1)
+    monkeypatch.setattr(settings, "STARTUP_DB_RETRY_MAX_SECONDS", 3)
+    asyncio.run(wait_for_db())
+    assert delays == [1, 2, 3]
+
+
+def test_wait_for_db_gives_up(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(startup, "check_db_connection", lambda: False)
+    monkeypatch.setattr(settings, "STARTUP_DB_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "STARTUP_DB_TIMEOUT_SECONDS", 0.05)
+    with pytest.raises(RuntimeError):
+        asyncio.run(wait_for_db())
+
+
+def test_prepare_db_leaves_alembic_schema_to_migrations(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    created = []
+    monkeypatch.setattr(
+        startup,
+        "init_db",
+        lambda session, create_tables: created.append(create_tables),
+    )
+    monkeypatch.setattr(startup, "alembic_managed", lambda: True)
+    monkeypatch.setattr(startup, "migrations_pending", lambda: True)
+    with pytest.raises(RuntimeError):
+        startup.prepare_db()
+    assert created == []
+
+    monkeypatch.setattr(startup, "migrations_pending", lambda: False)
+    startup.prepare_db()
+    assert created == [False]
+
+    # Only a database without Alembic gets its tables from the models
+    monkeypatch.setattr(startup, "alembic_managed", lambda: False)
+    startup.prepare_db()
+    assert created == [False, True]
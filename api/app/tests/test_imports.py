@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+
+# Generous for slow CI machines; app.main imports in well under two seconds
+# without the ML stack, and took over three with it
+IMPORT_BUDGET_SECONDS = 5.0
+
+HEAVY_MODULES = (
+    "torch",
+    "whisper",
+    "pyannote",
+    "pydub",
+    "pandas",
+    "langchain_core",
+    "langchain_google_genai",
+)
+
+SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+heavy = sorted({name.split(".")[0] for name in sys.modules} & set(sys.argv[2:]))
+print(json.dumps({"seconds": seconds, "heavy": heavy}))
+"""
+
+
+def import_in_subprocess(module: str) -> dict:
+    # A fresh interpreter, the test session itself may have imported anything
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT, module, *HEAVY_MODULES],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_api_does_not_import_ml_stack() -> None:
+    result = import_in_subprocess("app.main")
+    assert result["heavy"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_worker_pins_threads_before_ml_stack() -> None:
+    # worker.main() pins the torch threads, which only works before torch is imported
+    assert import_in_subprocess("app.audio_processing.worker")["heavy"] == []
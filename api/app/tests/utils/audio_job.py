@@ -0,0 +1,36 @@
+import os
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.audio_processing.job_queue import enqueue_job
+from app.core.config import settings
+from app.models import AudioJob, User
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def clear_queue(db: Session) -> None:
+    """Fails every queued job left over by other tests."""
+    db.execute(
+        update(AudioJob).where(AudioJob.status == "queued").values(status="failed")
+    )
+    db.commit()
+
+
+def create_queued_job(
+    db: Session,
+    owner: User | None = None,
+    audio_seconds: float = 1,
+    lane: str | None = None,
+) -> AudioJob:
+    owner = owner or create_random_user(db)
+    filename = f"{random_lower_string()}.m4a"
+    file_path = os.path.join(settings.UPLOAD_DIR, filename)
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    # Sized so the duration estimate comes out as audio_seconds
+    with open(file_path, "wb") as f:
+        f.write(b"\0" * int(audio_seconds * settings.AUDIO_BYTES_PER_SECOND))
+    return enqueue_job(
+        session=db, owner_id=owner.id, filename=filename, file_path=file_path, lane=lane
+    )
@@ -0,0 +1,70 @@
+import itertools
+import json
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import FastAPI, Request
+
+
+def create_fake_batch_server(
+    answer: Callable[[str], dict[str, Any]], polls_until_done: int = 1
+) -> FastAPI:
+    """
+    Local stand-in for the Gemini Batch API.
+
+    Every submitted request is answered with ``answer(prompt)`` as JSON text.
+    A batch reports itself as running for ``polls_until_done`` polls.
+    """
+    app = FastAPI()
+    counter = itertools.count(1)
+    app.state.batches = {}
+
+    @app.post("/v1beta/models/{model_action}")
+    async def batch_generate_content(model_action: str, request: Request) -> Any:
+        assert model_action.endswith(":batchGenerateContent")
+        body = await request.json()
+        name = f"batches/{next(counter)}"
+        requests = body["batch"]["input_config"]["requests"]["requests"]
+        app.state.batches[name] = {"requests": requests, "polls": 0}
+        return {"name": name, "metadata": {"state": "BATCH_STATE_PENDING"}}
+
+    @app.get("/v1beta/batches/{id}")
+    def get_batch(id: str) -> Any:
+        name = f"batches/{id}"
+        batch = app.state.batches[name]
+        batch["polls"] += 1
+        if batch["polls"] < polls_until_done:
+            return {"name": name, "metadata": {"state": "BATCH_STATE_RUNNING"}}
+        responses = [
+            {
+                "metadata": item["metadata"],
+                "response": {
+                    "candidates": [
+                        {
+                            "content": {
+                                "parts": [
+                                    {
+                                        "text": json.dumps(
+                                            answer(
+                                                item["request"]["contents"][0]["parts"][
+                                                    0
+                                                ]["text"]
+                                            )
+                                        )
+                                    }
+                                ]
+                            }
+                        }
+                    ]
+                },
+            }
+            for item in batch["requests"]
+        ]
+        return {
+            "name": name,
+            "done": True,
+            "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+            "response": {"inlinedResponses": {"inlinedResponses": responses}},
+        }
+
+    return app
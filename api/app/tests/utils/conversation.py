@@ -0,0 +1,20 @@
+from sqlmodel import Session
+
+from app import crud
+from app.models import Conversation, ConversationCreate
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_conversation(db: Session) -> Conversation:
+    user = create_random_user(db)
+    owner_id = user.id
+    assert owner_id is not None
+    conversation_in = ConversationCreate(
+        transcript=random_lower_string(),
+        summary=random_lower_string(),
+        key_topics=[random_lower_string()],
+    )
+    return crud.create_conversation_db(
+        session=db, conversation_in=conversation_in, owner_id=owner_id
+    )
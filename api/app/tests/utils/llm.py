@@ -0,0 +1,110 @@
+import asyncio
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from google.ai.generativelanguage_v1beta.types import (
+    Content,
+    GenerateContentRequest,
+    Part,
+)
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.audio_processing.llm_client import LLM_MODEL
+
+
+def create_fake_llm_server(
+    failures: int = 0, error_code: int = 429, retry_after: str | None = None
+) -> FastAPI:
+    """
+    Local stand-in for the Gemini generateContent API.
+
+    Fails the first ``failures`` calls with ``error_code`` (and a Retry-After
+    header if given) and then answers with the prompt. Every prompt is
+    recorded in ``app.state.calls`` in the order it was served; calls wait
+    while ``app.state.release`` is cleared.
+    """
+    app = FastAPI()
+    app.state.failures = failures
+    app.state.calls = []
+    app.state.release = threading.Event()
+    app.state.release.set()
+
+    @app.post("/v1beta/models/{model_action}")
+    def generate_content(model_action: str, body: dict[str, Any]) -> Any:
+        assert model_action.endswith(":generateContent")
+        app.state.release.wait(timeout=10)
+        prompt = body["contents"][0]["parts"][0]["text"]
+        app.state.calls.append(prompt)
+        if app.state.failures > 0:
+            app.state.failures -= 1
+            return JSONResponse(
+                {"error": {"code": error_code, "message": "fake LLM error"}},
+                status_code=error_code,
+                headers={"Retry-After": retry_after} if retry_after else None,
+            )
+        return {
+            "candidates": [
+                {
+                    "content": {
+                        "role": "model",
+                        "parts": [{"text": f"answer to {prompt}"}],
+                    },
+                    "finishReason": "STOP",
+                }
+            ]
+        }
+
+    return app
+
+
+@contextmanager
+def serve(app: FastAPI) -> Iterator[str]:
+    """Serves ``app`` over HTTP on a free local port and yields its base URL."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def fake_llm_client(base_url: str) -> ChatGoogleGenerativeAI:
+    """The Gemini client, talking REST to a server started with serve()."""
+    return ChatGoogleGenerativeAI(
+        model=LLM_MODEL,
+        google_api_key="test",
+        transport="rest",
+        client_options={"api_endpoint": base_url},
+    )
+
+
+async def agenerate(llm: ChatGoogleGenerativeAI, prompt: str) -> str:
+    """
+    One generateContent call through the client's API transport, so its
+    errors are the ones the real API produces. Without retries, these are
+    left to the scheduler.
+    """
+    request = GenerateContentRequest(
+        model=f"models/{LLM_MODEL}",
+        contents=[Content(role="user", parts=[Part(text=prompt)])],
+    )
+    response = await asyncio.to_thread(
+        llm.client.generate_content, request=request, retry=None
+    )
+    return response.candidates[0].content.parts[0].text